@@ -0,0 +1,480 @@
+"""
+Benchmarks for the time a signal handler pauses the program
+
+Synthetic stacks of varying depth, number and size of locals,
+module frame size and number of threads are dumped by every
+siginfo mode. For each combination the handler's pause time,
+the number of bytes written and the peak of allocated memory
+are measured. The import and initialisation cost is measured
+once per mode. The capture of all thread stacks is measured with
+busy worker threads, together with how much it slows the workers
+down; run it with ``python3.13t`` to check that it scales across
+cores without the GIL.
+
+Usage:
+
+.. code-block:: bash
+
+    # run all benchmarks and store the results as baseline
+    python benchmarks/run.py --save baseline.json
+
+    # run again and fail if anything is more than 25% worse
+    python benchmarks/run.py --compare baseline.json --threshold 0.25
+
+Timings depend on the machine, so a baseline is only comparable on
+the machine that recorded it. The CI records the baseline with the
+target branch in the same job and then compares the pull request.
+
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import siginfo  # noqa: E402
+from siginfo import siginfoclass  # noqa: E402
+from siginfo.capture import capture_threads, gil_enabled  # noqa: E402
+from siginfo.dispatcher import SignalDispatcher  # noqa: E402
+from siginfo.monitor import has_monitoring  # noqa: E402
+
+
+# (name, stack depth, locals per frame, size of each value, module globals, threads)
+SCENARIOS = (
+    ('shallow', 5, 5, 10, 50, 0),
+    ('deep', 200, 5, 10, 50, 0),
+    ('many_locals', 10, 200, 10, 50, 0),
+    ('large_values', 10, 10, 100000, 50, 0),
+    ('large_module', 10, 5, 10, 5000, 0),
+    ('threads', 10, 5, 10, 50, 50),
+)
+
+QUICK_SCENARIOS = ('shallow', 'many_locals')
+
+# Relative change that counts as regression
+THRESHOLD = 0.25
+
+# Time differences below this are noise and never regressions
+MIN_TIME_MS = 0.5
+
+# Metrics that are compared with the baseline. Maximum pause times
+# are reported only, they depend too much on the machine's load.
+CHECKED_METRICS = (
+    'pause_median_ms', 'bytes', 'peak_kb', 'init_median_ms', 'import_median_ms',
+    'capture_median_ms'
+)
+
+# Busy worker threads and their stack depth for the capture benchmark
+CAPTURE_THREADS = 8
+CAPTURE_DEPTH = 20
+
+
+class CountingOutput(object):
+    """
+    Output that counts the written characters
+    """
+    def __init__(self):
+        self.size = 0
+
+    def write(self, data):
+        self.size += len(data)
+
+    def flush(self):
+        pass
+
+
+def _configure_single(instance):
+    instance.set_vars('v0', 'len(v1)', 'caller:v0')
+    instance.track('depth')
+
+
+def _configure_resources(instance):
+    instance.RESOURCES = True
+
+
+def _snapshot_mode():
+    directory = tempfile.mkdtemp()
+    return {'directory': directory}
+
+
+def _monitored(row):
+    return row
+
+
+def _configure_trigger(instance):
+    # instrumented but never true, the handler itself works like SiginfoBasic
+    instance.add_trigger(_monitored, 'row is None')
+
+
+def _configure_meter(instance):
+    instance.add_meter(_monitored)
+    for row in range(1000):
+        _monitored(row)
+
+
+def _configure_looplag(instance):
+    # fills the histogram and the stalls without running a loop
+    monitor = instance.monitor
+    monitor.thread_id = threading.get_ident()
+    for _ in range(2 * monitor.max_stalls):
+        monitor.capture(monitor.threshold)
+        monitor._expected = time.monotonic() - monitor.threshold
+        monitor._beat()
+
+
+def _configure_gil(instance):
+    # the first signal starts the probe, every further signal prints its report
+    instance.probe.start()
+
+
+def _has_unix_sockets():
+    return hasattr(socket, 'AF_UNIX')
+
+
+# (name, class, extra constructor arguments, configure function, availability check)
+MODES = (
+    ('basic', siginfoclass.SiginfoBasic, None, None, None),
+    ('basic_resources', siginfoclass.SiginfoBasic, None, _configure_resources, None),
+    ('single', siginfoclass.SigInfoSingle, None, _configure_single, None),
+    ('deadlock', siginfoclass.SigInfoDeadlock, None, None, None),
+    ('snapshot', siginfoclass.SigInfoSnapshot, _snapshot_mode, None, None),
+    ('trigger', siginfoclass.SigInfoTrigger, None, _configure_trigger, has_monitoring),
+    ('meter', siginfoclass.SigInfoMeter, None, _configure_meter, has_monitoring),
+    ('console', siginfoclass.SigInfoConsole, None, None, _has_unix_sockets),
+    ('referrers', siginfoclass.SigInfoReferrers, None, None, None),
+    ('looplag', siginfoclass.SigInfoLoopLag, None, _configure_looplag, None),
+    ('gil', siginfoclass.SigInfoGil, None, _configure_gil, None),
+)
+
+
+def available(mode):
+    """
+    ``False`` for modes that the running interpreter doesn't support
+    """
+    check = mode[4]
+    return check is None or check()
+
+
+def make_level(n_locals):
+    """
+    Creates a recursive function with ``n_locals`` local variables
+    """
+    lines = ['def level(depth, payload, callback):']
+    for idx in range(n_locals):
+        lines.append('    v{} = payload'.format(idx))
+    lines.append('    if depth <= 1:')
+    lines.append('        return callback(sys._getframe())')
+    lines.append('    return level(depth - 1, payload, callback)')
+    namespace = {'sys': sys}
+    exec(compile('\n'.join(lines), '<benchmark>', 'exec'), namespace)
+    return namespace['level']
+
+
+def run_in_stack(scenario, callback):
+    """
+    Builds the stack of a scenario and calls ``callback`` with its innermost frame
+    """
+    _, depth, n_locals, value_size, module_globals, n_threads = scenario
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=stop.wait, name='bench-{}'.format(idx), daemon=True)
+        for idx in range(n_threads)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        namespace = {'g{}'.format(idx): idx for idx in range(module_globals)}
+        namespace.update({
+            'level': make_level(n_locals),
+            'payload': 'x' * value_size,
+            'callback': callback,
+            'depth': depth,
+        })
+        exec(compile(
+            'result = level(depth, payload, callback)', '<benchmark module>', 'exec'
+        ), namespace)
+        return namespace['result']
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+
+def create(mode, output):
+    _, cls, arguments, configure, _ = mode
+    kwargs = arguments() if arguments is not None else {}
+    instance = cls(info=False, usr1=False, usr2=False, output=output, **kwargs)
+    if configure is not None:
+        configure(instance)
+    return instance
+
+
+def cleanup(instance):
+    """
+    Stops the threads and the instrumentation of an instance and removes its files
+    """
+    instance.unbind()
+    if hasattr(instance, 'clear_triggers'):
+        instance.clear_triggers()
+    for meter in list(getattr(instance, 'meters', ())):
+        instance.remove_meter(meter)
+    if hasattr(instance, 'server'):
+        instance.stop()
+    for path in getattr(instance, 'snapshots', ()):
+        os.remove(path)
+    if hasattr(instance, 'snapshots'):
+        os.rmdir(instance.directory)
+
+
+def measure(mode, scenario, repeat):
+    """
+    Measures pause time, output size and peak memory of one signal
+
+    The instance is called by a :class:`siginfo.dispatcher.SignalDispatcher`
+    like for a real signal, so the stack walk and the handler statistics
+    of ``handle`` are part of the pause.
+
+    Returns
+    -------
+    : dict
+
+    Raises
+    ------
+    RuntimeError
+        If the handler raised, the dispatcher only prints the exception
+
+    """
+    output = CountingOutput()
+    instance = create(mode, output)
+    instance.MAX_LEVELS = 1000
+    # not installed for a signal, called directly with the interrupted frame
+    dispatcher = SignalDispatcher(None)
+    dispatcher.add(instance)
+
+    def dump(frame):
+        times = []
+        for _ in range(repeat):
+            output.size = 0
+            start = time.perf_counter()
+            dispatcher(None, frame)
+            times.append(time.perf_counter() - start)
+        size = output.size
+        tracemalloc.start()
+        try:
+            dispatcher(None, frame)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return times, size, peak
+
+    try:
+        times, size, peak = run_in_stack(scenario, dump)
+        if instance.stats()['dropped']:
+            raise RuntimeError('{} failed in {}'.format(mode[0], scenario[0]))
+        if hasattr(instance, 'snapshots'):
+            snapshots = instance.snapshots
+            size = sum(os.path.getsize(path) for path in snapshots) // len(snapshots)
+    finally:
+        cleanup(instance)
+    times.sort()
+    return {
+        'pause_median_ms': 1000 * times[len(times) // 2],
+        'pause_max_ms': 1000 * times[-1],
+        'bytes': size,
+        'peak_kb': peak / 1024.0,
+    }
+
+
+def measure_init(mode, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        instance = create(mode, CountingOutput())
+        times.append(time.perf_counter() - start)
+        cleanup(instance)
+    times.sort()
+    return {'init_median_ms': 1000 * times[len(times) // 2]}
+
+
+def measure_import(repeat):
+    def run(code):
+        start = time.perf_counter()
+        subprocess.check_call(
+            [sys.executable, '-c', code], cwd=os.path.dirname(siginfo.__path__[0])
+        )
+        return time.perf_counter() - start
+
+    times = sorted(run('import siginfo') - run('pass') for _ in range(repeat))
+    return {'import_median_ms': 1000 * times[len(times) // 2]}
+
+
+def _spin(depth, stop, counter, index):
+    if depth > 1:
+        return _spin(depth - 1, stop, counter, index)
+    while not stop.is_set():
+        for _ in range(1000):
+            pass
+        counter[index] += 1
+
+
+def measure_capture(n_threads=CAPTURE_THREADS, repeat=20, depth=CAPTURE_DEPTH, duration=0.2):
+    """
+    Measures :func:`siginfo.capture.capture_threads` with busy worker threads
+
+    Returns
+    -------
+    : dict
+        ``capture_median_ms`` and ``worker_slowdown``: the loss of the
+        workers' throughput while stacks are captured continuously
+        (0.0 means no slowdown)
+
+    """
+    stop = threading.Event()
+    counter = [0] * n_threads
+    threads = [
+        threading.Thread(target=_spin, args=(depth, stop, counter, idx), daemon=True)
+        for idx in range(n_threads)
+    ]
+    for thread in threads:
+        thread.start()
+
+    def throughput(capturing):
+        before = sum(counter)
+        start = time.perf_counter()
+        while time.perf_counter() - start < duration:
+            if capturing:
+                capture_threads()
+            else:
+                time.sleep(0.001)
+        return (sum(counter) - before) / (time.perf_counter() - start)
+
+    try:
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            capture_threads()
+            times.append(time.perf_counter() - start)
+        idle = throughput(False)
+        busy = throughput(True)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    times.sort()
+    return {
+        'capture_median_ms': 1000 * times[len(times) // 2],
+        'worker_slowdown': 1 - busy / idle if idle else 0.0,
+    }
+
+
+def run(quick=False, repeat=20):
+    """
+    Runs all benchmarks
+
+    Returns
+    -------
+    : dict
+        ``{'python': ..., 'results': {'<mode>/<scenario>': {metric: value}}}``
+
+    """
+    results = {'import': measure_import(3 if quick else 10)}
+    scenarios = [s for s in SCENARIOS if not quick or s[0] in QUICK_SCENARIOS]
+    for mode in filter(available, MODES):
+        results['{}/init'.format(mode[0])] = measure_init(mode, repeat)
+        for scenario in scenarios:
+            results['{}/{}'.format(mode[0], scenario[0])] = measure(mode, scenario, repeat)
+    results['capture/threads'] = measure_capture(4 if quick else CAPTURE_THREADS, repeat)
+    return {
+        'python': platform.python_version(),
+        'gil': gil_enabled(),
+        'siginfo': siginfo.__version__,
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold=THRESHOLD):
+    """
+    Finds metrics that are worse than the baseline by more than ``threshold``
+
+    Only ``CHECKED_METRICS`` are compared. Time differences below
+    ``MIN_TIME_MS`` are ignored.
+
+    Args
+    ----
+    baseline : dict
+    current : dict
+        As returned by :func:`run`
+    threshold : float
+        Allowed relative increase
+
+    Returns
+    -------
+    : list
+        One line of text per regression
+
+    """
+    regressions = []
+    for key, metrics in sorted(baseline['results'].items()):
+        for metric, old in sorted(metrics.items()):
+            new = current['results'].get(key, {}).get(metric)
+            if new is None or metric not in CHECKED_METRICS:
+                continue
+            if metric.endswith('_ms') and new - old < MIN_TIME_MS:
+                continue
+            if new > old * (1 + threshold):
+                regressions.append('{} {}: {:.3f} -> {:.3f} (+{:.0f}%)'.format(
+                    key, metric, old, new, 100.0 * (new - old) / old if old else float('inf')
+                ))
+    return regressions
+
+
+def format_results(data):
+    lines = ['Python {} siginfo {}{}'.format(
+        data['python'], data['siginfo'], '' if data.get('gil', True) else ' (free-threaded)'
+    )]
+    for key, metrics in sorted(data['results'].items()):
+        lines.append('{:<32} {}'.format(key, '  '.join(
+            '{}={:.3f}'.format(metric, value) for metric, value in sorted(metrics.items())
+        )))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--save', help='Write the results as JSON baseline to this file')
+    parser.add_argument('--compare', help='Compare the results with this JSON baseline')
+    parser.add_argument(
+        '--threshold', type=float, default=THRESHOLD,
+        help='Allowed relative increase of every metric (default: {})'.format(THRESHOLD)
+    )
+    parser.add_argument('--quick', action='store_true', help='Run only a few scenarios')
+    parser.add_argument('--repeat', type=int, default=20, help='Handler calls per scenario')
+    args = parser.parse_args(argv)
+
+    data = run(args.quick, args.repeat)
+    print(format_results(data))
+    if args.save:
+        with open(args.save, 'w') as fh:
+            json.dump(data, fh, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)
+        regressions = compare(baseline, data, args.threshold)
+        if regressions:
+            print('\nREGRESSIONS')
+            print('\n'.join(regressions))
+            return 1
+        print('\nNo regressions')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,7 +2,19 @@
 
 """siginfo: A Python package to help debugging and monitoring python script"""
 
-from siginfo.siginfoclass import SiginfoBasic, SigInfoPDB, SigInfoSingle
+from siginfo.siginfoclass import (
+    SiginfoBasic,
+    SigInfoPDB,
+    SigInfoSingle,
+    SigInfoTrigger,
+    SigInfoMeter,
+    SigInfoDeadlock,
+    SigInfoSnapshot,
+    SigInfoConsole,
+    SigInfoReferrers,
+    SigInfoLoopLag,
+    SigInfoGil
+)
 
 
 __version__ = '0.10'
@@ -11,5 +23,13 @@ __author__ = 'Jonas Marcello'
 __all__ = (
     "SiginfoBasic",
     "SigInfoPDB",
-    "SigInfoSingle"
+    "SigInfoSingle",
+    "SigInfoTrigger",
+    "SigInfoMeter",
+    "SigInfoDeadlock",
+    "SigInfoSnapshot",
+    "SigInfoConsole",
+    "SigInfoReferrers",
+    "SigInfoLoopLag",
+    "SigInfoGil"
 )
\ No newline at end of file
@@ -0,0 +1,182 @@
+"""
+Sends siginfo commands to running Python processes
+
+Usage:
+
+.. code-block:: bash
+
+    # processes with commands bound by SiginfoBasic.bind_commands
+    python -m siginfo --list
+
+    # send a command or a signal name to a process
+    python -m siginfo 1234 threads
+    python -m siginfo 1234 USR1
+
+    # faulthandler tracebacks, see SiginfoBasic.enable_fallback
+    python -m siginfo 1234 fallback
+
+    # create one sender script per command in ~/bin
+    python -m siginfo 1234 --scripts ~/bin
+
+"""
+import argparse
+import os
+import signal
+import stat
+import sys
+
+from siginfo.registry import is_running, list_registries, read_registry
+
+
+def registered_signal(signum):
+    """
+    Checks a signal number read from a registry file
+
+    Registry files only contain the real-time signals of
+    ``bind_commands`` and ``enable_fallback`` (``SIGUSR1`` and
+    ``SIGUSR2`` on platforms without real-time signals), other
+    numbers like ``SIGKILL`` are never sent.
+
+    Returns
+    -------
+    : int
+
+    Raises
+    ------
+    ValueError
+        If the signal is not one of these
+
+    """
+    if not isinstance(signum, int) or isinstance(signum, bool):
+        valid = False
+    elif hasattr(signal, 'SIGRTMIN'):
+        valid = signal.SIGRTMIN <= signum <= signal.SIGRTMAX
+    else:
+        valid = signum in (signal.SIGUSR1, signal.SIGUSR2)
+    if not valid:
+        raise ValueError('Refusing to send signal {!r} from the registry file'.format(signum))
+    return int(signum)
+
+
+def resolve(pid, command):
+    """
+    Signal number of a command of a process
+
+    Args
+    ----
+    pid : int
+    command : str
+        A command from the registry file of the process, ``fallback``
+        or a signal name like ``USR1`` or ``SIGUSR1``
+
+    Returns
+    -------
+    : int
+
+    Raises
+    ------
+    ValueError
+        If the command is neither registered nor a signal name or the
+        registered signal is not a real-time signal, see :func:`registered_signal`
+
+    """
+    data = read_registry(pid)
+    commands = data.get('commands', {})
+    if command in commands:
+        return registered_signal(commands[command])
+    if command == 'fallback' and 'fallback' in data:
+        return registered_signal(data['fallback']['signal'])
+    name = command.upper()
+    if not name.startswith('SIG'):
+        name = 'SIG' + name
+    signum = getattr(signal, name, None)
+    if signum is None:
+        raise ValueError('Unknown command {!r} for pid {}, available: {}'.format(
+            command, pid, ', '.join(sorted(commands)) or 'none'
+        ))
+    return int(signum)
+
+
+def send(pid, command):
+    """
+    Sends a command to a process
+
+    Returns
+    -------
+    : int
+        The sent signal number
+
+    """
+    signum = resolve(pid, command)
+    os.kill(pid, signum)
+    return signum
+
+
+def write_scripts(pid, path, prefix=''):
+    """
+    Creates one executable sender script per registered command
+
+    Returns
+    -------
+    : list
+        Paths of the scripts
+
+    """
+    res = []
+    for command, signum in sorted(read_registry(pid).get('commands', {}).items()):
+        signum = registered_signal(signum)
+        filename = os.path.abspath(os.path.join(path, '{}siginfo-{}'.format(prefix, command)))
+        with open(filename, 'w') as fh:
+            fh.write('#!/bin/sh\n')
+            fh.write('kill -{} {}'.format(signum, pid))
+        os.chmod(filename, os.stat(filename).st_mode | stat.S_IEXEC)
+        res.append(filename)
+    return res
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m siginfo', description=__doc__.strip().split('\n')[0]
+    )
+    parser.add_argument('pid', type=int, nargs='?', help='Process to send the command to')
+    parser.add_argument(
+        'command', nargs='?', default='stack', help='Command or signal name (default: stack)'
+    )
+    parser.add_argument('--list', action='store_true', help='List processes and their commands')
+    parser.add_argument(
+        '--scripts', metavar='DIR', help='Create sender scripts for all commands in DIR'
+    )
+    parser.add_argument('--prefix', default='', help='Prefix of the script names')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for data in list_registries():
+            commands = sorted(data.get('commands', {}).items(), key=lambda item: item[1])
+            if 'fallback' in data:
+                commands.append(('fallback', data['fallback']['signal']))
+            print('{}\t{}'.format(data['pid'], ' '.join(
+                '{}={}'.format(command, signum) for command, signum in commands
+            )))
+        return 0
+    if args.pid is None:
+        parser.error('pid is required')
+    if not is_running(args.pid):
+        print('No process with pid {}'.format(args.pid), file=sys.stderr)
+        return 1
+    try:
+        if args.scripts:
+            for filename in write_scripts(args.pid, args.scripts, args.prefix):
+                print(filename)
+            return 0
+        signum = send(args.pid, args.command)
+    except (ValueError, OSError) as err:
+        print(err, file=sys.stderr)
+        return 1
+    print('Sent signal {} ({}) to {}'.format(signum, args.command, args.pid))
+    if args.command == 'fallback':
+        print('Tracebacks are written to {}'.format(read_registry(args.pid)['fallback']['path']))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
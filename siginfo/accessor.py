@@ -0,0 +1,285 @@
+import ast
+import operator
+
+
+# Functions that may be applied inside an expression
+ALLOWED_CALLS = {
+    'len': len,
+}
+
+CALLER_PREFIX = 'caller'
+
+
+class Accessor:
+    """
+    A restricted, precompiled expression to read a value from a stack frame
+
+    Expressions are parsed once and turned into a chain of
+    ``operator.attrgetter``, ``operator.itemgetter`` and whitelisted
+    functions. No ``eval`` is involved when the value is read.
+
+    Supported syntax:
+
+    - ``name``: local variable (or global variable with ``use_globals``)
+    - ``name.attr.attr``: attribute access (no dunder attributes)
+    - ``name[0]``, ``name['key']``: item access with literal keys
+    - ``len(expression)``
+    - ``caller:expression``: evaluated in the calling frame,
+      ``caller2:expression`` two frames up etc.
+
+    Args
+    ----
+    expression : str
+        The expression to compile
+    use_globals : bool
+        Look up names that are not local variables in the frame's globals
+        Default: False
+
+    Raises
+    ------
+    ValueError
+        If the expression uses unsupported syntax
+
+    Example
+    -------
+        ::
+
+            acc = Accessor('len(self.queue)')
+            acc.evaluate(frame)
+            # => 12
+
+            acc = Accessor('caller:batch_idx')
+
+    """
+    __slots__ = ('expression', 'depth', 'name', 'ops', 'use_globals')
+
+    def __init__(self, expression, use_globals=False):
+        self.expression = expression
+        self.use_globals = use_globals
+        self.depth, source = _split_prefix(expression)
+        try:
+            tree = ast.parse(source.strip(), mode='eval')
+        except SyntaxError:
+            raise ValueError('Invalid expression: {}'.format(expression)) from None
+        ops = []
+        self.name = _compile(tree.body, ops)
+        self.ops = tuple(ops)
+
+    def __repr__(self):
+        return 'Accessor({!r})'.format(self.expression)
+
+    def frame(self, frame):
+        """
+        Moves up the stack to the frame the expression refers to
+
+        Args
+        ----
+        frame : frame
+            The current frame
+
+        Returns
+        -------
+        : frame
+            ``None`` if the stack is not deep enough
+
+        """
+        for _ in range(self.depth):
+            if frame is None:
+                break
+            frame = frame.f_back
+        return frame
+
+    def read(self, local_vars, global_vars=None):
+        """
+        Evaluates the expression against a namespace
+
+        Args
+        ----
+        local_vars : dict
+            Local variables of the frame
+        global_vars : dict
+            Global variables of the frame, only used with ``use_globals``
+            Default: None
+
+        Returns
+        -------
+        The value of the expression
+
+        Raises
+        ------
+        Any exception raised during the lookup. A missing name raises
+        ``NameError``.
+
+        """
+        try:
+            value = local_vars[self.name]
+        except KeyError:
+            if not self.use_globals or global_vars is None or self.name not in global_vars:
+                raise NameError(self.name)
+            value = global_vars[self.name]
+        for op in self.ops:
+            value = op(value)
+        return value
+
+    def evaluate(self, frame):
+        """
+        Evaluates the expression against a stack frame
+
+        Args
+        ----
+        frame : frame
+            The current frame. ``caller:`` expressions use its parents.
+
+        Returns
+        -------
+        The value of the expression
+
+        Raises
+        ------
+        Any exception raised during the lookup
+
+        """
+        target = self.frame(frame)
+        if target is None:
+            raise LookupError('Stack is not deep enough for {}'.format(self.expression))
+        return self.read(target.f_locals, getattr(target, 'f_globals', None))
+
+    def get(self, frame, default=None):
+        """
+        Evaluates the expression and returns ``default`` on any error
+
+        Returns
+        -------
+        The value of the expression or ``default``
+
+        """
+        try:
+            return self.evaluate(frame)
+        except Exception:
+            return default
+
+
+class AccessorSet:
+    """
+    Evaluates many accessors against the same stack
+
+    The locals of each involved frame are read only once per
+    evaluation and errors of one expression don't affect the others.
+
+    Args
+    ----
+    expressions : list
+        Expressions (str) or :class:`Accessor` instances
+    use_globals : bool
+        Compile expressions with ``use_globals``, see :class:`Accessor`
+        Default: False
+
+    """
+    def __init__(self, expressions=(), use_globals=False):
+        self.use_globals = use_globals
+        self.accessors = []
+        for expression in expressions:
+            self.add(expression)
+
+    def add(self, expression):
+        """
+        Compiles and adds an expression
+
+        Args
+        ----
+        expression : str or :class:`Accessor`
+
+        Returns
+        -------
+        : :class:`Accessor`
+
+        """
+        if not isinstance(expression, Accessor):
+            expression = Accessor(expression, self.use_globals)
+        self.accessors.append(expression)
+        return expression
+
+    def __len__(self):
+        return len(self.accessors)
+
+    def evaluate(self, frame):
+        """
+        Evaluates all expressions
+
+        Args
+        ----
+        frame : frame
+            The current frame
+
+        Returns
+        -------
+        : list
+            ``(expression, value, error)`` tuples. ``error`` is ``None``
+            or the exception raised by the expression.
+
+        """
+        namespaces = {}
+        results = []
+        for accessor in self.accessors:
+            try:
+                namespace = namespaces.get(accessor.depth)
+                if namespace is None:
+                    target = accessor.frame(frame)
+                    if target is None:
+                        raise LookupError('Stack is not deep enough')
+                    namespace = (target.f_locals, getattr(target, 'f_globals', None))
+                    namespaces[accessor.depth] = namespace
+                results.append((accessor.expression, accessor.read(*namespace), None))
+            except Exception as err:
+                results.append((accessor.expression, None, err))
+        return results
+
+
+def _split_prefix(expression):
+    head, sep, rest = expression.partition(':')
+    head = head.strip()
+    if sep and head.startswith(CALLER_PREFIX):
+        level = head[len(CALLER_PREFIX):]
+        if not level:
+            return 1, rest
+        if level.isdigit():
+            return int(level), rest
+    return 0, expression
+
+
+def _subscript_key(node):
+    index = getattr(ast, 'Index', None)
+    if index is not None and isinstance(node, index):
+        # Python < 3.9
+        node = node.value
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        raise ValueError('Only literal subscripts are supported') from None
+
+
+def _compile(node, ops):
+    """
+    Appends the operations for ``node`` to ``ops`` and returns
+    the name of the variable the chain starts with
+    """
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        if node.attr.startswith('__'):
+            raise ValueError('Access to dunder attributes is not allowed')
+        name = _compile(node.value, ops)
+        ops.append(operator.attrgetter(node.attr))
+        return name
+    if isinstance(node, ast.Subscript):
+        name = _compile(node.value, ops)
+        ops.append(operator.itemgetter(_subscript_key(node.slice)))
+        return name
+    if isinstance(node, ast.Call):
+        func = node.func.id if isinstance(node.func, ast.Name) else None
+        if func not in ALLOWED_CALLS or len(node.args) != 1 or node.keywords:
+            raise ValueError('Only {} calls are supported'.format(', '.join(ALLOWED_CALLS)))
+        name = _compile(node.args[0], ops)
+        ops.append(ALLOWED_CALLS[func])
+        return name
+    raise ValueError('Unsupported expression: {}'.format(type(node).__name__))
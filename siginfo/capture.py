@@ -0,0 +1,215 @@
+import sys
+import threading
+import traceback
+
+from siginfo.dispatcher import STACK_DEPTH
+
+
+# Number of times the stacks of threads that moved during a walk are walked again
+RETRIES = 3
+
+# Exceptions raised by frames that finish while they are read
+FRAME_ERRORS = (AttributeError, ValueError, RuntimeError, SystemError)
+
+
+def gil_enabled():
+    """
+    ``False`` on free-threaded builds (e.g. ``python3.13t``) running without the GIL
+
+    The GIL can be enabled at runtime, e.g. by importing an extension
+    without free-threading support, so this is checked on every call.
+    """
+    is_enabled = getattr(sys, '_is_gil_enabled', None)
+    return True if is_enabled is None else bool(is_enabled())
+
+
+def _position(frame):
+    try:
+        return id(frame), frame.f_lasti
+    except FRAME_ERRORS:
+        return None
+
+
+def stack_entries(frame, depth):
+    """
+    ``(filename, lineno, function)`` of a frame and its parents, innermost first
+
+    Only the code, line and parent of each frame are read. The walk
+    ends early if a frame finishes while it is read.
+    """
+    entries = []
+    try:
+        while frame is not None and len(entries) < depth:
+            code = frame.f_code
+            entries.append((code.co_filename, frame.f_lineno, code.co_name))
+            frame = frame.f_back
+    except FRAME_ERRORS:
+        # the thread returned from the frame while it was read
+        pass
+    return entries
+
+
+class ThreadStack:
+    """
+    Stack of one thread as plain tuples
+
+    Attributes
+    ----------
+    ident : int
+    name : str
+    frame : frame
+        Top frame of the thread at the time of the capture
+    entries : list
+        ``(filename, lineno, function)`` from the innermost to the
+        outermost frame
+    consistent : bool
+        The thread was at the same frame and instruction before and
+        after the walk. Always ``True`` if the walk was not validated.
+    position : tuple
+        ``(id(frame), frame.f_lasti)`` of the top frame before the walk
+
+    """
+    __slots__ = ('ident', 'name', 'frame', 'entries', 'consistent', 'position')
+
+    def __init__(self, ident, name, frame, entries, consistent=True, position=None):
+        self.ident = ident
+        self.name = name
+        self.frame = frame
+        self.entries = entries
+        self.consistent = consistent
+        self.position = position
+
+    def __repr__(self):
+        return '<ThreadStack {} frames={}{}>'.format(
+            self.name, len(self.entries), '' if self.consistent else ' moving'
+        )
+
+    def format(self):
+        """
+        Formats the stack like ``traceback.format_stack``, outermost frame first
+
+        Returns
+        -------
+        : str
+
+        """
+        return ''.join(traceback.format_list([
+            traceback.FrameSummary(filename, lineno, name)
+            for filename, lineno, name in reversed(self.entries)
+        ]))
+
+
+def capture_threads(frame=None, depth=STACK_DEPTH, validate=None, retries=RETRIES):
+    """
+    Consistent stacks of all threads
+
+    ``sys._current_frames()`` returns the top frames of all threads,
+    on free-threaded builds it briefly stops all threads to do so.
+    The stacks are walked afterwards while the threads keep running,
+    only the code, line and parent of each frame is read, never the
+    locals. A walk is validated by a second ``sys._current_frames()``:
+    if a thread is no longer at the same frame and instruction, its
+    stack is walked again from its new top frame, up to ``retries``
+    times. Threads that finished during the capture are left out,
+    frames that finish during a walk end it.
+
+    Args
+    ----
+    frame : frame
+        Top frame of the current thread, e.g. the frame interrupted
+        by a signal
+        Default: None (the caller of ``capture_threads``)
+    depth : int
+        Maximum number of frames per thread
+    validate : bool
+        Validate the walks
+        Default: None (only without the GIL, with the GIL threads
+        rarely switch during a walk)
+    retries : int
+        Walks of a thread that moved
+        Default: 3
+
+    Returns
+    -------
+    : list
+        :class:`ThreadStack` per thread, in the order of ``sys._current_frames()``
+
+    """
+    current = threading.get_ident()
+    if frame is None:
+        frame = sys._getframe(1)
+    if validate is None:
+        validate = not gil_enabled()
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    tops = sys._current_frames()
+    tops[current] = frame
+    stacks = {}
+    pending = tops
+    for _ in range(retries + 1):
+        for ident, top in pending.items():
+            position = _position(top)
+            entries = stack_entries(top, depth)
+            stacks[ident] = ThreadStack(
+                ident, names.get(ident, str(ident)), top, entries, not validate, position
+            )
+        if not validate:
+            break
+        pending = _moved(stacks, pending, current)
+        if not pending:
+            break
+    del frame, tops, pending
+    return list(stacks.values())
+
+
+def _moved(stacks, pending, current):
+    """
+    Marks the walked stacks of threads that stayed at the same frame
+    and instruction as consistent and removes finished threads
+
+    Returns
+    -------
+    : dict
+        ``{thread ident: new top frame}`` of the threads that moved
+
+    """
+    fresh = sys._current_frames()
+    moved = {}
+    for ident in pending:
+        stack = stacks[ident]
+        if ident == current:
+            # the current thread doesn't run while it walks its own stack
+            stack.consistent = True
+            continue
+        top = fresh.get(ident)
+        if top is None:
+            del stacks[ident]
+        elif _position(top) == stack.position:
+            stack.consistent = True
+        else:
+            moved[ident] = top
+    del fresh
+    return moved
+
+
+def readable_frames():
+    """
+    ``{thread ident: frame}`` of the threads whose locals can be read
+
+    With the GIL these are all threads, as returned by
+    ``sys._current_frames()``. Without the GIL other threads change
+    their locals while they are read, only the current thread and
+    threads that stayed at the same frame and instruction during a
+    validated capture (they wait in a blocking call) are returned.
+
+    Returns
+    -------
+    : dict
+
+    """
+    if gil_enabled():
+        return sys._current_frames()
+    return {
+        stack.ident: stack.frame
+        for stack in capture_threads(sys._getframe(1), depth=0, validate=True)
+        if stack.consistent
+    }
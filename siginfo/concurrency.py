@@ -0,0 +1,503 @@
+import os
+import queue
+import threading
+
+from siginfo.capture import readable_frames
+from siginfo.summary import summarizers
+
+
+# Number of frames per thread that are searched for blocking calls
+# and concurrency objects
+MAX_THREAD_DEPTH = 20
+
+# Functions of the standard library in which threads block,
+# by module path relative to the standard library directory
+BLOCKING_FUNCTIONS = {
+    'threading.py': ('wait', 'acquire', 'join', 'wait_for'),
+    'queue.py': ('get', 'put', 'join'),
+    'concurrent/futures/_base.py': ('result', 'exception', 'wait'),
+}
+
+# Kinds of bottlenecks reported by find_bottlenecks, most severe first
+SEVERITY = ('FULL', 'STARVED', 'SATURATED', 'CONTENDED')
+
+_stdlib = None
+_stdlib_names = {}  # {co_filename: path relative to the stdlib or None}
+
+_lock_type = type(threading.Lock())
+_rlock_type = type(threading.RLock())
+
+
+def stdlib_name(filename):
+    """
+    Path of a standard library module relative to
+    ``sysconfig.get_paths()['stdlib']`` with ``/`` as separator
+
+    Files with the same name outside of the standard library, e.g.
+    a ``queue.py`` of the application, are not matched.
+
+    Returns
+    -------
+    : str
+        ``None`` if the file is not part of the standard library
+
+    """
+    global _stdlib
+    name = _stdlib_names.get(filename, False)
+    if name is not False:
+        return name
+    if _stdlib is None:
+        import sysconfig
+
+        _stdlib = os.path.join(os.path.realpath(sysconfig.get_paths()['stdlib']), '')
+    path = os.path.realpath(filename)
+    name = None
+    if path.startswith(_stdlib):
+        name = path[len(_stdlib):].replace(os.sep, '/')
+    _stdlib_names[filename] = name
+    return name
+
+
+def thread_name(ident):
+    """
+    Name of the thread with the given ident
+
+    Args
+    ----
+    ident : int
+        Thread identifier
+
+    Returns
+    -------
+    : str
+
+    """
+    thread = threading._active.get(ident)
+    return thread.name if thread is not None else str(ident)
+
+
+def _waiters(condition):
+    return len(getattr(condition, '_waiters', ()))
+
+
+def queue_size(value):
+    """
+    Size of a ``queue.Queue`` without taking ``Queue.mutex``
+
+    ``Queue.qsize()`` waits for the mutex, a signal handler that calls
+    it while the interrupted thread holds the mutex in ``put`` or
+    ``get`` hangs forever. ``_qsize()`` reads the underlying container,
+    the size may be off by one while another thread changes it.
+
+    Returns
+    -------
+    : int
+
+    """
+    return value._qsize()
+
+
+def summarize_queue(value):
+    """
+    Size, capacity and blocked producers/consumers of a ``queue.Queue``
+
+    Returns
+    -------
+    : str
+
+    """
+    size = queue_size(value)
+    res = 'Queue {}/{}'.format(size, value.maxsize or 'inf')
+    if value.maxsize > 0 and size >= value.maxsize:
+        res += ' FULL'
+    return '{} unfinished={} waiting get={} put={}'.format(
+        res, value.unfinished_tasks, _waiters(value.not_empty), _waiters(value.not_full)
+    )
+
+
+def summarize_asyncio_queue(value):
+    """
+    Size, capacity and waiting coroutines of an ``asyncio.Queue``
+
+    Returns
+    -------
+    : str
+
+    """
+    getters = sum(1 for fut in value._getters if not fut.done())
+    putters = sum(1 for fut in value._putters if not fut.done())
+    return 'asyncio.Queue {}/{} waiting get={} put={}'.format(
+        value.qsize(), value.maxsize or 'inf', getters, putters
+    )
+
+
+def summarize_mp_queue(value):
+    """
+    Size and capacity of a ``multiprocessing`` queue
+
+    Returns
+    -------
+    : str
+
+    """
+    try:
+        size = value.qsize()
+    except (NotImplementedError, OSError):
+        # Not available on macOS
+        size = '?'
+    return '{} {}/{}'.format(type(value).__name__, size, getattr(value, '_maxsize', '?'))
+
+
+def summarize_lock(value):
+    """
+    State of a ``threading.Lock``
+
+    Returns
+    -------
+    : str
+
+    """
+    return 'Lock {}'.format('locked' if value.locked() else 'unlocked')
+
+
+def rlock_owner(value):
+    """
+    Thread ident of the owner of a ``threading.RLock``
+
+    Read from the ``_owner`` attribute of the pure Python implementation
+    and from the repr of the C implementation, which is the same from
+    Python 3.7 to 3.13:
+    ``<locked _thread.RLock object owner=140470877891456 count=1 at 0x7fc1ec1605c0>``
+
+    Returns
+    -------
+    : int
+        ``None`` if the lock is not held or the owner can't be read
+
+    """
+    if hasattr(value, '_owner'):
+        # Pure Python implementation
+        return value._owner
+    _, found, rest = repr(value).partition(' owner=')
+    try:
+        owner = int(rest.split(' ', 1)[0]) if found else 0
+    except ValueError:
+        return None
+    return owner or None
+
+
+def summarize_rlock(value):
+    """
+    Owner of a ``threading.RLock``
+
+    Returns
+    -------
+    : str
+
+    """
+    owner = rlock_owner(value)
+    if owner is None:
+        return 'RLock unlocked'
+    return 'RLock locked by {}'.format(thread_name(owner))
+
+
+def summarize_semaphore(value):
+    """
+    Value and waiting threads of a ``threading.Semaphore``
+
+    Returns
+    -------
+    : str
+
+    """
+    initial = getattr(value, '_initial_value', None)
+    return '{} value={}{} waiting={}'.format(
+        type(value).__name__,
+        value._value,
+        '/{}'.format(initial) if initial is not None else '',
+        _waiters(value._cond)
+    )
+
+
+def summarize_condition(value):
+    """
+    Number of threads waiting for a ``threading.Condition``
+
+    Returns
+    -------
+    : str
+
+    """
+    return 'Condition waiting={}'.format(_waiters(value))
+
+
+def summarize_event(value):
+    """
+    State and waiting threads of a ``threading.Event``
+
+    Returns
+    -------
+    : str
+
+    """
+    return 'Event {} waiting={}'.format(
+        'set' if value.is_set() else 'clear', _waiters(value._cond)
+    )
+
+
+def summarize_thread_pool(value):
+    """
+    Workers and queued work items of a ``ThreadPoolExecutor``
+
+    Returns
+    -------
+    : str
+
+    """
+    return 'ThreadPoolExecutor workers={}/{} pending={}{}'.format(
+        len(value._threads),
+        value._max_workers,
+        value._work_queue.qsize(),
+        ' shutdown' if value._shutdown else ''
+    )
+
+
+def summarize_process_pool(value):
+    """
+    Workers and pending work items of a ``ProcessPoolExecutor``
+
+    Returns
+    -------
+    : str
+
+    """
+    return 'ProcessPoolExecutor workers={}/{} pending={}'.format(
+        len(value._processes or ()),
+        value._max_workers,
+        len(value._pending_work_items)
+    )
+
+
+def _queue_state(value):
+    """
+    ``(size, maxsize, waiting consumers, waiting producers)``
+    of queue like objects
+    """
+    if isinstance(value, queue.Queue):
+        return (
+            queue_size(value), value.maxsize, _waiters(value.not_empty), _waiters(value.not_full)
+        )
+    if hasattr(value, '_getters') and hasattr(value, '_putters'):
+        getters = sum(1 for fut in value._getters if not fut.done())
+        putters = sum(1 for fut in value._putters if not fut.done())
+        return value.qsize(), value.maxsize, getters, putters
+    return None
+
+
+class BlockedThread:
+    """
+    A thread that waits inside a blocking call
+
+    Attributes
+    ----------
+    ident : int
+        Thread identifier
+    name : str
+        Name of the thread
+    function : str
+        Name of the blocking function, e.g. ``get`` or ``acquire``
+    frame : frame
+        The frame of the blocking function
+
+    """
+    __slots__ = ('ident', 'name', 'function', 'frame')
+
+    def __init__(self, ident, name, function, frame):
+        self.ident = ident
+        self.name = name
+        self.function = function
+        self.frame = frame
+
+
+def blocked_threads(thread_frames=None):
+    """
+    Finds all threads that wait in blocking standard library calls
+
+    Only the outermost blocking call of each thread is reported, e.g.
+    ``Queue.get`` instead of the ``Condition.wait`` it uses internally.
+
+    Args
+    ----
+    thread_frames : dict
+        ``{thread ident: frame}`` as returned by ``sys._current_frames()``
+        Default: None (all threads whose locals can be read, see
+        :func:`siginfo.capture.readable_frames`)
+
+    Returns
+    -------
+    : dict
+        ``{id(object): [BlockedThread, ...]}`` where object is the queue,
+        lock, condition, event or future the thread waits for
+
+    """
+    if thread_frames is None:
+        thread_frames = readable_frames()
+    current = threading.get_ident()
+    waiting = {}
+    for ident, frame in thread_frames.items():
+        if ident == current:
+            continue
+        blocked = None
+        for _ in range(MAX_THREAD_DEPTH):
+            if frame is None:
+                break
+            code = frame.f_code
+            functions = BLOCKING_FUNCTIONS.get(stdlib_name(code.co_filename), ())
+            if code.co_name in functions and 'self' in frame.f_locals:
+                blocked = frame
+            elif blocked is not None:
+                break
+            frame = frame.f_back
+        if blocked is not None:
+            obj = blocked.f_locals['self']
+            waiting.setdefault(id(obj), []).append(
+                BlockedThread(ident, thread_name(ident), blocked.f_code.co_name, blocked)
+            )
+    return waiting
+
+
+def find_bottlenecks(frames=(), thread_frames=None):
+    """
+    Analyses queues, executors and locks for backpressure
+
+    Concurrency objects are collected from the locals of ``frames``,
+    the locals of all other threads' frames and the objects that
+    blocked threads are waiting for.
+
+    Args
+    ----
+    frames : list
+        Additional frames (e.g. the dumped stack) to search for objects
+    thread_frames : dict
+        ``{thread ident: frame}``
+        Default: None (:func:`siginfo.capture.readable_frames`)
+
+    Returns
+    -------
+    : list
+        One line of text per bottleneck, ordered by severity:
+        ``FULL`` queues (producers are blocked), ``STARVED`` queues
+        (consumers wait for work), ``SATURATED`` executors and
+        ``CONTENDED`` locks
+
+    """
+    if thread_frames is None:
+        thread_frames = readable_frames()
+    waiting = blocked_threads(thread_frames)
+    found = []
+    for key, (label, obj) in _collect_objects(frames, thread_frames, waiting).items():
+        line = _bottleneck(label, obj, waiting.get(key, []))
+        if line is not None:
+            found.append(line)
+    found.sort(key=lambda line: SEVERITY.index(line.split('\t', 1)[0]))
+    return found
+
+
+def _collect_objects(frames, thread_frames, waiting):
+    """
+    ``{id: (label, object)}`` of the concurrency objects in the locals
+    of the frames and the objects blocked threads wait for
+    """
+    objects = {}
+    for frame in frames:
+        _collect_locals(objects, frame, 1)
+    for frame in thread_frames.values():
+        _collect_locals(objects, frame, MAX_THREAD_DEPTH)
+    for blocked in waiting.values():
+        obj = blocked[0].frame.f_locals.get('self')
+        if obj is not None and id(obj) not in objects and _is_concurrency_object(obj):
+            objects[id(obj)] = (type(obj).__name__, obj)
+    return objects
+
+
+def _collect_locals(objects, frame, depth):
+    for _ in range(depth):
+        if frame is None:
+            return
+        for name, value in list(frame.f_locals.items()):
+            # `self` is the object inside its own methods, e.g. Queue.get
+            if name == 'self':
+                continue
+            if id(value) not in objects and _is_concurrency_object(value):
+                objects[id(value)] = (name, value)
+        frame = frame.f_back
+
+
+def _bottleneck(label, obj, blocked):
+    """
+    Line of :func:`find_bottlenecks` for one object, ``None`` if it is no bottleneck
+    """
+    if type(obj).__name__ == 'ThreadPoolExecutor':
+        return _executor_bottleneck(label, obj)
+    state = _queue_state(obj)
+    if state is not None:
+        return _queue_bottleneck(label, obj, state, blocked)
+    if blocked:
+        return _lock_bottleneck(label, obj, blocked)
+    return None
+
+
+def _executor_bottleneck(label, obj):
+    backlog = obj._work_queue.qsize()
+    if not backlog:
+        return None
+    return 'SATURATED\t{} ({}) backlog={}'.format(label, summarizers(obj), backlog)
+
+
+def _queue_bottleneck(label, obj, state, blocked):
+    size, maxsize, getters, putters = state
+    if maxsize > 0 and size >= maxsize:
+        line = 'FULL\t{} ({})'.format(label, summarizers(obj))
+        producers = [b.name for b in blocked if b.function == 'put']
+        if producers or putters:
+            line += ' blocked producers: {}'.format(', '.join(producers) or putters)
+        return line
+    consumers = [b.name for b in blocked if b.function == 'get']
+    if size == 0 and (consumers or getters):
+        return 'STARVED\t{} ({}) waiting consumers: {}'.format(
+            label, summarizers(obj), ', '.join(consumers) or getters
+        )
+    return None
+
+
+def _lock_bottleneck(label, obj, blocked):
+    return 'CONTENDED\t{} ({}) waiting: {}'.format(
+        label, summarizers(obj), ', '.join(b.name for b in blocked)
+    )
+
+
+def _is_concurrency_object(value):
+    func = summarizers.dispatch(type(value))
+    return func in _SUMMARIZERS
+
+
+_SUMMARIZERS = set()
+
+
+def _register(cls, func):
+    summarizers.register(cls, func)
+    _SUMMARIZERS.add(func)
+
+
+_register(queue.Queue, summarize_queue)
+_register('asyncio.queues.Queue', summarize_asyncio_queue)
+_register('multiprocessing.queues.Queue', summarize_mp_queue)
+_register('multiprocessing.queues.SimpleQueue', summarize_mp_queue)
+_register(_lock_type, summarize_lock)
+_register(_rlock_type, summarize_rlock)
+_register(threading._PyRLock, summarize_rlock)
+_register(threading.Semaphore, summarize_semaphore)
+_register(threading.Condition, summarize_condition)
+_register(threading.Event, summarize_event)
+_register('concurrent.futures.thread.ThreadPoolExecutor', summarize_thread_pool)
+_register('concurrent.futures.process.ProcessPoolExecutor', summarize_process_pool)
@@ -0,0 +1,362 @@
+import ast
+import builtins
+import code
+import os
+import shutil
+import socket
+import stat
+import struct
+import tempfile
+import threading
+
+
+# Seconds between checks whether the server should stop
+ACCEPT_TIMEOUT = 0.5
+
+HELP = '''Commands:
+  :stack       list the captured frames
+  :frame N     inspect the frame at level N
+  :freeze      stop the main thread and capture its live stack
+  :resume      continue a frozen main thread
+  :quit        close the console (resumes a frozen main thread)
+Everything else is executed as Python code in the selected frame.
+'''
+
+# Name of the function that sends the values of expressions to the client
+DISPLAY = '_siginfo_display'
+
+
+def peer_uid(conn):
+    """
+    User id of the process on the other end of a Unix socket
+
+    Uses ``SO_PEERCRED`` (Linux).
+
+    Returns
+    -------
+    : int
+        ``None`` if the platform doesn't provide the credentials
+    """
+    option = getattr(socket, 'SO_PEERCRED', None)
+    if option is None:
+        return None
+    size = struct.calcsize('3i')
+    _, uid, _ = struct.unpack('3i', conn.getsockopt(socket.SOL_SOCKET, option, size))
+    return uid
+
+
+class _DisplayExpressions(ast.NodeTransformer):
+    """
+    Passes the value of every expression statement to :data:`DISPLAY`
+
+    Mirrors the interactive interpreter, which displays expressions
+    outside of function and class bodies, without replacing the
+    process wide ``sys.displayhook``.
+    """
+    def visit_Expr(self, node):
+        call = ast.Call(func=ast.Name(id=DISPLAY, ctx=ast.Load()), args=[node.value], keywords=[])
+        return ast.copy_location(ast.Expr(value=call), node)
+
+    def _nested(self, node):
+        return node
+
+    visit_FunctionDef = visit_AsyncFunctionDef = visit_ClassDef = _nested
+
+
+class CapturedFrame:
+    """
+    Locals and globals of a stack frame at the time of the signal
+
+    ``locals`` is a shallow copy, so the console never keeps the
+    frame itself alive. The values are references to the live
+    objects of the process.
+
+    Attributes
+    ----------
+    level : int
+        Position in the stack, 0 is the innermost frame
+    name : str
+        Name of the function
+    filename : str
+    lineno : int
+    locals : dict
+    globals : dict
+
+    """
+    __slots__ = ('level', 'name', 'filename', 'lineno', 'locals', 'globals')
+
+    def __init__(self, level, frame):
+        self.level = level
+        self.name = frame.f_code.co_name
+        self.filename = frame.f_code.co_filename
+        self.lineno = frame.f_lineno
+        self.locals = dict(frame.f_locals)
+        self.globals = frame.f_globals
+
+    def __str__(self):
+        return '{} {} {}:{}'.format(self.level, self.name, self.filename, self.lineno)
+
+
+class ConsoleSession(code.InteractiveConsole):
+    """
+    Python console of one client connection
+
+    Code is executed in a namespace built from the globals and locals
+    of the selected frame. Assignments change the namespace only,
+    not the frame. Output of ``print`` and of expressions is sent to
+    the client instead of the process' stdout.
+
+    Args
+    ----
+    reader : file object
+        Text stream of the connection
+    writer : callable
+        Called with every string sent to the client
+    console : :class:`siginfo.siginfoclass.SigInfoConsole`
+        Provides the captured stack and freeze/resume
+
+    """
+    def __init__(self, reader, writer, console):
+        super().__init__()
+        self.reader = reader
+        self.writer = writer
+        self.console = console
+        self.level = 0
+        self.select(0)
+
+    def select(self, level):
+        """
+        Switches the namespace to the frame at ``level``
+
+        Returns
+        -------
+        : bool
+            ``False`` if there is no such frame
+        """
+        stack = self.console.stack
+        if not 0 <= level < len(stack):
+            return False
+        self.level = level
+        frame = stack[level]
+        self.locals = dict(frame.globals)
+        self.locals.update(frame.locals)
+        self.locals['print'] = self._print
+        self.locals[DISPLAY] = self._display
+        return True
+
+    def write(self, data):
+        self.writer(data)
+
+    def raw_input(self, prompt=''):
+        self.write(prompt)
+        line = self.reader.readline()
+        if not line:
+            raise EOFError()
+        return line.rstrip('\r\n')
+
+    def _print(self, *args, **kwargs):
+        if kwargs.get('file') is not None:
+            return builtins.print(*args, **kwargs)
+        # like print(), None means the default separator and line end
+        sep = kwargs.get('sep')
+        end = kwargs.get('end')
+        self.write((' ' if sep is None else sep).join(str(arg) for arg in args))
+        self.write('\n' if end is None else end)
+
+    def _display(self, value):
+        if value is not None:
+            self.locals['_'] = value
+            self.write('{!r}\n'.format(value))
+
+    def runsource(self, source, filename='<input>', symbol='single'):
+        try:
+            code_object = self.compile(source, filename, symbol)
+        except (OverflowError, SyntaxError, ValueError):
+            self.showsyntaxerror(filename)
+            return False
+        if code_object is None:
+            # incomplete input
+            return True
+        tree = _DisplayExpressions().visit(ast.parse(source, filename, 'single'))
+        module = ast.Module(body=tree.body)
+        module.type_ignores = []
+        self.runcode(compile(ast.fix_missing_locations(module), filename, 'exec'))
+        return False
+
+    def push(self, line):
+        if not self.buffer and line.startswith(':'):
+            self.command(line[1:].split())
+            return False
+        return super().push(line)
+
+    def command(self, args):
+        """
+        Executes a console command like ``:frame 2``
+        """
+        name = args[0] if args else 'help'
+        if name == 'stack':
+            for frame in self.console.stack:
+                self.write('{} {}\n'.format('>' if frame.level == self.level else ' ', frame))
+        elif name == 'frame':
+            try:
+                level = int(args[1])
+            except (IndexError, ValueError):
+                level = -1
+            if self.select(level):
+                self.write('{}\n'.format(self.console.stack[level]))
+            else:
+                self.write('Invalid level, use :stack to list all frames\n')
+        elif name == 'freeze':
+            self.write('{}\n'.format(self.console.freeze()))
+            self.select(0)
+        elif name == 'resume':
+            self.write('{}\n'.format(self.console.resume()))
+        elif name in ('quit', 'exit'):
+            raise EOFError()
+        else:
+            self.write(HELP)
+
+
+class ConsoleServer:
+    """
+    Serves :class:`ConsoleSession` over a Unix socket
+    from a background thread
+
+    Clients are served one after another. The socket is created with
+    mode 0600 and, by default, in a new directory with mode 0700. Where
+    the platform provides the credentials of the client, connections
+    of other users are closed.
+
+    Args
+    ----
+    path : str
+        Path of the Unix socket, an existing file is only replaced
+        if it is a socket of the same user
+        Default: None (``console.sock`` in a new private temporary directory)
+    console : :class:`siginfo.siginfoclass.SigInfoConsole`
+
+    """
+    def __init__(self, path, console):
+        self.path = path
+        self.console = console
+        self._directory = None
+        self._socket = None
+        self._thread = None
+        self._conn = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        Binds the socket and starts the server thread
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        FileExistsError
+            If ``path`` exists and is not a socket of the same user
+        """
+        if self.running:
+            return
+        if self.path is None or self._directory is not None:
+            self._directory = tempfile.mkdtemp(prefix='siginfo-{}-'.format(os.getpid()))
+            self.path = os.path.join(self._directory, 'console.sock')
+        else:
+            self._remove_stale()
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # the socket file never exists with wider permissions
+        umask = os.umask(0o177)
+        try:
+            sock.bind(self.path)
+        except OSError:
+            sock.close()
+            raise
+        finally:
+            os.umask(umask)
+        sock.listen(1)
+        sock.settimeout(ACCEPT_TIMEOUT)
+        self._socket = sock
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._serve, name='siginfo-console', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the server thread and removes the socket
+
+        Returns
+        -------
+        None
+        """
+        self._stop.set()
+        conn = self._conn
+        if conn is not None:
+            # wakes up the session waiting for input
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+            if self._directory is not None:
+                shutil.rmtree(self._directory, ignore_errors=True)
+            elif os.path.exists(self.path):
+                os.remove(self.path)
+
+    def _remove_stale(self):
+        try:
+            info = os.lstat(self.path)
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(info.st_mode) or info.st_uid != os.getuid():
+            raise FileExistsError('Refusing to replace {}, it is not a socket of this user'.format(
+                self.path
+            ))
+        os.remove(self.path)
+
+    def _serve(self):
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._socket.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            uid = peer_uid(conn)
+            if uid is not None and uid not in (os.getuid(), 0):
+                conn.close()
+                continue
+            conn.settimeout(None)
+            self._conn = conn
+            try:
+                self._session(conn)
+            except (OSError, SystemExit):
+                pass
+            finally:
+                self._conn = None
+                conn.close()
+                self.console.resume()
+
+    def _session(self, conn):
+        def send(data):
+            conn.sendall(data.encode('utf-8', 'replace'))
+
+        with conn.makefile('r', encoding='utf-8', errors='replace') as reader:
+            session = ConsoleSession(reader, send, self.console)
+            stack = self.console.stack
+            banner = 'siginfo console of pid {}, {} frames captured, type :help for help'.format(
+                os.getpid(), len(stack)
+            )
+            if stack:
+                banner += '\n{}'.format(stack[0])
+            session.interact(banner, '')
@@ -0,0 +1,276 @@
+import sys
+import threading
+import traceback
+
+from siginfo.capture import readable_frames
+from siginfo.concurrency import blocked_threads, rlock_owner, thread_name
+
+
+# Number of stack entries printed per thread of a deadlock cycle
+STACK_LIMIT = 10
+
+# {thread ident: TrackedLock} of all threads waiting for a TrackedLock
+_waiting = {}
+
+_rlock_types = (type(threading.RLock()), threading._PyRLock)
+
+
+class TrackedLock:
+    """
+    A lock that knows its owner and the threads waiting for it
+
+    CPython does not record which thread holds a ``threading.Lock``.
+    Wrapping locks in ``TrackedLock`` allows the deadlock detector to
+    build the complete wait-for graph. Acquiring an uncontended lock
+    costs one extra non-blocking ``acquire`` call.
+
+    Args
+    ----
+    lock : threading.Lock or threading.RLock
+        The lock to wrap
+        Default: None (a new ``threading.Lock``)
+    name : str
+        Name of the lock in reports
+        Default: None
+
+    Attributes
+    ----------
+    owner : int
+        Ident of the thread holding the lock, ``None`` if unlocked
+
+    Example
+    -------
+        ::
+
+            accounts_lock = TrackedLock(name='accounts')
+
+            with accounts_lock:
+                transfer()
+
+    """
+    def __init__(self, lock=None, name=None):
+        self._lock = lock if lock is not None else threading.Lock()
+        self.name = name
+        self.owner = None
+        self._count = 0
+
+    def __repr__(self):
+        return '<{} {}{}>'.format(
+            type(self).__name__,
+            self.name or hex(id(self)),
+            ' owned by {}'.format(thread_name(self.owner)) if self.owner else ''
+        )
+
+    def _acquired(self, ident):
+        self.owner = ident
+        self._count += 1
+
+    def acquire(self, blocking=True, timeout=-1):
+        ident = threading.get_ident()
+        if self._lock.acquire(False):
+            self._acquired(ident)
+            return True
+        if not blocking:
+            return False
+        _waiting[ident] = self
+        try:
+            acquired = self._lock.acquire(True, timeout)
+        finally:
+            _waiting.pop(ident, None)
+        if acquired:
+            self._acquired(ident)
+        return acquired
+
+    def release(self):
+        self._count -= 1
+        if self._count <= 0:
+            self._count = 0
+            self.owner = None
+        self._lock.release()
+
+    def locked(self):
+        return self.owner is not None
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *args):
+        self.release()
+
+
+class TrackedRLock(TrackedLock):
+    """
+    A reentrant :class:`TrackedLock`
+    """
+    def __init__(self, name=None):
+        super().__init__(threading.RLock(), name)
+
+
+class WaitEdge:
+    """
+    One edge of the wait-for graph: ``waiter`` waits for a
+    ``resource`` that is held by ``owner``
+
+    Attributes
+    ----------
+    waiter : int
+        Ident of the waiting thread
+    owner : int
+        Ident of the thread holding the resource
+    resource : str
+        Description of the lock, thread or other resource
+
+    """
+    __slots__ = ('waiter', 'owner', 'resource')
+
+    def __init__(self, waiter, owner, resource):
+        self.waiter = waiter
+        self.owner = owner
+        self.resource = resource
+
+    def __str__(self):
+        return '{} waits for {} held by {}'.format(
+            thread_name(self.waiter), self.resource, thread_name(self.owner)
+        )
+
+
+def wait_for_graph(thread_frames=None):
+    """
+    Builds the wait-for graph between all threads
+
+    Edges are created for threads waiting for a :class:`TrackedLock`,
+    an ``RLock`` or ``Thread.join``. The owner of an ``RLock`` is read
+    from both implementations (see :func:`siginfo.concurrency.rlock_owner`),
+    but waiting threads are found by their ``acquire`` frame in
+    ``threading.py``, which only the pure Python implementation has.
+    Threads blocked in the C ``RLock.acquire`` or in untracked
+    ``Lock.acquire`` calls don't create edges, use :class:`TrackedRLock`
+    and :class:`TrackedLock` for those.
+
+    Args
+    ----
+    thread_frames : dict
+        ``{thread ident: frame}``
+        Default: None (:func:`siginfo.capture.readable_frames`)
+
+    Returns
+    -------
+    : dict
+        ``{waiting thread ident: [WaitEdge, ...]}``
+
+    """
+    if thread_frames is None:
+        thread_frames = readable_frames()
+    graph = {}
+    for ident, lock in list(_waiting.items()):
+        owner = lock.owner
+        if owner is not None and owner != ident:
+            graph.setdefault(ident, []).append(WaitEdge(ident, owner, repr(lock)))
+    for blocked in blocked_threads(thread_frames).values():
+        for thread in blocked:
+            obj = thread.frame.f_locals.get('self')
+            owner = None
+            if isinstance(obj, _rlock_types):
+                owner = rlock_owner(obj)
+            elif isinstance(obj, threading.Thread) and thread.function == 'join':
+                owner = obj.ident
+            if owner is not None and owner != thread.ident:
+                graph.setdefault(thread.ident, []).append(
+                    WaitEdge(thread.ident, owner, repr(obj))
+                )
+    return graph
+
+
+def find_cycles(graph):
+    """
+    Finds all cycles in a wait-for graph
+
+    Args
+    ----
+    graph : dict
+        ``{thread ident: [WaitEdge, ...]}``
+
+    Returns
+    -------
+    : list
+        Each cycle is a list of :class:`WaitEdge`, starting with the
+        thread with the lowest ident. Every cycle is reported once.
+
+    """
+    cycles = []
+    seen = set()
+    done = set()
+    for start in sorted(graph):
+        if start in done:
+            continue
+        # iterative DFS; path holds the edges from `start`
+        path = []
+        on_path = {start: 0}
+        stack = [iter(graph.get(start, ()))]
+        while stack:
+            edge = next(stack[-1], None)
+            if edge is None:
+                stack.pop()
+                if path:
+                    on_path.pop(path.pop().owner, None)
+                continue
+            if edge.owner in on_path:
+                cycle = path[on_path[edge.owner]:] + [edge]
+                first = min(range(len(cycle)), key=lambda idx: cycle[idx].waiter)
+                cycle = cycle[first:] + cycle[:first]
+                key = tuple(e.waiter for e in cycle)
+                if key not in seen:
+                    seen.add(key)
+                    cycles.append(cycle)
+            elif edge.owner not in done:
+                path.append(edge)
+                on_path[edge.owner] = len(path)
+                stack.append(iter(graph.get(edge.owner, ())))
+        done.add(start)
+    return cycles
+
+
+def format_deadlocks(cycles, thread_frames=None):
+    """
+    Formats deadlock cycles with the stacks of the involved threads
+
+    Args
+    ----
+    cycles : list
+        As returned by :func:`find_cycles`
+    thread_frames : dict
+        ``{thread ident: frame}``
+        Default: None (``sys._current_frames()``)
+
+    Returns
+    -------
+    : str
+
+    """
+    if thread_frames is None:
+        thread_frames = sys._current_frames()
+    lines = []
+    for idx, cycle in enumerate(cycles):
+        lines.append('DEADLOCK {}'.format(idx + 1))
+        for edge in cycle:
+            lines.append('  {}'.format(edge))
+        for edge in cycle:
+            frame = thread_frames.get(edge.waiter)
+            lines.append('STACK {}'.format(thread_name(edge.waiter)))
+            if frame is not None:
+                stack = traceback.format_stack(frame)[-STACK_LIMIT:]
+                lines.append(''.join(stack).rstrip('\n'))
+    return '\n'.join(lines)
+
+
+def detect_deadlocks(thread_frames=None):
+    """
+    Builds the wait-for graph of all threads and finds cycles
+
+    Returns
+    -------
+    : list
+        See :func:`find_cycles`
+
+    """
+    return find_cycles(wait_for_graph(thread_frames))
@@ -0,0 +1,268 @@
+import time
+from operator import itemgetter
+
+
+# Maximum length of the text that is kept of every value
+MAX_REPR = 120
+
+# Types whose text is parsed for numeric deltas
+NUMERIC_TYPES = {'int': int, 'float': float}
+
+
+def _shorten(text, max_repr):
+    if len(text) <= max_repr:
+        return text
+    return text[:max_repr - 3] + '...'
+
+
+def _number(type_name, text):
+    parse = NUMERIC_TYPES.get(type_name)
+    if parse is None:
+        return None
+    try:
+        return parse(text)
+    except ValueError:
+        # a summary instead of the plain value
+        return None
+
+
+class FrameState:
+    """
+    Compact state of a captured frame
+
+    Values are not referenced, only the hash and a shortened
+    text of every variable are kept.
+
+    Attributes
+    ----------
+    lineno : int
+    digest : int
+        Hash over the line and all variables, frames with equal
+        digests are not compared variable by variable
+    variables : dict
+        ``{name: (hash of the text, shortened text, number or None)}``,
+        ``None`` if the locals were not captured
+
+    """
+    __slots__ = ('lineno', 'digest', 'variables')
+
+    def __init__(self, lineno, digest, variables):
+        self.lineno = lineno
+        self.digest = digest
+        self.variables = variables
+
+
+class StackState:
+    """
+    Compact state of a dump: :class:`FrameState` per frame identity
+
+    The identity of a frame is its code object and its position counted
+    from the outermost frame of the whole stack, so the same call is found
+    again in the next dump even if frames were added or removed on top of
+    it, also when ``MAX_LEVELS`` captures only the innermost frames.
+
+    Attributes
+    ----------
+    time : float
+        ``time.monotonic()`` of the capture
+    frames : dict
+        ``{(code, position): FrameState}``
+    levels : dict
+        ``{(code, position): level}``
+
+    """
+    __slots__ = ('time', 'frames', 'levels')
+
+    def __init__(self, frames, levels, timestamp=None):
+        self.time = time.monotonic() if timestamp is None else timestamp
+        self.frames = frames
+        self.levels = levels
+
+
+def capture_state(snapshots, depth, max_repr=MAX_REPR, timestamp=None):
+    """
+    Converts frame snapshots to a :class:`StackState`
+
+    Args
+    ----
+    snapshots : dict
+        ``{level: FrameSnapshot}``
+    depth : int
+        Number of frames of the whole stack, including the frames
+        beyond the captured ones (see :func:`siginfo.stack.stack_depth`),
+        used to count positions from the outermost frame
+    max_repr : int
+        Maximum length of the kept text of every value
+    timestamp : float
+        Default: None (now)
+
+    Returns
+    -------
+    : :class:`StackState`
+
+    """
+    frames = {}
+    levels = {}
+    for level, snapshot in snapshots.items():
+        identity = (snapshot.code, depth - level)
+        variables = None
+        digest = hash(snapshot.lineno)
+        if snapshot.locals is not None:
+            variables = {}
+            for name, type_name, text in snapshot.locals:
+                variables[name] = (
+                    hash(text), _shorten(text, max_repr), _number(type_name, text)
+                )
+            digest = hash((snapshot.lineno, tuple(
+                (name, value[0]) for name, value in variables.items()
+            )))
+        frames[identity] = FrameState(snapshot.lineno, digest, variables)
+        levels[identity] = level
+    return StackState(frames, levels, timestamp)
+
+
+class VariableChange(tuple):
+    """
+    A changed variable: ``(name, old text, new text, delta, rate)``
+
+    ``old`` is ``None`` for new variables, ``new`` is ``None`` for
+    removed variables. ``delta`` and ``rate`` (per second) are only
+    set if both values are numbers.
+    """
+    __slots__ = ()
+
+    def __new__(cls, name, old, new, delta=None, rate=None):
+        return tuple.__new__(cls, (name, old, new, delta, rate))
+
+    name = property(itemgetter(0))
+    old = property(itemgetter(1))
+    new = property(itemgetter(2))
+    delta = property(itemgetter(3))
+    rate = property(itemgetter(4))
+
+    def __repr__(self):
+        return 'VariableChange({!r}, {!r}, {!r}, {!r}, {!r})'.format(*self)
+
+
+class FrameChange:
+    """
+    A frame that is new or changed since the previous dump
+
+    Attributes
+    ----------
+    level : int
+        Level in the current dump
+    code : code
+    lineno : int
+    old_lineno : int
+        ``None`` for new frames
+    changes : list
+        :class:`VariableChange` instances
+
+    """
+    __slots__ = ('level', 'code', 'lineno', 'old_lineno', 'changes')
+
+    def __init__(self, level, code, lineno, old_lineno, changes):
+        self.level = level
+        self.code = code
+        self.lineno = lineno
+        self.old_lineno = old_lineno
+        self.changes = changes
+
+    @property
+    def name(self):
+        return self.code.co_name
+
+    @property
+    def new(self):
+        return self.old_lineno is None
+
+
+def _diff_variables(old, new, elapsed):
+    changes = []
+    if old is None or new is None:
+        return changes
+    common = 0
+    for name, value in new.items():
+        previous = old.get(name)
+        if previous is None:
+            changes.append(VariableChange(name, None, value[1]))
+            continue
+        common += 1
+        if previous[0] != value[0]:
+            delta = rate = None
+            if previous[2] is not None and value[2] is not None:
+                delta = value[2] - previous[2]
+                if elapsed:
+                    rate = delta / elapsed
+            changes.append(VariableChange(name, previous[1], value[1], delta, rate))
+    if common < len(old):
+        # some variables were removed
+        for name, previous in old.items():
+            if name not in new:
+                changes.append(VariableChange(name, previous[1], None))
+    return changes
+
+
+def diff_states(previous, current):
+    """
+    Frames and variables that changed between two dumps
+
+    Frames with an equal digest are skipped without looking
+    at their variables, so the work depends on the number of
+    changed frames and not on the size of the whole stack.
+
+    Args
+    ----
+    previous : :class:`StackState`
+    current : :class:`StackState`
+
+    Returns
+    -------
+    : tuple
+        ``(changed frames ordered by level, number of removed frames, elapsed seconds)``
+
+    """
+    elapsed = current.time - previous.time
+    changed = []
+    for identity, state in current.frames.items():
+        old = previous.frames.get(identity)
+        if old is None:
+            changed.append(FrameChange(
+                current.levels[identity], identity[0], state.lineno, None, []
+            ))
+            continue
+        if old.digest == state.digest:
+            continue
+        changed.append(FrameChange(
+            current.levels[identity], identity[0], state.lineno, old.lineno,
+            _diff_variables(old.variables, state.variables, elapsed)
+        ))
+    changed.sort(key=lambda change: change.level)
+    # frames below the outermost captured frame are out of view, not returned
+    lowest = min((position for _, position in current.frames), default=0)
+    removed = sum(
+        1 for identity in previous.frames
+        if identity[1] >= lowest and identity not in current.frames
+    )
+    return changed, removed, elapsed
+
+
+def format_change(change):
+    """
+    Formats a :class:`VariableChange`, e.g. ``'100 → 250 (+150, 5/s)'``
+    """
+    if change.old is None:
+        return 'new: {}'.format(change.new)
+    if change.new is None:
+        return 'removed (was {})'.format(change.old)
+    res = '{} → {}'.format(change.old, change.new)
+    if change.delta is not None:
+        if isinstance(change.delta, int):
+            res += ' ({:+d}'.format(change.delta)
+        else:
+            res += ' ({:+g}'.format(change.delta)
+        if change.rate is not None:
+            res += ', {:g}/s'.format(round(change.rate, 3))
+        res += ')'
+    return res
@@ -0,0 +1,127 @@
+import signal
+import sys
+import traceback
+
+from siginfo.stack import walk_stack
+
+
+# Maximum number of frames captured per signal
+STACK_DEPTH = 1000
+
+# {signal number: SignalDispatcher}
+dispatchers = {}
+
+
+class SignalDispatcher:
+    """
+    Handler of one signal that feeds all registered consumers
+
+    The stack is walked once per signal and the same list of frames
+    is passed to every consumer. Afterwards the handler that was
+    installed before the dispatcher is called, so existing handlers
+    of the application keep working.
+
+    Consumers with a ``handle(signum, frame, stack)`` method receive
+    the shared stack, all other consumers are called like a regular
+    signal handler with ``(signum, frame)``. An exception in one
+    consumer is printed to stderr and does not affect the others.
+
+    Args
+    ----
+    signum : int
+        The signal number
+    previous : callable
+        Handler that was installed before, as returned by
+        ``signal.getsignal``
+
+    """
+    def __init__(self, signum, previous=None):
+        self.signum = signum
+        self.previous = previous
+        self.consumers = []
+
+    def __repr__(self):
+        return '<SignalDispatcher {} consumers={}>'.format(self.signum, len(self.consumers))
+
+    def add(self, consumer):
+        if consumer not in self.consumers:
+            self.consumers.append(consumer)
+
+    def remove(self, consumer):
+        if consumer in self.consumers:
+            self.consumers.remove(consumer)
+
+    def __call__(self, signum, frame):
+        stack = walk_stack(frame, STACK_DEPTH)
+        for consumer in list(self.consumers):
+            try:
+                handle = getattr(consumer, 'handle', None)
+                if handle is not None:
+                    handle(signum, frame, stack)
+                else:
+                    consumer(signum, frame)
+            except Exception:
+                traceback.print_exc(file=sys.stderr)
+        if callable(self.previous):
+            self.previous(signum, frame)
+
+
+def register(signum, consumer):
+    """
+    Adds a consumer to the dispatcher of a signal
+
+    The dispatcher is installed on first use. If another handler was
+    installed in the meantime, the dispatcher is installed again and
+    chains to that handler.
+
+    Args
+    ----
+    signum : int
+        The signal number
+    consumer : callable
+        A signal handler or an object with a ``handle`` method
+
+    Returns
+    -------
+    : :class:`SignalDispatcher`
+
+    """
+    dispatcher = dispatchers.get(signum)
+    current = signal.getsignal(signum)
+    if dispatcher is None:
+        dispatcher = SignalDispatcher(signum, current)
+        dispatchers[signum] = dispatcher
+        signal.signal(signum, dispatcher)
+    elif current is not dispatcher:
+        dispatcher.previous = current
+        signal.signal(signum, dispatcher)
+    dispatcher.add(consumer)
+    return dispatcher
+
+
+def unregister(signum, consumer):
+    """
+    Removes a consumer from the dispatcher of a signal
+
+    The previous handler is restored once the last consumer is removed.
+
+    Args
+    ----
+    signum : int
+        The signal number
+    consumer : callable
+
+    Returns
+    -------
+    None
+
+    """
+    dispatcher = dispatchers.get(signum)
+    if dispatcher is None:
+        return
+    dispatcher.remove(consumer)
+    if not dispatcher.consumers:
+        del dispatchers[signum]
+        if signal.getsignal(signum) is dispatcher:
+            previous = dispatcher.previous
+            signal.signal(signum, previous if previous is not None else signal.SIG_DFL)
@@ -0,0 +1,178 @@
+import faulthandler
+import os
+import signal
+import time
+
+from siginfo.dispatcher import dispatchers
+from siginfo.registry import directory
+
+
+SUFFIX = '.traceback'
+
+
+def default_signal():
+    """
+    Signal of the fallback dump: ``SIGRTMAX`` on Linux, far from the
+    commands that start at ``SIGRTMIN``, otherwise ``SIGUSR2``
+    """
+    return int(getattr(signal, 'SIGRTMAX', signal.SIGUSR2))
+
+
+def traceback_path(pid):
+    """
+    Path of the fallback traceback file of a process, next to its registry file
+    (see :func:`siginfo.registry.directory`)
+    """
+    return os.path.join(directory(), 'siginfo-{}{}'.format(pid, SUFFIX))
+
+
+class FallbackDump:
+    """
+    Tracebacks of all threads written by ``faulthandler`` in C
+
+    The rich dump of :class:`siginfo.siginfoclass.SiginfoBasic` runs
+    Python code: it allocates, formats values and takes locks. When
+    the process is close to its memory limit or an extension holds
+    the GIL, the rich dump fails or never runs. ``faulthandler`` writes
+    the tracebacks of all threads from the C signal handler, without
+    allocating memory and without waiting for the interpreter.
+
+    The file is opened once when the fallback is started, the signal
+    handler only writes to the raw file descriptor. It is created with
+    mode 0600 and never opened through a symlink. Every start writes
+    a header with the pid, the signal and the time, so several runs
+    can share the file.
+
+    ``faulthandler`` supports one hang timer per process: starting
+    a second timer cancels the first.
+
+    Args
+    ----
+    pid : int
+        Process id for the header and the default path
+    signum : int
+        Signal that dumps the tracebacks, must not be used by a
+        siginfo instance
+        Default: None (see :func:`default_signal`)
+    path : str
+        File the tracebacks are appended to
+        Default: None (see :func:`traceback_path`)
+    timeout : float
+        Dump the tracebacks if :meth:`reset` is not called for
+        ``timeout`` seconds
+        Default: None (no hang timer)
+    repeat : bool
+        Dump again every ``timeout`` seconds while the process hangs
+        Default: False
+
+    Raises
+    ------
+    ValueError
+        If a siginfo dispatcher listens for the signal
+
+    Example
+    -------
+        ::
+
+            fallback = FallbackDump(os.getpid(), timeout=300)
+            fallback.start()
+
+            for batch in batches:
+                process(batch)
+                fallback.reset()  # still alive
+
+        .. code-block:: bash
+
+            kill -s RTMAX 1234
+            cat /tmp/siginfo-1000/siginfo-1234.traceback
+
+    """
+    def __init__(self, pid, signum=None, path=None, timeout=None, repeat=False):
+        self.pid = pid
+        self.signum = default_signal() if signum is None else int(signum)
+        self.path = os.path.abspath(path or traceback_path(pid))
+        self.timeout = timeout
+        self.repeat = repeat
+        self.fd = None
+        if self.signum in dispatchers:
+            raise ValueError('Signal {} is already used by siginfo'.format(self.signum))
+
+    @property
+    def running(self):
+        return self.fd is not None
+
+    def start(self):
+        """
+        Opens the file, registers the signal and starts the hang timer
+
+        Returns
+        -------
+        None
+
+        """
+        if self.running:
+            return
+        flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, 'O_NOFOLLOW', 0)
+        fd = os.open(self.path, flags, 0o600)
+        os.write(fd, 'SIGINFO FALLBACK\tpid {} signal {} timeout {} started {}\n'.format(
+            self.pid, self.signum, self.timeout, time.strftime('%Y-%m-%d %H:%M:%S')
+        ).encode('utf-8'))
+        try:
+            faulthandler.register(self.signum, file=fd, all_threads=True, chain=False)
+        except BaseException:
+            os.close(fd)
+            raise
+        self.fd = fd
+        self.reset()
+
+    def reset(self):
+        """
+        Restarts the hang timer, call it whenever the process makes progress
+
+        Returns
+        -------
+        None
+
+        """
+        if self.running and self.timeout is not None:
+            faulthandler.dump_traceback_later(self.timeout, repeat=self.repeat, file=self.fd)
+
+    def dump(self):
+        """
+        Writes the tracebacks of all threads now
+
+        Returns
+        -------
+        None
+
+        """
+        if self.running:
+            faulthandler.dump_traceback(file=self.fd, all_threads=True)
+
+    def stop(self):
+        """
+        Unregisters the signal, cancels the hang timer and closes the file
+
+        Returns
+        -------
+        None
+
+        """
+        if not self.running:
+            return
+        faulthandler.unregister(self.signum)
+        if self.timeout is not None:
+            faulthandler.cancel_dump_traceback_later()
+        os.close(self.fd)
+        self.fd = None
+
+    def as_dict(self):
+        """
+        Entry of the registry file
+
+        Returns
+        -------
+        : dict
+
+        """
+        return {'signal': self.signum, 'path': self.path, 'timeout': self.timeout}
@@ -0,0 +1,346 @@
+import os
+import sys
+import threading
+import time
+import traceback
+from array import array
+from time import perf_counter_ns, thread_time_ns
+
+from siginfo.capture import stack_entries
+from siginfo.resources import PROC, parse_stat
+from siginfo.stats import PAUSE_BUCKETS, bucket, format_us, percentile
+
+
+# Seconds the probe thread sleeps between two measurements
+INTERVAL = 0.005
+
+# Maximum share of the elapsed time spent sampling stacks
+MAX_OVERHEAD = 0.02
+
+# Number of distinct stacks and threads that are counted, more are merged into OTHER
+MAX_STACKS = 1000
+
+# Number of stack entries per sample
+STACK_LIMIT = 20
+
+# Stack key of samples that exceed MAX_STACKS
+OTHER = ()
+
+
+def stack_key(frame, limit=STACK_LIMIT):
+    """
+    Hashable summary of a stack: ``(filename, lineno, name)`` per frame, outermost first
+    """
+    res = stack_entries(frame, limit)
+    res.reverse()
+    return tuple(res)
+
+
+def thread_cpu(native_id, ticks=None, proc=PROC):
+    """
+    User and system CPU time of a thread in seconds (Linux only)
+
+    Read from ``/proc/self/task/<native_id>/stat``, the resolution
+    is one clock tick (usually 10ms).
+
+    Returns
+    -------
+    : float
+        ``None`` if the time is not available
+
+    """
+    if native_id is None:
+        return None
+    try:
+        with open('{}/task/{}/stat'.format(proc, native_id), 'rb') as fh:
+            cpu = parse_stat(fh.read(), ticks)
+    except (OSError, ValueError, IndexError):
+        return None
+    return cpu['cpu_user'] + cpu['cpu_system']
+
+
+class GilProbe:
+    """
+    Estimates GIL contention and which threads hold the GIL
+
+    A probe thread sleeps for ``interval`` seconds in a loop. Waking up
+    requires the GIL, so the time it wakes up late is the time it
+    waited for other threads (plus the scheduling latency of the
+    operating system). The lateness is recorded in a histogram with
+    power-of-two microsecond buckets.
+
+    After waking up, the probe samples the frames of all threads with
+    ``sys._current_frames()``. A thread ran in between, and most likely
+    held the GIL, if its CPU time grew (Linux, see :func:`thread_cpu`)
+    or its top frame or instruction changed. Threads that wait for
+    I/O, a lock or a sleep keep their position and CPU time. The
+    stacks of running threads are counted together with the lateness
+    they caused. This is an estimate: CPU time includes C code that
+    released the GIL and, without CPU times, a loop that always
+    releases the GIL at the same instruction looks idle.
+
+    Stacks are only sampled while the CPU time spent sampling stays
+    below ``max_overhead`` of the elapsed time, the lateness is
+    measured in every iteration.
+
+    Args
+    ----
+    interval : float
+        Seconds between two measurements
+        Default: 0.005
+    max_overhead : float
+        Maximum share of the time spent sampling stacks
+        Default: 0.02
+    max_stacks : int
+        Number of distinct stacks and threads that are counted
+        Default: 1000
+
+    Attributes
+    ----------
+    lateness : array
+        Histogram of the lateness, see :func:`siginfo.stats.bucket`
+    max_lateness : int
+        Largest lateness in ns
+    samples : int
+        Number of stack samples
+    skipped : int
+        Measurements without stack sample because of ``max_overhead``
+    threads : dict
+        ``{ident: [name, running samples, samples, CPU seconds]}``,
+        the CPU time is ``None`` if it is not available
+    stacks : dict
+        ``{stack key: [running samples, lateness in ns]}``, see :func:`stack_key`
+    on_finish : callable
+        Called with the probe when it stops after ``duration``
+
+    Example
+    -------
+        ::
+
+            probe = GilProbe()
+            probe.start(duration=5)
+            ...
+            print(probe.report())
+
+    """
+    def __init__(self, interval=INTERVAL, max_overhead=MAX_OVERHEAD, max_stacks=MAX_STACKS):
+        self.interval = interval
+        self.max_overhead = max_overhead
+        self.max_stacks = max_stacks
+        self.on_finish = None
+        self._thread = None
+        self._ticks = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else None
+        self.reset()
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def reset(self):
+        """
+        Clears all measurements
+
+        Returns
+        -------
+        None
+
+        """
+        self.lateness = array('L', [0]) * PAUSE_BUCKETS
+        self.max_lateness = 0
+        self.samples = 0
+        self.skipped = 0
+        self.sample_ns = 0
+        self.elapsed_ns = 0
+        self.threads = {}
+        self.stacks = {}
+        self._positions = None
+
+    def start(self, duration=None):
+        """
+        Clears the measurements and starts the probe thread
+
+        Args
+        ----
+        duration : float
+            Seconds after which the probe stops and calls ``on_finish``
+            Default: None (until :meth:`stop`)
+
+        Returns
+        -------
+        None
+
+        """
+        if self.running:
+            return
+        self.reset()
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=self._run, args=(stop, duration), name='siginfo-gilprobe', daemon=True
+        )
+        self._thread = (thread, stop)
+        thread.start()
+
+    def stop(self):
+        """
+        Stops the probe thread, the measurements are kept
+
+        Returns
+        -------
+        None
+
+        """
+        if self._thread is None:
+            return
+        thread, stop = self._thread
+        stop.set()
+        if thread is not threading.current_thread():
+            thread.join()
+        self._thread = None
+
+    def _run(self, stop, duration):
+        own = threading.get_ident()
+        interval_ns = int(self.interval * 1e9)
+        began = previous = perf_counter_ns()
+        while not stop.is_set():
+            time.sleep(self.interval)
+            now = perf_counter_ns()
+            late = max(now - previous - interval_ns, 0)
+            self.lateness[bucket(late)] += 1
+            if late > self.max_lateness:
+                self.max_lateness = late
+            self.elapsed_ns = now - began
+            if self.sample_ns <= self.max_overhead * self.elapsed_ns:
+                # CPU time of the probe thread, waiting for the GIL is not overhead
+                cpu = thread_time_ns()
+                self.sample(late, own)
+                self.sample_ns += thread_time_ns() - cpu
+            else:
+                self.skipped += 1
+            if duration is not None and self.elapsed_ns >= duration * 1e9:
+                break
+            # the time spent sampling is not lateness
+            previous = perf_counter_ns()
+        if not stop.is_set():
+            self._thread = None
+            if self.on_finish is not None:
+                self.on_finish(self)
+
+    def sample(self, late=0, own=None):
+        """
+        Samples the stacks of all threads except ``own``
+
+        Args
+        ----
+        late : int
+            Lateness in ns that is attributed to the running threads
+        own : int
+            Ident of the probe thread
+
+        Returns
+        -------
+        None
+
+        """
+        frames = sys._current_frames()
+        names = {
+            thread.ident: (thread.name, getattr(thread, 'native_id', None))
+            for thread in threading.enumerate()
+        }
+        previous = self._positions
+        positions = {}
+        frame = None
+        for ident, frame in frames.items():
+            if ident == own:
+                continue
+            name, native_id = names.get(ident, (str(ident), None))
+            position = (id(frame), frame.f_lasti, thread_cpu(native_id, self._ticks))
+            positions[ident] = position
+            if previous is not None and ident in previous:
+                self._count_thread(ident, name, frame, position, previous[ident], late)
+        del frames, frame
+        self._positions = positions
+        if previous is not None:
+            self.samples += 1
+
+    def _count_thread(self, ident, name, frame, position, before, late):
+        """
+        Counts a sample of a thread, and its stack if the thread ran
+        since the previous sample
+        """
+        thread = self.threads.get(ident)
+        if thread is None:
+            if len(self.threads) >= self.max_stacks:
+                return
+            thread = self.threads[ident] = [name, 0, 0, None]
+        thread[2] += 1
+        if position[2] is not None and before[2] is not None:
+            thread[3] = (thread[3] or 0.0) + position[2] - before[2]
+        if position == before:
+            return
+        thread[1] += 1
+        key = stack_key(frame)
+        entry = self.stacks.get(key)
+        if entry is None:
+            if len(self.stacks) >= self.max_stacks:
+                key = OTHER
+            entry = self.stacks.setdefault(key, [0, 0])
+        entry[0] += 1
+        entry[1] += late
+
+    def percentile(self, fraction):
+        """
+        Upper bound of a lateness percentile in µs, see :func:`siginfo.stats.percentile`
+        """
+        return percentile(self.lateness, fraction)
+
+    def report(self, top=5):
+        """
+        Lateness percentiles, running share per thread and the
+        stacks that ran most often
+
+        Args
+        ----
+        top : int
+            Number of stacks
+            Default: 5
+
+        Returns
+        -------
+        : str
+
+        """
+        measurements = sum(self.lateness)
+        header = 'GIL PROBE\tmeasurements {} samples {} skipped {} interval {} overhead {:.1%}'
+        lines = [header.format(
+            measurements, self.samples, self.skipped, format_us(int(self.interval * 1e6)),
+            self.sample_ns / self.elapsed_ns if self.elapsed_ns else 0.0
+        )]
+        if measurements:
+            lines.append('LATE\tp50 <{} p90 <{} p99 <{} max {}'.format(
+                format_us(self.percentile(0.5)),
+                format_us(self.percentile(0.9)),
+                format_us(self.percentile(0.99)),
+                format_us(self.max_lateness // 1000)
+            ))
+        samples = self.samples
+        if not samples:
+            return '\n'.join(lines)
+        lines.append('THREADS\trunning share of samples')
+        threads = sorted(self.threads.values(), key=lambda thread: (-thread[1], thread[0]))
+        for name, running, sampled, cpu in threads:
+            lines.append('\t{:6.1%}\t{} ({} of {}{})'.format(
+                running / samples, name, running, sampled,
+                '' if cpu is None else ', cpu {:.2f}s'.format(cpu)
+            ))
+        stacks = sorted(self.stacks.items(), key=lambda item: (-item[1][0], -item[1][1]))
+        for key, (running, late) in stacks[:top]:
+            lines.append('RUNNING\t{:.1%} of samples, late {}'.format(
+                running / samples, format_us(late // 1000)
+            ))
+            if key == OTHER:
+                lines.append('  (other stacks)')
+            else:
+                lines.append(''.join(traceback.format_list([
+                    traceback.FrameSummary(filename, lineno, name) for filename, lineno, name in key
+                ])).rstrip('\n'))
+        return '\n'.join(lines)
@@ -1,5 +1,6 @@
 import math
 
+from siginfo.snapshot import capture_locals
 from siginfo.utils import left_string
 
 
@@ -17,16 +18,23 @@ class LocalClass:
 
     Args
     ----
-    local_vars : object
-        Object to display in table. key will be one row
+    local_vars : dict or tuple
+        Object to display in table. key will be one row.
+        Can also be the captured locals of a
+        :class:`siginfo.snapshot.FrameSnapshot`
     columns : int
         Width (in columns) of the output stream. Default: 80
+    summarize : callable
+        Called with every value. If it returns a string, it is displayed
+        instead of ``str(value)``. Default: None
 
     """
-    def __init__(self, local_vars, columns=80):
-        self.var_names = list(local_vars.keys())
-        self.types = [type(local_vars[key]).__name__ for key in self.var_names]
-        self.values = [str(local_vars[key]) for key in self.var_names]
+    def __init__(self, local_vars, columns=80, summarize=None):
+        if hasattr(local_vars, 'items'):
+            local_vars = capture_locals(local_vars, summarize)
+        self.var_names = [local.name for local in local_vars]
+        self.types = [local.type_name for local in local_vars]
+        self.values = [local.text for local in local_vars]
 
         self._add_headers()
 
@@ -0,0 +1,275 @@
+import sys
+import threading
+import time
+import traceback
+from array import array
+
+from siginfo.stats import PAUSE_BUCKETS, bucket, format_us, percentile
+
+
+# Seconds between two heartbeats
+INTERVAL = 0.1
+
+# Lag in seconds above which the stack of the loop thread is captured
+THRESHOLD = 0.1
+
+# Number of stalls that are kept, the ones with the largest lag
+MAX_STALLS = 5
+
+# Number of stack entries per stall
+STACK_LIMIT = 20
+
+
+class Stall:
+    """
+    A time the event loop was blocked for longer than the threshold
+
+    Attributes
+    ----------
+    lag : float
+        Seconds the heartbeat was late, grows while the loop is blocked
+    time : float
+        ``time.time()`` of the capture
+    stack : list
+        ``traceback.FrameSummary`` of the loop thread, outermost first
+
+    """
+    __slots__ = ('lag', 'time', 'stack')
+
+    def __init__(self, lag, stack, timestamp=None):
+        self.lag = lag
+        self.stack = stack
+        self.time = time.time() if timestamp is None else timestamp
+
+    def format(self):
+        """
+        Formats the lag and the stack
+
+        Returns
+        -------
+        : str
+
+        """
+        return 'STALL\tlag {:.3f}s at {}\n{}'.format(
+            self.lag,
+            time.strftime('%H:%M:%S', time.localtime(self.time)),
+            ''.join(traceback.format_list(self.stack)).rstrip('\n')
+        )
+
+
+class LoopLagMonitor:
+    """
+    Measures the lag of an asyncio event loop
+
+    A heartbeat callback is scheduled with ``call_later`` every
+    ``interval`` seconds. The time between the planned and the actual
+    call is the lag, it is recorded in a histogram with power-of-two
+    microsecond buckets. A watchdog thread checks whether the heartbeat
+    is overdue by more than ``threshold`` and captures the stack of the
+    loop thread with ``sys._current_frames()`` while the loop is still
+    blocked, so the callback that blocks the loop is found without
+    asyncio's debug mode.
+
+    Args
+    ----
+    interval : float
+        Seconds between two heartbeats
+        Default: 0.1
+    threshold : float
+        Lag in seconds that counts as stall
+        Default: 0.1
+    max_stalls : int
+        Number of kept stalls with the largest lag
+        Default: 5
+
+    Attributes
+    ----------
+    lags : array
+        Histogram of the lag, see :func:`siginfo.stats.bucket`
+    max_lag : float
+        Largest lag in seconds
+    stalls : list
+        :class:`Stall` with the largest lag, largest first
+
+    Example
+    -------
+        ::
+
+            monitor = LoopLagMonitor(threshold=0.05)
+
+            async def main():
+                monitor.start()
+                ...
+
+            asyncio.run(main())
+            print(monitor.report())
+
+    """
+    def __init__(self, interval=INTERVAL, threshold=THRESHOLD, max_stalls=MAX_STALLS):
+        self.interval = interval
+        self.threshold = threshold
+        self.max_stalls = max_stalls
+        self.lags = array('L', [0]) * PAUSE_BUCKETS
+        self.max_lag = 0.0
+        self.stalls = []
+        self.loop = None
+        self.thread_id = None
+        self._handle = None
+        self._expected = None
+        self._pending = None  # Stall captured for the current heartbeat
+        self._watchdog = None
+
+    @property
+    def running(self):
+        return self._watchdog is not None
+
+    def start(self, loop=None):
+        """
+        Starts the heartbeat and the watchdog thread
+
+        Args
+        ----
+        loop : asyncio.AbstractEventLoop
+            Default: None (the running loop, ``start`` has to be
+            called from a coroutine or callback)
+
+        Returns
+        -------
+        None
+
+        """
+        if self.running:
+            return
+        if loop is None:
+            # imported here, asyncio alone takes longer to import than siginfo
+            import asyncio
+
+            loop = asyncio.get_running_loop()
+        self.loop = loop
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=self._watch, args=(stop,), name='siginfo-looplag', daemon=True
+        )
+        self._watchdog = (thread, stop)
+        loop.call_soon_threadsafe(self._install)
+        thread.start()
+
+    def stop(self):
+        """
+        Stops the heartbeat and the watchdog thread
+
+        Returns
+        -------
+        None
+
+        """
+        if self._watchdog is None:
+            return
+        thread, stop = self._watchdog
+        stop.set()
+        if thread is not threading.current_thread():
+            thread.join()
+        self._watchdog = None
+        handle = self._handle
+        if handle is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(handle.cancel)
+        self._handle = None
+        self._expected = None
+
+    def _install(self):
+        self.thread_id = threading.get_ident()
+        self._schedule(time.monotonic())
+
+    def _schedule(self, now):
+        self._expected = now + self.interval
+        self._handle = self.loop.call_later(self.interval, self._beat)
+
+    def _beat(self):
+        if self._expected is None:
+            # stopped
+            return
+        now = time.monotonic()
+        lag = max(now - self._expected, 0.0)
+        self.lags[bucket(int(lag * 1e9))] += 1
+        if lag > self.max_lag:
+            self.max_lag = lag
+        stall = self._pending
+        if stall is not None:
+            self._pending = None
+            stall.lag = lag
+            # replaced, not modified: readers never see a half sorted list
+            stalls = sorted(self.stalls + [stall], key=lambda item: -item.lag)
+            self.stalls = stalls[:self.max_stalls]
+        if self._watchdog is not None:
+            self._schedule(now)
+
+    def _watch(self, stop):
+        check = min(self.interval, self.threshold) / 2
+        while not stop.wait(check):
+            expected = self._expected
+            if expected is None or self._pending is not None:
+                continue
+            lag = time.monotonic() - expected
+            if lag > self.threshold:
+                self.capture(lag)
+
+    def capture(self, lag):
+        """
+        Captures the current stack of the loop thread as pending stall,
+        its lag is updated by the next heartbeat
+
+        Args
+        ----
+        lag : float
+            Lag so far in seconds
+
+        Returns
+        -------
+        : :class:`Stall`
+            ``None`` if the loop thread is not running
+
+        """
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return None
+        stall = Stall(lag, traceback.extract_stack(frame, STACK_LIMIT))
+        self._pending = stall
+        return stall
+
+    def percentile(self, fraction):
+        """
+        Upper bound of a lag percentile in µs, see :func:`siginfo.stats.percentile`
+        """
+        return percentile(self.lags, fraction)
+
+    def report(self):
+        """
+        Lag histogram and the worst stalls
+
+        Returns
+        -------
+        : str
+
+        """
+        beats = sum(self.lags)
+        lines = ['LOOP LAG\tbeats {} interval {} threshold {}'.format(
+            beats, format_us(int(self.interval * 1e6)), format_us(int(self.threshold * 1e6))
+        )]
+        if beats:
+            lines.append('LAG\tp50 <{} p90 <{} p99 <{} max {}'.format(
+                format_us(self.percentile(0.5)),
+                format_us(self.percentile(0.9)),
+                format_us(self.percentile(0.99)),
+                format_us(int(self.max_lag * 1e6))
+            ))
+            for index, count in enumerate(self.lags):
+                if count:
+                    lines.append('\t<{:>8}\t{}'.format(format_us(1 << index), count))
+        stalls = self.stalls
+        pending = self._pending
+        if pending is not None:
+            lines.append('BLOCKED NOW')
+            lines.append(pending.format())
+        for stall in stalls:
+            lines.append(stall.format())
+        return '\n'.join(lines)
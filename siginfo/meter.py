@@ -0,0 +1,265 @@
+import math
+import time
+
+from siginfo.monitor import monitor, resolve_target
+from siginfo.stats import format_us
+
+
+# Power of two buckets for the time between two events, in microseconds
+HISTOGRAM_BUCKETS = 32
+
+# Half-lifes (in seconds) of the short and long term rate averages
+SHORT_HALF_LIFE = 10.0
+LONG_HALF_LIFE = 60.0
+
+# Relative difference between short and long term rate to report a trend
+TREND_THRESHOLD = 0.1
+
+_calibrated_cost = None
+
+
+class Meter:
+    """
+    Counts the executions of a line or the calls of a function
+
+    The hot path only increments a counter and a preallocated histogram
+    bucket of the interval since the previous event. Rates are computed
+    when the meter is read, so the cost per event is constant and
+    independent of how often the meter is reported.
+
+    Args
+    ----
+    code : code
+        Monitored code object
+    line : int
+        Monitored line number or ``None`` for function entry
+    name : str
+        Label used in reports
+        Default: ``function:line``
+
+    Attributes
+    ----------
+    count : int
+        Total number of events
+    histogram : list
+        Number of events per interval bucket. Bucket ``n`` contains
+        intervals shorter than ``2**n`` microseconds.
+
+    """
+    def __init__(self, code, line=None, name=None):
+        self.code = code
+        self.line = line
+        self.name = name or '{}:{}'.format(code.co_name, 'entry' if line is None else line)
+        self.count = 0
+        self.histogram = [0] * HISTOGRAM_BUCKETS
+        self.hook = None
+        self._last_event = None
+        self._started = None
+        self._sampled_at = None
+        self._sampled_count = 0
+        self._short_rate = None
+        self._long_rate = None
+
+    # callback for the code monitor
+    def __call__(self, frame):
+        now = time.perf_counter_ns()
+        if self._last_event is not None:
+            bucket = ((now - self._last_event) // 1000).bit_length()
+            self.histogram[min(bucket, HISTOGRAM_BUCKETS - 1)] += 1
+        self._last_event = now
+        self.count += 1
+
+    def install(self):
+        """
+        Enables the instrumentation of the monitored code object
+
+        Returns
+        -------
+        None
+
+        """
+        if self.hook is None:
+            self._started = time.monotonic()
+            self._sampled_at = self._started
+            self._sampled_count = self.count
+            self.hook = monitor.add(self.code, self.line, self)
+
+    def remove(self):
+        """
+        Removes the instrumentation. The collected data stays available.
+
+        Returns
+        -------
+        None
+
+        """
+        if self.hook is not None:
+            monitor.remove(self.hook)
+            self.hook = None
+
+    def sample(self):
+        """
+        Calculates the rate since the previous sample and updates
+        the decaying short and long term averages
+
+        Returns
+        -------
+        : dict
+            ``count``, ``delta``, ``elapsed`` (seconds since previous sample),
+            ``rate``, ``short_rate``, ``long_rate`` (events per second)
+            and ``trend``
+
+        """
+        now = time.monotonic()
+        count = self.count
+        started = self._sampled_at if self._sampled_at is not None else now
+        elapsed = now - started
+        delta = count - self._sampled_count
+        rate = delta / elapsed if elapsed > 0 else 0.0
+        if self._short_rate is None:
+            self._short_rate = self._long_rate = rate
+        else:
+            self._short_rate = self._decay(self._short_rate, rate, elapsed, SHORT_HALF_LIFE)
+            self._long_rate = self._decay(self._long_rate, rate, elapsed, LONG_HALF_LIFE)
+        self._sampled_at = now
+        self._sampled_count = count
+        return {
+            'count': count,
+            'delta': delta,
+            'elapsed': elapsed,
+            'rate': rate,
+            'short_rate': self._short_rate,
+            'long_rate': self._long_rate,
+            'trend': self.trend(),
+        }
+
+    @staticmethod
+    def _decay(average, rate, elapsed, half_life):
+        weight = math.pow(0.5, elapsed / half_life)
+        return weight * average + (1 - weight) * rate
+
+    def trend(self):
+        """
+        Compares the short and the long term rate
+
+        Returns
+        -------
+        : str
+            ``rising``, ``falling``, ``steady`` or ``stalled``
+
+        """
+        if not self._short_rate:
+            return 'stalled'
+        diff = (self._short_rate - self._long_rate) / max(self._long_rate, 1e-9)
+        if diff > TREND_THRESHOLD:
+            return 'rising'
+        if diff < -TREND_THRESHOLD:
+            return 'falling'
+        return 'steady'
+
+    def overhead(self):
+        """
+        Estimates the total time spent in the instrumentation
+
+        Uses the cost measured by :func:`calibrate`, the measurement
+        itself is never started here because it installs a meter.
+
+        Returns
+        -------
+        : float
+            Seconds of overhead added to the monitored code so far,
+            ``None`` if :func:`calibrate` did not run yet
+
+        """
+        if _calibrated_cost is None:
+            return None
+        return self.count * _calibrated_cost / 1e9
+
+    def report(self):
+        """
+        Samples the meter and formats the result for display
+
+        Returns
+        -------
+        : str
+
+        """
+        sample = self.sample()
+        overhead = self.overhead()
+        lines = [
+            'METER\t{}'.format(self.name),
+            'COUNT\t{} (+{} in {:.1f}s)'.format(
+                sample['count'], sample['delta'], sample['elapsed']
+            ),
+            'RATE\t{:.1f}/s\tSHORT {:.1f}/s\tLONG {:.1f}/s\tTREND {}'.format(
+                sample['rate'], sample['short_rate'], sample['long_rate'], sample['trend']
+            ),
+            'OVERHEAD\tnot calibrated' if overhead is None else
+            'OVERHEAD\t{:.1f}ms ({:.0f}ns/event)'.format(overhead * 1000, _calibrated_cost),
+        ]
+        buckets = [
+            '<{} {}'.format(format_us(1 << idx), count)
+            for idx, count in enumerate(self.histogram) if count
+        ]
+        if buckets:
+            lines.append('INTERVALS\t{}'.format('  '.join(buckets)))
+        return '\n'.join(lines)
+
+
+def _calibration_target():
+    pass
+
+
+def calibrate(events=20000):
+    """
+    Measures the cost of one metered event on this interpreter
+
+    A dummy function is called with and without a meter. The result
+    is cached after the first call. Installing the meter takes the lock
+    of the code monitor, so don't call this from a signal handler.
+
+    Args
+    ----
+    events : int
+        Number of calls used for the measurement
+
+    Returns
+    -------
+    : float
+        Nanoseconds per event
+
+    """
+    global _calibrated_cost
+    if _calibrated_cost is None:
+        target = _calibration_target
+        start = time.perf_counter_ns()
+        for _ in range(events):
+            target()
+        baseline = time.perf_counter_ns() - start
+
+        meter = Meter(target.__code__)
+        meter.install()
+        try:
+            start = time.perf_counter_ns()
+            for _ in range(events):
+                target()
+            metered = time.perf_counter_ns() - start
+        finally:
+            meter.remove()
+        _calibrated_cost = max(metered - baseline, 0) / events
+    return _calibrated_cost
+
+
+def make_meter(target, line=None, name=None):
+    """
+    Creates a :class:`Meter` for a function or ``file:line`` target
+
+    See :func:`siginfo.monitor.resolve_target` for valid targets
+
+    Returns
+    -------
+    : :class:`Meter`
+
+    """
+    code, line = resolve_target(target, line)
+    return Meter(code, line, name)
@@ -0,0 +1,408 @@
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from siginfo.accessor import Accessor
+from siginfo.stats import PAUSE_BUCKETS
+
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+# Default port, next to the ports of the Prometheus exporters
+PORT = 9464
+
+# Counters of :class:`siginfo.stats.HandlerStats`: (attribute, metric name, scale, help)
+STATS_COUNTERS = (
+    ('signals', 'signals', 1, 'Received signals'),
+    ('dumps', 'dumps', 1, 'Completed dumps'),
+    ('coalesced', 'dumps_coalesced', 1, 'Signals merged into a running dump'),
+    ('dropped', 'dumps_dropped', 1, 'Dumps aborted by an exception'),
+    ('bytes', 'written_bytes', 1, 'Characters written to the output'),
+    ('capture_ns', 'capture_seconds', 1e-9, 'Time spent capturing frames'),
+    ('render_ns', 'render_seconds', 1e-9, 'Time spent formatting dumps'),
+    ('write_ns', 'write_seconds', 1e-9, 'Time spent writing dumps'),
+)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{{{}}}'.format(','.join(
+        '{}="{}"'.format(key, _escape(value)) for key, value in labels
+    ))
+
+
+def _number(value):
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return value
+    return None
+
+
+class MetricsExporter:
+    """
+    Exports siginfo values in the OpenMetrics text format
+
+    Registered expressions and progress trackers are read through
+    their precompiled :class:`siginfo.accessor.Accessor` from the
+    current frame of one thread. A scrape only looks at the frames
+    the expressions refer to, its cost does not depend on the depth
+    of the stack. The statistics of siginfo instances
+    (see :meth:`siginfo.siginfoclass.SiginfoBasic.stats`) are exported
+    as counters and a pause time histogram.
+
+    The metrics are served over HTTP from a background thread
+    (:meth:`serve`) or written periodically to a file for the
+    textfile collector of the node exporter (:meth:`write_textfile`).
+
+    Args
+    ----
+    thread_id : int
+        Thread whose current frame is read
+        Default: None (the calling thread)
+    prefix : str
+        Prefix of all metric names
+        Default: 'siginfo'
+
+    Example
+    -------
+        ::
+
+            foo = SigInfoSingle(usr1=True)
+            foo.set_vars('i', 'len(self.queue)')
+            foo.track('rows', total=10000)
+
+            exporter = MetricsExporter()
+            exporter.add_siginfo(foo)
+            exporter.serve(9464)
+
+        .. code-block:: bash
+
+            curl localhost:9464/metrics
+
+            # TYPE siginfo_value gauge
+            siginfo_value{expression="i"} 42
+            siginfo_value{expression="len(self.queue)"} 3
+            # TYPE siginfo_progress gauge
+            siginfo_progress{variable="rows"} 1200
+            ...
+            # EOF
+
+    """
+    def __init__(self, thread_id=None, prefix='siginfo'):
+        self.thread_id = threading.get_ident() if thread_id is None else thread_id
+        self.prefix = prefix
+        self.accessors = []
+        self.trackers = []
+        self.handlers = []
+        self._server = None
+        self._writer = None
+
+    def add_expression(self, expression):
+        """
+        Exports the value of an expression as ``<prefix>_value`` gauge
+
+        Args
+        ----
+        expression : str or :class:`siginfo.accessor.Accessor`
+
+        Returns
+        -------
+        : :class:`siginfo.accessor.Accessor`
+
+        Raises
+        ------
+        ValueError
+            If the expression uses unsupported syntax
+
+        """
+        if not isinstance(expression, Accessor):
+            expression = Accessor(expression)
+        self.accessors.append(expression)
+        return expression
+
+    def add_tracker(self, tracker):
+        """
+        Exports the current value, rate and total of a
+        :class:`siginfo.progress.ProgressTracker`
+
+        Returns
+        -------
+        None
+
+        """
+        self.trackers.append(tracker)
+
+    def add_stats(self, siginfo, name=None):
+        """
+        Exports the statistics of a siginfo instance
+
+        Args
+        ----
+        siginfo : :class:`siginfo.siginfoclass.SiginfoBasic`
+        name : str
+            Value of the ``handler`` label
+            Default: None (the class name)
+
+        Returns
+        -------
+        None
+
+        """
+        self.handlers.append((name or type(siginfo).__name__, siginfo))
+
+    def add_siginfo(self, siginfo, name=None):
+        """
+        Exports the statistics and, for :class:`siginfo.siginfoclass.SigInfoSingle`,
+        all variables and trackers of a siginfo instance
+
+        Returns
+        -------
+        None
+
+        """
+        self.add_stats(siginfo, name)
+        for accessor in getattr(siginfo, 'accessors', ()):
+            self.add_expression(accessor)
+        for tracker in getattr(siginfo, 'trackers', ()):
+            self.add_tracker(tracker)
+
+    def _family(self, lines, name, kind, help_text, openmetrics):
+        full = '{}_{}'.format(self.prefix, name)
+        if kind == 'counter' and not openmetrics:
+            # the Prometheus text format names counters with their suffix
+            lines.append('# TYPE {}_total counter'.format(full))
+            lines.append('# HELP {}_total {}'.format(full, help_text))
+        else:
+            lines.append('# TYPE {} {}'.format(full, kind))
+            lines.append('# HELP {} {}'.format(full, help_text))
+        return full
+
+    def _gauge(self, lines, name, help_text, label, samples, openmetrics):
+        name = self._family(lines, name, 'gauge', help_text, openmetrics)
+        for label_value, value in samples:
+            if value is not None:
+                lines.append('{}{} {}'.format(name, _labels([(label, label_value)]), value))
+
+    def _read(self):
+        """
+        ``([(expression, value), ...], [(tracker, value), ...])`` read
+        from the current frame of the thread
+        """
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return [], []
+        values = [
+            (accessor.expression, _number(accessor.get(frame))) for accessor in self.accessors
+        ]
+        progress = [
+            (tracker, _number(tracker.accessor.get(frame, tracker.default)))
+            for tracker in self.trackers
+        ]
+        del frame
+        return values, progress
+
+    def _values(self, lines, openmetrics):
+        if not self.accessors and not self.trackers:
+            return
+        values, progress = self._read()
+        if self.accessors:
+            self._gauge(
+                lines, 'value', 'Value of an expression', 'expression', values, openmetrics
+            )
+        if self.trackers:
+            self._gauge(
+                lines, 'progress', 'Value of a tracked variable', 'variable',
+                [(tracker.varname, value) for tracker, value in progress], openmetrics
+            )
+            self._gauge(
+                lines, 'progress_rate', 'Change of a tracked variable per second', 'variable',
+                [(tracker.varname, tracker.rate()) for tracker, _ in progress], openmetrics
+            )
+            self._gauge(
+                lines, 'progress_target', 'Total of a tracked variable', 'variable',
+                [(tracker.varname, _number(tracker.total)) for tracker, _ in progress],
+                openmetrics
+            )
+
+    def _stats(self, lines, openmetrics):
+        if not self.handlers:
+            return
+        stats = [(handler, siginfo.stats()) for handler, siginfo in self.handlers]
+        for key, metric, scale, help_text in STATS_COUNTERS:
+            name = self._family(lines, metric, 'counter', help_text, openmetrics)
+            for handler, values in stats:
+                lines.append('{}_total{} {}'.format(
+                    name, _labels([('handler', handler)]), values[key] * scale
+                ))
+        name = self._family(
+            lines, 'pause_seconds', 'histogram', 'Time spent in the signal handler', openmetrics
+        )
+        for handler, values in stats:
+            pauses = values['pauses']
+            count = 0
+            labels = _labels([('handler', handler)])
+            for index in range(PAUSE_BUCKETS - 1):
+                count += pauses.get(1 << index, 0)
+                bound = '{:g}'.format((1 << index) * 1e-6)
+                lines.append('{}_bucket{} {}'.format(
+                    name, _labels([('handler', handler), ('le', bound)]), count
+                ))
+            total = sum(pauses.values())
+            lines.append('{}_bucket{} {}'.format(
+                name, _labels([('handler', handler), ('le', '+Inf')]), total
+            ))
+            lines.append('{}_count{} {}'.format(name, labels, total))
+            lines.append('{}_sum{} {}'.format(name, labels, values['pause_ns'] * 1e-9))
+
+    def render(self, openmetrics=True):
+        """
+        All metrics as text
+
+        Args
+        ----
+        openmetrics : bool
+            OpenMetrics format, otherwise the Prometheus text
+            format of the node exporter's textfile collector
+            Default: True
+
+        Returns
+        -------
+        : str
+
+        """
+        lines = []
+        self._values(lines, openmetrics)
+        self._stats(lines, openmetrics)
+        if openmetrics:
+            lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port=PORT, host='127.0.0.1'):
+        """
+        Serves the metrics over HTTP from a background thread
+
+        Every path returns the metrics, usually ``/metrics`` is scraped.
+
+        Args
+        ----
+        port : int
+            Default: 9464 (0 picks a free port)
+        host : str
+            Default: '127.0.0.1' (only local connections)
+
+        Returns
+        -------
+        : tuple
+            ``(host, port)`` the server listens on
+
+        """
+        self.stop_serving()
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = exporter.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = HTTPServer((host, port), Handler)
+        thread = threading.Thread(target=server.serve_forever, name='siginfo-metrics', daemon=True)
+        thread.start()
+        self._server = (server, thread)
+        return server.server_address[:2]
+
+    def stop_serving(self):
+        """
+        Stops the HTTP server
+
+        Returns
+        -------
+        None
+
+        """
+        if self._server is not None:
+            server, thread = self._server
+            server.shutdown()
+            server.server_close()
+            thread.join()
+            self._server = None
+
+    def write(self, path):
+        """
+        Writes the metrics atomically to ``path`` in the Prometheus text format
+
+        The text is written to a temporary file in the same directory
+        that replaces ``path``, so readers never see a partial file.
+
+        Args
+        ----
+        path : str
+            e.g. ``/var/lib/node_exporter/textfile/myjob.prom``
+
+        Returns
+        -------
+        None
+
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(prefix='.siginfo-', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as fh:
+                fh.write(self.render(openmetrics=False))
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    def write_textfile(self, path, interval=15.0):
+        """
+        Writes the metrics to ``path`` every ``interval`` seconds
+        from a background thread, see :meth:`write`
+
+        Returns
+        -------
+        None
+
+        """
+        self.stop_writing()
+        stop = threading.Event()
+
+        def run():
+            while True:
+                self.write(path)
+                if stop.wait(interval):
+                    break
+
+        thread = threading.Thread(target=run, name='siginfo-textfile', daemon=True)
+        thread.start()
+        self._writer = (thread, stop)
+
+    def stop_writing(self):
+        """
+        Stops the periodic textfile writer
+
+        Returns
+        -------
+        None
+
+        """
+        if self._writer is not None:
+            thread, stop = self._writer
+            stop.set()
+            thread.join()
+            self._writer = None
@@ -0,0 +1,281 @@
+import gc
+import os
+import sys
+import threading
+import types
+
+
+# Tool ids that are not reserved by the interpreter for debuggers,
+# coverage tools, profilers or optimizers are tried first
+_PREFERRED_TOOL_IDS = (3, 4, 2, 1, 0, 5)
+_TOOL_NAME = 'siginfo'
+
+
+def has_monitoring() -> bool:
+    """
+    Checks if the running interpreter supports ``sys.monitoring``
+    (Python 3.12+)
+
+    Returns
+    -------
+    : bool
+
+    """
+    return hasattr(sys, 'monitoring')
+
+
+def resolve_target(target, line=None):
+    """
+    Finds the code object and line number for a monitoring target
+
+    Args
+    ----
+    target : function, method, code object or str
+        The function whose code should be monitored. Can also be given
+        as ``"path/to/file.py:123"``. In that case the function containing
+        that line is searched among all currently loaded functions.
+    line : int
+        Line number inside ``target``. Ignored if the line is already
+        part of a ``file:line`` string.
+        Default: None (function entry)
+
+    Returns
+    -------
+    : tuple
+        ``(code, line)``
+
+    Raises
+    ------
+    ValueError
+        If the target or the line can't be found
+
+    """
+    if isinstance(target, str):
+        filename, _, lineno = target.rpartition(':')
+        if not filename or not lineno.isdigit():
+            raise ValueError('Target must be given as "file:line": {}'.format(target))
+        line = int(lineno)
+        code = _find_code(filename, line)
+        if code is None:
+            raise ValueError('No loaded function contains {}'.format(target))
+        return code, line
+
+    code = getattr(target, '__func__', target)
+    code = getattr(code, '__code__', code)
+    if not isinstance(code, types.CodeType):
+        raise ValueError('Can not monitor {!r}'.format(target))
+    if line is not None and line not in _code_lines(code):
+        raise ValueError('Line {} is not part of {}'.format(line, code.co_name))
+    return code, line
+
+
+def _code_lines(code):
+    return {line for _, _, line in code.co_lines() if line is not None}
+
+
+def _nested_codes(code):
+    yield code
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            yield from _nested_codes(const)
+
+
+def _find_code(filename, line):
+    """
+    Searches all live functions (and their nested code objects)
+    for the one code object that executes ``filename:line``
+    """
+    filename = os.path.abspath(filename)
+    seen = set()
+    for obj in gc.get_objects():
+        if not isinstance(obj, types.FunctionType):
+            continue
+        code = obj.__code__
+        if id(code) in seen or os.path.abspath(code.co_filename) != filename:
+            continue
+        seen.add(id(code))
+        for nested in _nested_codes(code):
+            if line in _code_lines(nested):
+                return nested
+    return None
+
+
+class Hook:
+    """
+    A single callback registered on a code object
+
+    Instances are returned by :meth:`CodeMonitor.add` and are used
+    to remove the instrumentation again.
+
+    Attributes
+    ----------
+    code : code
+        The monitored code object
+    line : int
+        Monitored line number or ``None`` for function entry
+    callback : callable
+        Called with the executing frame
+
+    """
+    __slots__ = ('code', 'line', 'callback')
+
+    def __init__(self, code, line, callback):
+        self.code = code
+        self.line = line
+        self.callback = callback
+
+
+class CodeMonitor:
+    """
+    Multiplexes ``sys.monitoring`` events for all siginfo components
+
+    ``sys.monitoring`` allows only one callback per event and tool,
+    so all hooks share one tool id. Events are only enabled locally on
+    the monitored code objects, all other code runs without any
+    instrumentation. Lines inside a monitored code object that have no
+    hook are disabled on their first execution.
+
+    Hooks are added and removed under a lock, the event callbacks read
+    the hooks without it. Don't add or remove hooks in a signal handler.
+
+    Use the module level :data:`monitor` instance instead of creating
+    new instances.
+
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tool_id = None
+        self._line_hooks = {}   # {code: {line: (Hook, ...)}}
+        self._start_hooks = {}  # {code: (Hook, ...)}
+
+    def add(self, code, line, callback):
+        """
+        Registers ``callback`` on function entry or on one line
+
+        Args
+        ----
+        code : code
+            Code object to monitor
+        line : int
+            Line number or ``None`` for function entry (PY_START)
+        callback : callable
+            Called with the executing frame as only argument
+
+        Returns
+        -------
+        : :class:`Hook`
+
+        Raises
+        ------
+        RuntimeError
+            If ``sys.monitoring`` is not available (Python < 3.12)
+
+        """
+        if not has_monitoring():
+            raise RuntimeError('sys.monitoring requires Python 3.12 or newer')
+        hook = Hook(code, line, callback)
+        with self._lock:
+            self._acquire_tool()
+            if line is None:
+                self._start_hooks[code] = self._start_hooks.get(code, ()) + (hook,)
+            else:
+                lines = self._line_hooks.setdefault(code, {})
+                lines[line] = lines.get(line, ()) + (hook,)
+            if line is not None:
+                # lines of this code object might have been disabled already,
+                # resetting its local events enables them again for this tool only
+                sys.monitoring.set_local_events(self._tool_id, code, 0)
+            self._update_events(code)
+        return hook
+
+    def remove(self, hook):
+        """
+        Removes a hook and disables the events if no other hook
+        uses the code object anymore
+
+        Args
+        ----
+        hook : :class:`Hook`
+
+        Returns
+        -------
+        None
+
+        """
+        with self._lock:
+            code = hook.code
+            if hook.line is None:
+                hooks = tuple(h for h in self._start_hooks.get(code, ()) if h is not hook)
+                self._set_or_pop(self._start_hooks, code, hooks)
+            else:
+                lines = self._line_hooks.get(code, {})
+                hooks = tuple(h for h in lines.get(hook.line, ()) if h is not hook)
+                self._set_or_pop(lines, hook.line, hooks)
+                self._set_or_pop(self._line_hooks, code, lines)
+            if self._tool_id is not None:
+                self._update_events(code)
+                if not self._line_hooks and not self._start_hooks:
+                    self._release_tool()
+
+    def __len__(self):
+        return sum(len(h) for h in self._start_hooks.values()) + sum(
+            len(h) for lines in self._line_hooks.values() for h in lines.values()
+        )
+
+    @staticmethod
+    def _set_or_pop(mapping, key, value):
+        if value:
+            mapping[key] = value
+        else:
+            mapping.pop(key, None)
+
+    def _acquire_tool(self):
+        if self._tool_id is not None:
+            return
+        mon = sys.monitoring
+        for tool_id in _PREFERRED_TOOL_IDS:
+            if mon.get_tool(tool_id) is None:
+                mon.use_tool_id(tool_id, _TOOL_NAME)
+                break
+        else:
+            raise RuntimeError('All sys.monitoring tool ids are in use')
+        mon.register_callback(tool_id, mon.events.LINE, self._on_line)
+        mon.register_callback(tool_id, mon.events.PY_START, self._on_start)
+        self._tool_id = tool_id
+
+    def _release_tool(self):
+        mon = sys.monitoring
+        mon.register_callback(self._tool_id, mon.events.LINE, None)
+        mon.register_callback(self._tool_id, mon.events.PY_START, None)
+        mon.free_tool_id(self._tool_id)
+        self._tool_id = None
+
+    def _update_events(self, code):
+        events = sys.monitoring.events
+        mask = 0
+        if code in self._line_hooks:
+            mask |= events.LINE
+        if code in self._start_hooks:
+            mask |= events.PY_START
+        sys.monitoring.set_local_events(self._tool_id, code, mask)
+
+    # callback for sys.monitoring LINE events
+    def _on_line(self, code, line):
+        hooks = self._line_hooks.get(code, {}).get(line)
+        if not hooks:
+            return sys.monitoring.DISABLE
+        frame = sys._getframe(1)
+        for hook in hooks:
+            hook.callback(frame)
+
+    # callback for sys.monitoring PY_START events
+    def _on_start(self, code, offset):
+        hooks = self._start_hooks.get(code)
+        if not hooks:
+            return sys.monitoring.DISABLE
+        frame = sys._getframe(1)
+        for hook in hooks:
+            hook.callback(frame)
+
+
+monitor = CodeMonitor()
@@ -0,0 +1,165 @@
+import collections
+import datetime
+import numbers
+import time
+
+from siginfo.accessor import Accessor
+from siginfo.utils import sparkline
+
+
+# Attempts to copy the samples while another thread appends to them
+COPY_RETRIES = 3
+
+
+def _is_number(value):
+    return isinstance(value, numbers.Real) and not isinstance(value, bool)
+
+
+class ProgressTracker:
+    """
+    Records the value of one variable over time
+
+    Every call to :meth:`sample` stores a ``(monotonic time, value)``
+    pair in a bounded ring. The report shows the change since the
+    previous report, the rate over the recorded window, the ETA
+    if a ``total`` is known and a sparkline of the recent values.
+
+    Args
+    ----
+    varname : str
+        Name of the local variable or an expression supported
+        by :class:`siginfo.accessor.Accessor`
+    total : int or float
+        Value at which the task is finished. Enables the ETA.
+        Default: None
+    default
+        Value to use if the variable does not exist in the frame
+        Default: None
+    history : int
+        Number of samples to keep
+        Default: 60
+
+    """
+    def __init__(self, varname, total=None, default=None, history=60):
+        self.varname = varname
+        self.accessor = Accessor(varname)
+        self.total = total
+        self.default = default
+        self.samples = collections.deque(maxlen=history)
+        self._last_query = None
+
+    def sample(self, frame):
+        """
+        Stores the current value of the variable
+
+        Args
+        ----
+        frame : frame
+            Stack frame to read the variable from
+
+        Returns
+        -------
+        : tuple
+            ``(time, value)``
+
+        """
+        entry = (time.monotonic(), self.accessor.get(frame, self.default))
+        self.samples.append(entry)
+        return entry
+
+    def _entries(self):
+        """
+        Copy of the samples that can be read while another thread samples
+
+        Iterating the ring while it is appended to raises
+        ``RuntimeError``, e.g. when a metrics exporter thread reads
+        the rate. The copy is made in one step and retried if the ring
+        changed during it.
+
+        Returns
+        -------
+        : list
+            ``(time, value)`` pairs, oldest first
+
+        """
+        for _ in range(COPY_RETRIES):
+            try:
+                return list(self.samples)
+            except RuntimeError:
+                # deque mutated during iteration
+                pass
+        return []
+
+    def _numeric(self):
+        return [entry for entry in self._entries() if _is_number(entry[1])]
+
+    def rate(self):
+        """
+        Change per second over all numeric samples in the ring
+
+        Returns
+        -------
+        : float
+            ``None`` if there are less than two numeric samples
+
+        """
+        numeric = self._numeric()
+        if len(numeric) < 2:
+            return None
+        (start, first), (end, last) = numeric[0], numeric[-1]
+        if end <= start:
+            return None
+        return (last - first) / (end - start)
+
+    def eta(self):
+        """
+        Estimated number of seconds until ``total`` is reached
+
+        Returns
+        -------
+        : float
+            ``None`` if no total is set, the latest sample is not a number
+            or the value does not progress
+
+        """
+        rate = self.rate()
+        entries = self._entries()
+        if self.total is None or not rate or not entries or not _is_number(entries[-1][1]):
+            return None
+        remaining = (self.total - entries[-1][1]) / rate
+        return remaining if remaining >= 0 else None
+
+    def report(self):
+        """
+        Formats the latest sample for display and remembers it as
+        the reference for the next report
+
+        Returns
+        -------
+        : str
+
+        """
+        entries = self._entries()
+        if not entries:
+            return '{}\tno samples'.format(self.varname)
+        now, value = entries[-1]
+        parts = [self.varname, str(value)]
+        numeric = _is_number(value)
+        if numeric and self._last_query is not None:
+            then, previous = self._last_query
+            if isinstance(previous, numbers.Real):
+                parts.append('{:+} in {:.1f}s'.format(value - previous, now - then))
+        rate = self.rate()
+        if rate is not None:
+            parts.append('{:.2f}/s'.format(rate))
+        if numeric and self.total:
+            parts.append('{:.1f}%'.format(100.0 * value / self.total))
+            eta = self.eta()
+            parts.append('ETA {}'.format(
+                datetime.timedelta(seconds=int(eta)) if eta is not None else '-'
+            ))
+        history = [val for _, val in self._numeric()]
+        if len(history) > 1:
+            parts.append(sparkline(history))
+        self._last_query = (now, value)
+        return '\t'.join(parts)
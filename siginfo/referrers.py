@@ -0,0 +1,394 @@
+import collections
+import gc
+import heapq
+import os
+import sys
+import threading
+import time
+import types
+
+from siginfo.capture import readable_frames
+from siginfo.concurrency import thread_name
+
+
+# Directory of the siginfo package, frames of these files are ignored
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Elements per container that are sampled to estimate its size
+SIZE_SAMPLE = 100
+
+# Limits of a referrer search
+MAX_DEPTH = 8
+MAX_NODES = 500
+TIMEOUT = 2.0
+MAX_CHAINS = 3
+
+# Maximum length of dictionary keys in chains
+MAX_KEY_LENGTH = 40
+
+
+def _shallow_size(obj):
+    try:
+        return sys.getsizeof(obj)
+    except TypeError:
+        return 0
+
+
+def estimate_size(obj, sample=SIZE_SAMPLE):
+    """
+    Estimated size of an object and its direct elements in bytes
+
+    Lists, tuples, sets, deques and dictionaries add the size of their
+    elements, extrapolated from the first ``sample`` elements. Objects
+    like numpy arrays that implement ``__sizeof__`` are exact.
+
+    Args
+    ----
+    obj
+    sample : int
+        Number of elements that are measured
+
+    Returns
+    -------
+    : int
+
+    """
+    size = _shallow_size(obj)
+    if isinstance(obj, dict):
+        items = list(obj.items())[:sample]
+        if items:
+            measured = sum(_shallow_size(key) + _shallow_size(value) for key, value in items)
+            size += measured * len(obj) // len(items)
+    elif isinstance(obj, (list, tuple, set, frozenset, collections.deque)):
+        items = [item for _, item in zip(range(sample), obj)]
+        if items:
+            size += sum(_shallow_size(item) for item in items) * len(obj) // len(items)
+    return size
+
+
+def is_own_frame(frame):
+    """
+    ``True`` for frames of siginfo itself
+    """
+    return frame.f_code.co_filename.startswith(PACKAGE_DIR)
+
+
+class LargeObject:
+    """
+    A candidate for a referrer search
+
+    Attributes
+    ----------
+    obj
+        The object
+    size : int
+        See :func:`estimate_size`
+    description : str
+        Where it was found, e.g. ``"local 'rows' in load"``
+    frame : frame
+        Frame the object was found in, ``None`` for a gc scan
+
+    """
+    __slots__ = ('obj', 'size', 'description', 'frame')
+
+    def __init__(self, obj, size, description, frame=None):
+        self.obj = obj
+        self.size = size
+        self.description = description
+        self.frame = frame
+
+
+def largest_objects(frames=(), n=3, scan_gc=False):
+    """
+    The ``n`` largest objects in the locals of frames and
+    optionally of all objects tracked by the garbage collector
+
+    Args
+    ----
+    frames : list
+        Frames whose locals are searched, module level frames are skipped
+    n : int
+        Number of objects
+    scan_gc : bool
+        Also search ``gc.get_objects()``, sized by ``sys.getsizeof``
+        (can take a while for large heaps)
+
+    Returns
+    -------
+    : list
+        :class:`LargeObject` sorted by size, largest first
+
+    """
+    found = {}
+    for frame in frames:
+        if frame.f_code.co_name == '<module>' or is_own_frame(frame):
+            continue
+        for name, value in frame.f_locals.items():
+            if isinstance(value, (types.ModuleType, type, types.FunctionType)):
+                continue
+            if id(value) not in found:
+                found[id(value)] = LargeObject(
+                    value, estimate_size(value),
+                    "local '{}' in {}".format(name, frame.f_code.co_name), frame
+                )
+    if scan_gc:
+        for obj in heapq.nlargest(n, gc.get_objects(), key=_shallow_size):
+            if id(obj) not in found:
+                found[id(obj)] = LargeObject(
+                    obj, estimate_size(obj), 'gc object {}'.format(type(obj).__name__)
+                )
+    return heapq.nlargest(n, found.values(), key=lambda large: large.size)
+
+
+def _key_text(key):
+    text = repr(key)
+    if len(text) > MAX_KEY_LENGTH:
+        text = text[:MAX_KEY_LENGTH - 3] + '...'
+    return '[{}]'.format(text)
+
+
+def _key_of(container, child):
+    for key, value in container.items():
+        if value is child:
+            return key
+    return None
+
+
+def _edge(container, child):
+    """
+    How ``container`` refers to ``child``, e.g. ``"['key']"``, ``'[3]'`` or ``'.attr'``
+    """
+    if isinstance(container, dict):
+        return _dict_edge(container, child)
+    if isinstance(container, (list, tuple, collections.deque)):
+        return _sequence_edge(container, child)
+    return _attribute_edge(container, child)
+
+
+def _dict_edge(container, child):
+    key = _key_of(container, child)
+    if key is not None:
+        return _key_text(key)
+    try:
+        if child in container:
+            return '.keys()'
+    except TypeError:
+        # unhashable
+        pass
+    return ''
+
+
+def _sequence_edge(container, child):
+    for index, value in enumerate(container):
+        if value is child:
+            return '[{}]'.format(index)
+    return ''
+
+
+def _attribute_edge(container, child):
+    instance_dict = getattr(container, '__dict__', None)
+    if instance_dict is child:
+        return '.__dict__'
+    if isinstance(instance_dict, dict):
+        # attributes stored without a separate dict object
+        key = _key_of(instance_dict, child)
+        if key is not None:
+            return '.{}'.format(key)
+    for name in getattr(type(container), '__slots__', ()):
+        if getattr(container, name, None) is child:
+            return '.{}'.format(name)
+    return ''
+
+
+class _Roots:
+    """
+    Module globals, thread attributes and frame locals that
+    end a referrer chain
+    """
+    def __init__(self, ignore_frames):
+        self.modules = {}
+        for name, module in list(sys.modules.items()):
+            module_dict = getattr(module, '__dict__', None)
+            if module_dict is not None:
+                self.modules[id(module_dict)] = name
+        # attributes are referenced by the thread's __dict__ or, with
+        # inline values (Python 3.13+), by the thread object itself
+        self.threads = {}
+        for thread in threading.enumerate():
+            self.threads[id(thread)] = thread.name
+            self.threads[id(thread.__dict__)] = thread.name
+        ignored = {id(frame) for frame in ignore_frames}
+        self.locals = collections.defaultdict(list)
+        # dicts returned by ``frame.f_locals`` before Python 3.13,
+        # they are kept by the frame and would show up as referrers
+        self.frame_dicts = set()
+        for ident, frame in readable_frames().items():
+            while frame is not None:
+                local_vars = frame.f_locals
+                if isinstance(local_vars, dict) and id(local_vars) not in self.modules:
+                    self.frame_dicts.add(id(local_vars))
+                if (id(frame) not in ignored and not is_own_frame(frame)
+                        and frame.f_code.co_name != '<module>'):
+                    for name, value in local_vars.items():
+                        self.locals[id(value)].append("frame {} local '{}' ({})".format(
+                            frame.f_code.co_name, name, thread_name(ident)
+                        ))
+                frame = frame.f_back
+        self.ignored = ignored
+
+    def container(self, container, child):
+        """
+        Root text if ``container`` is a module or thread namespace
+        """
+        name = self.modules.get(id(container))
+        if name is not None:
+            return '{}.{}'.format(name, _key_of(container, child))
+        name = self.threads.get(id(container))
+        if name is not None:
+            if isinstance(container, dict):
+                return "thread '{}'.{}".format(name, _key_of(container, child))
+            return "thread '{}'{}".format(name, _edge(container, child))
+        return None
+
+
+def find_referrer_chains(obj, max_chains=MAX_CHAINS, max_depth=MAX_DEPTH,
+                         max_nodes=MAX_NODES, timeout=TIMEOUT, ignore=()):
+    """
+    Explains what keeps an object alive
+
+    Searches breadth first with ``gc.get_referrers`` from the object
+    towards module globals, thread attributes and local variables of
+    running frames. Frames and containers of siginfo itself are skipped.
+
+    Every ``gc.get_referrers`` call scans all objects tracked by the
+    garbage collector, so the search is limited by the number of
+    visited objects and the time.
+
+    Args
+    ----
+    obj
+        The object
+    max_chains : int
+        Stop after this many chains
+    max_depth : int
+        Maximum length of a chain
+    max_nodes : int
+        Maximum number of visited objects
+    timeout : float
+        Maximum search time in seconds
+    ignore : iterable
+        Objects that are not part of chains, e.g. the frame the
+        object was found in
+
+    Returns
+    -------
+    : tuple
+        ``(chains, complete)``: chains as text from the root to the
+        object, e.g. ``"held by module.cache['k'] → dict → list"``,
+        and ``False`` if a limit stopped the search
+
+    """
+    deadline = time.monotonic() + timeout
+    ignore = list(ignore)
+    roots = _Roots([item for item in ignore if isinstance(item, types.FrameType)])
+    search = _Search(obj, roots, ignore, max_nodes)
+    complete = True
+    while search.queue and len(search.chains) < max_chains:
+        if time.monotonic() > deadline:
+            complete = False
+            break
+        index = search.queue.popleft()
+        for root in roots.locals.get(id(search.nodes[index]), ()):
+            search.chains.append(search.chain(index, root))
+        if search.depths[index] >= max_depth:
+            complete = False
+            continue
+        if not search.visit(index):
+            complete = False
+    chains = search.chains
+    del search.nodes[:]
+    return chains[:max_chains], complete
+
+
+class _Search:
+    """
+    Breadth first search of :func:`find_referrer_chains`
+
+    The search state is kept in lists of plain values, only
+    ``nodes`` references the visited objects.
+    """
+    def __init__(self, obj, roots, ignore, max_nodes):
+        self.roots = roots
+        self.max_nodes = max_nodes
+        self.nodes = [obj]
+        self.parents = [-1]
+        self.depths = [0]
+        self.chains = []
+        self.seen = {id(obj)}
+        self.skip = {id(self.nodes), id(self.chains), id(ignore)}
+        self.skip.update(id(item) for item in ignore)
+        self.queue = collections.deque([0])
+
+    def chain(self, index, root):
+        """
+        Text of the chain from ``root`` to the searched object
+        """
+        nodes = self.nodes
+        text = root
+        attribute = False
+        while index > 0:
+            parent = self.parents[index]
+            edge = _edge(nodes[index], nodes[parent])
+            if attribute and edge.startswith("['"):
+                edge = '.' + edge[2:-2]
+            attribute = edge == '.__dict__'
+            if not attribute:
+                text += '{} → {}'.format(edge, type(nodes[parent]).__name__)
+            index = parent
+        return 'held by {}'.format(text)
+
+    def visit(self, index):
+        """
+        Adds the chains that end at the referrers of a node and queues
+        the other referrers, ``False`` if ``max_nodes`` was reached
+        """
+        node = self.nodes[index]
+        referrers = gc.get_referrers(node)
+        self.skip.add(id(referrers))
+        complete = True
+        for referrer in referrers:
+            if self._ends(index, node, referrer):
+                continue
+            if len(self.nodes) >= self.max_nodes:
+                complete = False
+                break
+            self.seen.add(id(referrer))
+            self.nodes.append(referrer)
+            self.parents.append(index)
+            self.depths.append(self.depths[index] + 1)
+            self.queue.append(len(self.nodes) - 1)
+        self.skip.discard(id(referrers))
+        del referrers, node
+        return complete
+
+    def _ends(self, index, node, referrer):
+        """
+        ``True`` if the referrer is skipped or ends a chain at a root
+        """
+        key = id(referrer)
+        if key in self.skip or key in self.seen or key in self.roots.frame_dicts:
+            return True
+        if isinstance(referrer, types.FrameType):
+            # locals of running frames are found via roots.locals,
+            # frames of finished generators or tracebacks remain
+            self.seen.add(key)
+            if not is_own_frame(referrer) and key not in self.roots.ignored:
+                self.chains.append(
+                    self.chain(index, 'frame {}'.format(referrer.f_code.co_name))
+                )
+            return True
+        root = self.roots.container(referrer, node)
+        if root is not None:
+            self.chains.append(self.chain(index, root))
+            return True
+        return type(referrer).__module__.startswith('siginfo')
@@ -0,0 +1,167 @@
+import glob
+import json
+import os
+import stat
+import tempfile
+
+
+# Environment variable with the directory of the registry files,
+# falls back to a private directory of the user in the temporary directory
+DIRECTORY_VARIABLE = 'SIGINFO_DIR'
+
+PREFIX = 'siginfo-'
+SUFFIX = '.json'
+
+
+def directory():
+    """
+    Directory of the registry, traceback and snapshot files:
+    ``$SIGINFO_DIR`` or ``siginfo-<uid>`` in the temporary directory,
+    created with mode 0700
+
+    Other users can't plant or replace files in the private directory.
+
+    Raises
+    ------
+    PermissionError
+        If ``siginfo-<uid>`` exists but is a symlink, no directory,
+        owned by another user or accessible by other users
+
+    """
+    path = os.environ.get(DIRECTORY_VARIABLE)
+    if path:
+        return path
+    uid = os.getuid()
+    path = os.path.join(tempfile.gettempdir(), '{}{}'.format(PREFIX, uid))
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != uid or info.st_mode & 0o077:
+        raise PermissionError('{} is not a private directory of this user'.format(path))
+    return path
+
+
+def registry_path(pid):
+    """
+    Path of the registry file of a process
+    """
+    return os.path.join(directory(), '{}{}{}'.format(PREFIX, pid, SUFFIX))
+
+
+def read_registry(pid):
+    """
+    Reads the registry file of a process
+
+    Args
+    ----
+    pid : int
+
+    Returns
+    -------
+    : dict
+        Empty if the process has no registry file or the file is a
+        symlink or owned by another user
+
+    """
+    try:
+        fd = os.open(registry_path(pid), os.O_RDONLY | getattr(os, 'O_NOFOLLOW', 0))
+    except OSError:
+        return {}
+    with os.fdopen(fd) as fh:
+        if os.fstat(fd).st_uid != os.getuid():
+            return {}
+        try:
+            return json.load(fh)
+        except ValueError:
+            return {}
+
+
+def update_registry(pid, **entries):
+    """
+    Adds entries to the registry file of a process
+
+    The file is replaced atomically, readers never see a partial
+    file. Entries with the value ``None`` are removed, the file
+    is deleted when no entries are left.
+
+    Args
+    ----
+    pid : int
+    entries
+        JSON serializable values, e.g. ``commands={'stack': 34}``
+
+    Returns
+    -------
+    : dict
+        The new content
+
+    """
+    data = read_registry(pid)
+    data.update(entries)
+    data = {key: value for key, value in data.items() if value is not None and key != 'pid'}
+    path = registry_path(pid)
+    if not data:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return data
+    data['pid'] = pid
+    fd, tmp = tempfile.mkstemp(prefix='.' + PREFIX, suffix='.tmp', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'w') as fh:
+            json.dump(data, fh, indent=2, sort_keys=True)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    return data
+
+
+def remove_at_exit(pid, key):
+    """
+    Removes an entry from the registry file, for ``atexit``
+
+    Does nothing in forked child processes.
+    """
+    if os.getpid() == pid:
+        update_registry(pid, **{key: None})
+
+
+def list_registries():
+    """
+    Registry files of all running processes
+
+    Files of processes that no longer exist are ignored.
+
+    Returns
+    -------
+    : list
+        Content of every file, sorted by pid
+
+    """
+    res = []
+    pattern = os.path.join(directory(), '{}*{}'.format(PREFIX, SUFFIX))
+    for path in glob.glob(pattern):
+        pid = os.path.basename(path)[len(PREFIX):-len(SUFFIX)]
+        if not pid.isdigit() or not is_running(int(pid)):
+            continue
+        data = read_registry(int(pid))
+        if data:
+            res.append(data)
+    return sorted(res, key=lambda data: data['pid'])
+
+
+def is_running(pid):
+    """
+    ``True`` if a process with this pid exists
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
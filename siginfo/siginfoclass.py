@@ -3,15 +3,38 @@ import signal
 import os
 import stat
 import atexit
+import gc
 import subprocess
+import threading
+import time
+from time import perf_counter_ns
 
+from siginfo.dispatcher import register, unregister
 from siginfo.localclass import LocalClass
+from siginfo.snapshot import capture_frame
+from siginfo.stack import find_runs, frame_key, stack_depth, walk_stack
+from siginfo.stats import HandlerStats, format_us
+from siginfo.summary import summarizers
+from siginfo.utils import format_bytes
+
+# The modules of optional features are imported by the constructor (or the
+# setup method) of the class that uses them and kept as attributes. This keeps
+# ``import siginfo`` fast and signal handlers never take the import lock.
+
+
+# Commands that can be bound to real-time signals, see SiginfoBasic.bind_commands
+COMMANDS = ('stack', 'threads', 'sample', 'memory', 'diff')
 
 
 class SiginfoBasic:
     """
     Base class for the SigInfo module
 
+    Signals are registered with a shared
+    :class:`siginfo.dispatcher.SignalDispatcher`: several instances can
+    listen for the same signal, the stack is captured only once per
+    signal and a handler that was installed before is still called.
+
     Args
     ----
     info : bool
@@ -37,6 +60,45 @@ class SiginfoBasic:
     MAX_LEVELS: int
         Number of parent stack frames to display
         Default: 0 (only current frame)
+    COLLAPSE_RECURSION: bool
+        Print only the first and last repetition of recursive calls (repeated
+        patterns of the same code and line) and the number of repetitions
+        Default: True
+    LOCALS_TOP_K: int
+        Print the LOCALS table only for the top K frames and the
+        first and last frame of each recursion
+        Default: None (for all frames)
+    MAX_LOCALS: int
+        Maximum number of variables per LOCALS table. User variables
+        are shown first, then private names, functions and modules.
+        Default: None (all variables in their original order)
+    MODULE_FRAMES: str
+        Locals of module level frames (the module's globals):
+        ``'skip'`` no LOCALS table, ``'names'`` names and types only,
+        ``'values'`` only variables that are not functions, classes or modules,
+        ``'all'`` everything
+        Default: 'all'
+    RESOURCES: bool
+        Start each dump with the memory, CPU, I/O, context switch and
+        file descriptor usage of the process and the changes since the
+        previous dump (Linux only)
+        Default: False
+    BOTTLENECKS: bool
+        Append a section with full or starved queues, saturated executors
+        and contended locks of all threads (if there are any). Reads the
+        locals of all threads, so it is opt-in.
+        Default: False
+    DIFF: bool
+        Print only what changed since the previous dump: new frames,
+        changed lines and variables with old and new values, numeric
+        deltas and rates. The first dump is printed in full.
+        Default: False
+    STATS_FOOTER: bool
+        End each dump with siginfo's own metrics: received signals,
+        dumps, bytes written, pause time percentiles and the time spent
+        capturing, rendering and writing the dump (see :meth:`stats`).
+        The running dump is already counted.
+        Default: False
 
     Returns
     -------
@@ -96,7 +158,7 @@ class SiginfoBasic:
             LOCALS
             VARIABLE | TYPE            | VALUE
             i        | int             | 1
-            fh       | TextIOWrapper   | <_io.TextIOWrapper name='many_rows.txt' mode='r' encoding='UTF-8'>
+            fh       | TextIOWrapper   | many_rows.txt mode='r' 12.5% (1.2 MB / 9.8 MB) 8.0 KB/s
             b        | int             | 15
             a        | int             | 12
             line     | str             | Row 1
@@ -112,7 +174,7 @@ class SiginfoBasic:
             LINE NUMBER:    22
             ------------------------------------------------------------------------------------------------------------------------
             LOCALS
-            VARIABLE                                               | TYPE                       | VALUE
+            VARIABLE                                       | TYPE                   | VALUE
             ------------------------------------------------------------------------------------------------------------------------
             SCOPE   <code object main2 at 0x108c309c0, file "long_script.py", line 21>
             CALLER  <code object main at 0x108c30ed0, file "long_script.py", line 18>
@@ -123,44 +185,69 @@ class SiginfoBasic:
 
     """
     def __init__(self, info=True, usr1=True, usr2=False, output=None):
+        from siginfo import capture, concurrency, diff, resources
+
         self.COLUMNS = 80
         self.MAX_LEVELS = 0  # How many parent stack frames to display
+        self.BOTTLENECKS = False  # Report full queues and contended locks
+        self.COLLAPSE_RECURSION = True  # Print only the first and last repetition
+        self.LOCALS_TOP_K = None  # Print LOCALS only for the top K frames
+        self.MAX_LOCALS = None  # Number of variables per LOCALS table
+        self.MODULE_FRAMES = 'all'  # Locals of module level frames
+        self.RESOURCES = False  # Print memory, CPU and I/O usage from /proc
+        self.DIFF = False  # Print only the changes since the previous dump
+        self.STATS_FOOTER = False  # Print siginfo's own metrics after each dump
         self.OUTPUT = output or sys.stdout  # where to print the output to
         self.pid = os.getpid()
         self.signals = []
+        self.commands = {}  # {signal number: command} of real-time signals
+        self._registered = set()  # signal numbers in the registry file
+        self._signums = []
+        self._stack = None  # frames shared by the dispatcher
+        self._stats = HandlerStats()
+        self._busy = False
+        self._previous_state = None  # compact state of the last dump for DIFF
+        self.fallback = None  # faulthandler based FallbackDump
+        self.summarize = summarizers  # formats values of local variables
+        self.resources = resources.ResourceReader()
+        self._capture = capture  # threads and sample commands
+        self._concurrency = concurrency  # BOTTLENECKS
+        self._diff = diff  # DIFF
+        self._registry = None  # by bind_commands and enable_fallback
+        self._tracemalloc = None  # by bind_commands for the memory command
 
         # Bind SIGINFO if available and requested
         if info:
             if hasattr(signal, 'SIGINFO'):
-                signal.signal(signal.SIGINFO, self)
-                self.OUTPUT.write('Listening for >>SIGINFO<<\n')
-                self.OUTPUT.write('==> kill -s INFO {}\n'.format(self.pid))
+                self._bind(signal.SIGINFO)
+                self._write('Listening for >>SIGINFO<<\n')
+                self._write('==> kill -s INFO {}\n'.format(self.pid))
                 self.signals.append('INFO')
             else:
-                self.OUTPUT.write('No SIGINFO availale\n')
+                self._write('No SIGINFO availale\n')
 
         # Bind SIGUSR1 if available and requested
         if usr1:
             if hasattr(signal, 'SIGUSR1'):
-                signal.signal(signal.SIGUSR1, self)
-                self.OUTPUT.write('Listening for >>SIGUSR1<<\n')
-                self.OUTPUT.write('==> kill -s USR1 {}\n'.format(self.pid))
+                self._bind(signal.SIGUSR1)
+                self._write('Listening for >>SIGUSR1<<\n')
+                self._write('==> kill -s USR1 {}\n'.format(self.pid))
                 self.signals.append('USR1')
             else:
-                self.OUTPUT.write('No SIGUSR1 availale\n')
+                self._write('No SIGUSR1 availale\n')
 
         # Bind SIGUSR2 if available and requested
         if usr2:
             if hasattr(signal, 'SIGUSR2'):
-                signal.signal(signal.SIGUSR2, self)
-                self.OUTPUT.write('Listening for >>SIGUSR2<<\n')
-                self.OUTPUT.write('==> kill -s USR2 {}\n'.format(self.pid))
+                self._bind(signal.SIGUSR2)
+                self._write('Listening for >>SIGUSR2<<\n')
+                self._write('==> kill -s USR2 {}\n'.format(self.pid))
                 self.signals.append('USR2')
             else:
-                self.OUTPUT.write('No SIGUSR2 availale\n')
+                self._write('No SIGUSR2 availale\n')
 
         if not info and not usr1 and not usr2:
-            self.OUTPUT.write('No signal specified\n')
+            self._write('No signal specified\n')
         self.OUTPUT.flush()
 
         # Attempts to use all columns of the current tty window size
@@ -171,12 +258,259 @@ class SiginfoBasic:
         except Exception:
             self.COLUMNS = 80
 
+    def _bind(self, signum):
+        register(signum, self)
+        self._signums.append(signum)
+
+    def bind_commands(self, commands=COMMANDS, offset=0):
+        """
+        Binds one real-time signal per command (Linux only)
+
+        The first command listens for ``SIGRTMIN + offset``, the
+        next one for ``SIGRTMIN + offset + 1`` and so on. This leaves
+        INFO, USR1 and USR2 to other libraries and gives every command
+        its own signal. ``SIGRTMAX`` is kept free for the fallback
+        dump, see :meth:`enable_fallback`. The kernel queues real-time signals instead of
+        merging them, Python still runs the handler only once if the
+        same signal arrives several times before the interpreter
+        handles it.
+
+        The mapping is written to the registry file of the process
+        (see :mod:`siginfo.registry`), so that ``python -m siginfo``
+        and :meth:`create_info_script` can send the right signal.
+
+        Commands:
+
+        - ``stack``: the regular dump of the current stack
+        - ``threads``: the stacks of all threads
+        - ``sample``: one line with the current function of every thread
+        - ``memory``: resource usage, garbage collector and
+          ``tracemalloc`` statistics
+        - ``diff``: only the changes since the previous dump
+
+        Args
+        ----
+        commands : list
+            Names of the commands in order of their signals
+            Default: all ``COMMANDS``
+        offset : int
+            Number of the first signal after ``SIGRTMIN``
+            Default: 0
+
+        Returns
+        -------
+        : dict
+            ``{command: signal number}``
+
+        Raises
+        ------
+        ValueError
+            For unknown commands or if the range reaches ``SIGRTMAX``
+            or the signal of the fallback dump
+
+        """
+        if not hasattr(signal, 'SIGRTMIN'):
+            self._write('No real-time signals available\n')
+            return {}
+        for command in commands:
+            if command not in COMMANDS:
+                raise ValueError('Unknown command {!r}, use one of {}'.format(
+                    command, ', '.join(COMMANDS)
+                ))
+        from siginfo import registry
+        from siginfo.fallback import default_signal
+
+        first = signal.SIGRTMIN + offset
+        last = first + len(commands) - 1
+        reserved = {default_signal()}
+        if self.fallback is not None:
+            reserved.add(self.fallback.signum)
+        if offset < 0 or last > signal.SIGRTMAX or any(first <= s <= last for s in reserved):
+            raise ValueError(
+                'Signals SIGRTMIN+{} to SIGRTMIN+{} are not available, SIGRTMAX is '
+                'reserved for the fallback dump'.format(offset, offset + len(commands) - 1)
+            )
+        self._registry = registry
+        if 'memory' in commands:
+            import tracemalloc
+
+            self._tracemalloc = tracemalloc
+        res = {}
+        for index, command in enumerate(commands):
+            signum = first + index
+            self._bind(signum)
+            self.commands[signum] = command
+            res[command] = signum
+            self._write('Listening for >>SIGRTMIN+{}<< ({})\n'.format(offset + index, command))
+            self._write('==> python -m siginfo {} {}\n'.format(self.pid, command))
+        self.OUTPUT.flush()
+        self._register_commands()
+        return res
+
+    def _register_commands(self):
+        registry = self._registry
+        # keep the commands of other instances in the same process
+        commands = {
+            command: signum
+            for command, signum in registry.read_registry(self.pid).get('commands', {}).items()
+            if signum not in self._registered
+        }
+        for signum, command in self.commands.items():
+            commands[command] = signum
+        registry.update_registry(self.pid, commands=commands or None)
+        if self.commands and not self._registered:
+            atexit.register(registry.remove_at_exit, self.pid, 'commands')
+        self._registered = set(self.commands)
+
+    def unbind(self):
+        """
+        Stops listening for all signals
+
+        Other consumers of the same signals are not affected. The
+        original handler is restored once no consumer is left.
+
+        Returns
+        -------
+        None
+        """
+        for signum in self._signums:
+            unregister(signum, self)
+        self._signums = []
+        self.signals = []
+        if self.commands:
+            self.commands = {}
+            self._register_commands()
+        if self.fallback is not None:
+            self.fallback.stop()
+            self.fallback = None
+            self._registry.update_registry(self.pid, fallback=None)
+
+    def enable_fallback(self, signum=None, path=None, timeout=None, repeat=False):
+        """
+        Adds an allocation free dump of all threads via ``faulthandler``
+
+        The rich dump runs Python code and can fail or hang when the
+        process is out of memory or wedged. The fallback dump is written
+        by ``faulthandler`` from the C signal handler to a file that is
+        opened now, see :class:`siginfo.fallback.FallbackDump`. It is
+        also written when a rich dump raises an exception.
+
+        The signal, the path and the timeout are written to the
+        registry file of the process, ``python -m siginfo <pid> fallback``
+        sends the signal.
+
+        Args
+        ----
+        signum : int
+            Signal of the fallback dump, not used by other siginfo instances
+            Default: None (``SIGRTMAX`` on Linux, otherwise ``SIGUSR2``)
+        path : str
+            File the tracebacks are appended to
+            Default: None (``siginfo-<pid>.traceback`` in ``$SIGINFO_DIR`` or a
+            private per-user directory, see :func:`siginfo.registry.directory`)
+        timeout : float
+            Dump if ``self.fallback.reset()`` is not called for ``timeout`` seconds
+            Default: None (no hang timer)
+        repeat : bool
+            Dump every ``timeout`` seconds while the process hangs
+            Default: False
+
+        Returns
+        -------
+        : :class:`siginfo.fallback.FallbackDump`
+
+        Raises
+        ------
+        ValueError
+            If a siginfo instance listens for the signal
+
+        """
+        from siginfo import registry
+        from siginfo.fallback import FallbackDump
+
+        self._registry = registry
+        fallback = FallbackDump(self.pid, signum, path, timeout, repeat)
+        if self.fallback is not None:
+            self.fallback.stop()
+        else:
+            atexit.register(registry.remove_at_exit, self.pid, 'fallback')
+        fallback.start()
+        self.fallback = fallback
+        registry.update_registry(self.pid, fallback=fallback.as_dict())
+        self._write('Fallback dump on >>{}<< to {}\n'.format(fallback.signum, fallback.path))
+        self._write('==> python -m siginfo {} fallback\n'.format(self.pid))
+        self.OUTPUT.flush()
+        return fallback
+
+    def handle(self, signum, frame, stack):
+        """
+        Called by :class:`siginfo.dispatcher.SignalDispatcher` with
+        the frames that are shared by all consumers of a signal
+
+        Records the pause time. Signals that arrive while a dump
+        is running are coalesced into that dump.
+        """
+        stats = self._stats
+        stats.signals += 1
+        if self._busy:
+            stats.coalesced += 1
+            return
+        self._busy = True
+        self._stack = stack
+        start = perf_counter_ns()
+        command = self.commands.get(signum)
+        try:
+            if command is None:
+                self(signum, frame)
+            else:
+                getattr(self, '_command_{}'.format(command))(signum, frame)
+            stats.dumps += 1
+        except Exception:
+            stats.dropped += 1
+            if self.fallback is not None:
+                self.fallback.dump()
+            raise
+        finally:
+            self._stack = None
+            self._busy = False
+            stats.record_pause(perf_counter_ns() - start)
+
+    def stats(self):
+        """
+        Metrics of this instance about itself
+
+        Returns
+        -------
+        : dict
+            See :meth:`siginfo.stats.HandlerStats.as_dict`
+        """
+        return self._stats.as_dict()
+
+    def _write(self, data):
+        start = perf_counter_ns()
+        self.OUTPUT.write(data)
+        stats = self._stats
+        stats.write_ns += perf_counter_ns() - start
+        stats.bytes += len(data)
+
+    def _frames(self, frame):
+        """
+        ``frame`` and its parents up to ``MAX_LEVELS``.
+        Reuses the stack of the dispatcher if available.
+        """
+        depth = self.MAX_LEVELS or 1000
+        if self._stack and self._stack[0] is frame:
+            return self._stack[:depth]
+        return walk_stack(frame, depth)
+
     def create_info_script(self, path=None, prefix='', overwrite=False):
         """
         Create an executable on the file system to send the appropiate signal.
 
         For user convenience, create executable filess in the specified path
         that can be used to send corresponding signals to the parent's script.
+        Commands bound with :meth:`bind_commands` get a script named after
+        the command, e.g. ``siginfo-threads``.
 
         Args
         ----
@@ -194,68 +528,273 @@ class SiginfoBasic:
         """
         if path is None:
             path = os.path.expanduser('~')
-        for sig in self.signals:
+        scripts = [(sig, '-s {}'.format(sig)) for sig in self.signals]
+        # real-time signals by number, not every shell knows RTMIN+n
+        scripts.extend(
+            (command, '-{}'.format(signum)) for signum, command in sorted(self.commands.items())
+        )
+        for name, kill_args in scripts:
             filename = os.path.abspath(
                 os.path.join(
                     path,
-                    '{}siginfo-{}'.format(prefix, sig)
+                    '{}siginfo-{}'.format(prefix, name)
                 )
             )
             if not os.path.isfile(filename) or overwrite:
                 with open(filename, 'w') as fh:
                     fh.write('#!/bin/sh\n')
-                    fh.write('kill -s {} {}'.format(sig, self.pid))
+                    fh.write('kill {} {}'.format(kill_args, self.pid))
                 os.chmod(filename, os.stat(filename).st_mode | stat.S_IEXEC)
 
                 atexit.register(self._delete_file, filename)
 
-    def _print_frame(self, frame):
+    def _print_frame(self, snapshot, show_locals=True):
         """
         Formats and prints the frame output
         in a somewhat tabbular format
+
+        Accepts a :class:`siginfo.snapshot.FrameSnapshot` or a frame
         """
-        local_vars = LocalClass(frame.f_locals, self.COLUMNS)
-        self.OUTPUT.write('METHOD\t\t{}\n'.format(frame.f_code.co_name))
-        self.OUTPUT.write('LINE NUMBER:\t{}\n'.format(frame.f_lineno))
-        self.OUTPUT.write('-'*self.COLUMNS)
-        self.OUTPUT.write('\n')
-        self.OUTPUT.write('LOCALS\n')
-        self.OUTPUT.write(str(local_vars))
-        self.OUTPUT.write('\n')
-        self.OUTPUT.write('-'*self.COLUMNS)
-        self.OUTPUT.write('\n')
-        self.OUTPUT.write('SCOPE\t')
-        self.OUTPUT.write(str(frame.f_code))
-        self.OUTPUT.write('\n')
-        self.OUTPUT.write('CALLER\t')
-        if frame.f_back:
-            self.OUTPUT.write(str(frame.f_back.f_code))
+        if hasattr(snapshot, 'f_code'):
+            snapshot = self._capture_frame(snapshot, 0, show_locals)
+        self._write('METHOD\t\t{}\n'.format(snapshot.name))
+        self._write('LINE NUMBER:\t{}\n'.format(snapshot.lineno))
+        self._write('-'*self.COLUMNS)
+        self._write('\n')
+        if show_locals and snapshot.locals is not None:
+            local_vars = LocalClass(snapshot.locals, self.COLUMNS)
+            self._write('LOCALS\n')
+            self._write(str(local_vars))
+            self._write('\n')
+            self._write('-'*self.COLUMNS)
+            self._write('\n')
+        self._write('SCOPE\t')
+        self._write(str(snapshot.code))
+        self._write('\n')
+        self._write('CALLER\t')
+        if snapshot.caller:
+            self._write(str(snapshot.caller))
         else:
-            self.OUTPUT.write('NONE')
-        self.OUTPUT.write('\n')
+            self._write('NONE')
+        self._write('\n')
+
+    def _levels_with_locals(self, runs):
+        """
+        Levels for which the LOCALS table is printed:
+        the top ``LOCALS_TOP_K`` frames and the first and
+        last frame of every recursion.
+        Returns ``None`` if all levels should be printed.
+        """
+        if self.LOCALS_TOP_K is None:
+            return None
+        levels = set(range(self.LOCALS_TOP_K))
+        for start, length, repeats in runs:
+            levels.add(start)
+            levels.add(start + length * repeats - 1)
+        return levels
+
+    def _capture_frame(self, frame, level, with_locals=True):
+        return capture_frame(
+            frame, level, self.summarize, with_locals, self.MAX_LOCALS, self.MODULE_FRAMES
+        )
+
+    def _printed_levels(self, start, length, repeats):
+        """
+        Levels of a run that are printed: all of them, or the first
+        and last repetition if recursion is collapsed
+        """
+        if self.COLLAPSE_RECURSION and repeats > 1:
+            last = start + length * (repeats - 1)
+            return list(range(start, start + length)) + list(range(last, last + length))
+        return range(start, start + length * repeats)
+
+    def _print_level(self, level, snapshot):
+        self._write('\n')
+        self._write('='*self.COLUMNS)
+        self._write('\n')
+        self._write('LEVEL    \t{}\n'.format(level))
+        self._print_frame(snapshot)
+        self._write('='*self.COLUMNS)
+        self._write('\n')
+        self.OUTPUT.flush()
+
+    def _capture_levels(self, frames, runs, with_locals):
+        """
+        Captures all levels that are printed as
+        :class:`siginfo.snapshot.FrameSnapshot`
+        """
+        snapshots = {}
+        for start, length, repeats in runs:
+            for i in self._printed_levels(start, length, repeats):
+                snapshots[i] = self._capture_frame(
+                    frames[i], i, with_locals is None or i in with_locals
+                )
+        return snapshots
 
     # Print all stack frames
     # callback for signal.signal
     def _call(self, signum, frame):
-        depth = self.MAX_LEVELS or 1000
-        self.OUTPUT.write('\n')
-        self.OUTPUT.write(type(self).__name__)
-        self.OUTPUT.write('\n')
-
-        for i in range(depth):
-            if frame:
-                self.OUTPUT.write('\n')
-                self.OUTPUT.write('='*self.COLUMNS)
-                self.OUTPUT.write('\n')
-                self.OUTPUT.write('LEVEL    \t{}\n'.format(i))
-                self._print_frame(frame)
-                self.OUTPUT.write('='*self.COLUMNS)
-                self.OUTPUT.write('\n')
-                self.OUTPUT.flush()
-                frame = frame.f_back
+        self._write('\n')
+        self._write(type(self).__name__)
+        self._write('\n')
+        if self.RESOURCES:
+            self._print_resources()
+
+        stats = self._stats
+        began = perf_counter_ns()
+        frames = self._frames(frame)
+        if self.COLLAPSE_RECURSION or self.LOCALS_TOP_K is not None:
+            runs = find_runs([frame_key(frame) for frame in frames])
+        else:
+            runs = [(level, 1, 1) for level in range(len(frames))]
+        with_locals = self._levels_with_locals(runs)
+        snapshots = self._capture_levels(frames, runs, with_locals)
+        previous = None
+        if self.DIFF:
+            previous = self._previous_state
+            # positions are counted from the root, frames may be cut off by MAX_LEVELS
+            self._previous_state = self._diff.capture_state(snapshots, stack_depth(frame))
+        captured = perf_counter_ns()
+        written = stats.write_ns
+
+        if previous is not None:
+            self._print_diff(self._diff.diff_states(previous, self._previous_state))
+            runs = ()
+        for start, length, repeats in runs:
+            collapsed = self.COLLAPSE_RECURSION and repeats > 1
+            for index, i in enumerate(self._printed_levels(start, length, repeats)):
+                if collapsed and index == length:
+                    # between the first and the last repetition
+                    self._write('\nREPEATED\t× {} (LEVEL {} - {}, {} frame{} each)\n'.format(
+                        repeats,
+                        start,
+                        start + length * repeats - 1,
+                        length,
+                        's' if length > 1 else ''
+                    ))
+                self._print_level(i, snapshots[i])
+        self.OUTPUT.flush()
+
+        if self.BOTTLENECKS:
+            self._print_bottlenecks(frames)
+
+        capture_ns = captured - began
+        write_ns = stats.write_ns - written
+        render_ns = perf_counter_ns() - captured - write_ns
+        stats.capture_ns += capture_ns
+        stats.render_ns += render_ns
+        if self.STATS_FOOTER:
+            self._write('\nSIGINFO\t{} | capture {} render {} write {}\n'.format(
+                # handle() counts this dump only after it is complete
+                stats.report(running=1 if self._busy else 0),
+                format_us(capture_ns // 1000),
+                format_us(render_ns // 1000),
+                format_us(write_ns // 1000)
+            ))
+            self.OUTPUT.flush()
+
+    def _command_stack(self, signum, frame):
+        SiginfoBasic._call(self, signum, frame)
+
+    def _command_diff(self, signum, frame):
+        diff = self.DIFF
+        self.DIFF = True
+        try:
+            SiginfoBasic._call(self, signum, frame)
+        finally:
+            self.DIFF = diff
+
+    def _command_threads(self, signum, frame):
+        # the signal handler runs on top of the interrupted frame
+        for stack in self._capture.capture_threads(frame):
+            self._write('\nTHREAD\t{} ({}){}\n'.format(
+                stack.name, stack.ident, '' if stack.consistent else ' (moving)'
+            ))
+            self._write(stack.format())
+        self.OUTPUT.flush()
+
+    def _command_sample(self, signum, frame):
+        stacks = self._capture.capture_threads(frame, depth=1)
+        self._write('\nSAMPLE\t{}\n'.format(time.strftime('%Y-%m-%d %H:%M:%S')))
+        for stack in stacks:
+            if stack.entries:
+                filename, lineno, name = stack.entries[0]
+                self._write('{}\t{} {}:{}\n'.format(stack.name, name, filename, lineno))
+        self.OUTPUT.flush()
+
+    def _command_memory(self, signum, frame):
+        tracemalloc = self._tracemalloc
+        self._write('\nMEMORY\n')
+        if self.resources.available():
+            self._write('{}\n'.format(self.resources.report()))
+        self._write('GC\tcollections {} pending {} garbage {}\n'.format(
+            ' '.join(str(stat['collections']) for stat in gc.get_stats()),
+            ' '.join(str(count) for count in gc.get_count()),
+            len(gc.garbage)
+        ))
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            self._write('TRACEMALLOC\tcurrent {} peak {}\n'.format(
+                format_bytes(current), format_bytes(peak)
+            ))
+            for stat in tracemalloc.take_snapshot().statistics('lineno')[:10]:
+                self._write('{}\n'.format(stat))
+        self.OUTPUT.flush()
+
+    def _print_diff(self, diff):
+        changed, removed, elapsed = diff
+        self._write('\nDIFF\t{} frame{} changed in {:.1f}s{}\n'.format(
+            len(changed),
+            '' if len(changed) == 1 else 's',
+            elapsed,
+            ', {} returned'.format(removed) if removed else ''
+        ))
+        for change in changed:
+            self._write('\n')
+            self._write('='*self.COLUMNS)
+            self._write('\n')
+            self._write('LEVEL    \t{}{}\n'.format(change.level, ' (new)' if change.new else ''))
+            self._write('METHOD\t\t{}\n'.format(change.name))
+            if change.new or change.old_lineno == change.lineno:
+                self._write('LINE NUMBER:\t{}\n'.format(change.lineno))
             else:
-                self.OUTPUT.flush()
-                break
+                self._write('LINE NUMBER:\t{} → {}\n'.format(change.old_lineno, change.lineno))
+            if change.changes:
+                self._write('-'*self.COLUMNS)
+                self._write('\n')
+                width = max(len(variable.name) for variable in change.changes)
+                for variable in change.changes:
+                    self._write('{}\t{}\n'.format(
+                        variable.name.ljust(width), self._diff.format_change(variable)
+                    ))
+            self._write('='*self.COLUMNS)
+            self._write('\n')
+        self.OUTPUT.flush()
+
+    def _print_resources(self):
+        """
+        Prints the resource usage of the process.
+        Nothing is printed if ``/proc`` is not available.
+        """
+        if not self.resources.available():
+            return
+        self._write('\nRESOURCES\n')
+        self._write(self.resources.report())
+        self._write('\n')
+
+    def _print_bottlenecks(self, frames):
+        """
+        Prints queues, executors and locks that slow down
+        other threads. Nothing is printed if there are none.
+        """
+        bottlenecks = self._concurrency.find_bottlenecks(frames)
+        if not bottlenecks:
+            return
+        self._write('\nBOTTLENECKS\n')
+        for line in bottlenecks:
+            self._write(line)
+            self._write('\n')
+        self.OUTPUT.flush()
 
     __call__ = _call
 
@@ -335,31 +874,1110 @@ class SigInfoSingle(SiginfoBasic):
             # Output:
             4
 
+    ``SigInfoSingle`` can also track variables over time and report
+    their progress, rate and the estimated time until a total is reached.
+    Samples are taken on every signal and, optionally, periodically
+    from a background thread.
+
+    Example
+    -------
+        ::
+
+            foo = SigInfoSingle(usr1=True)
+            foo.track('i', total=100)
+            foo.track('errors')
+
+            # sample every 5 seconds in addition to every signal
+            foo.start_ticks(5)
+
+            for i in range(100):
+                do_long_task(i)
+
+        .. code-block:: bash
+
+            # Output:
+            i       42      +12 in 60.0s    0.20/s  42.0%   ETA 0:04:50     ▁▂▂▃▄▅▆█
+            errors  0       +0 in 60.0s     0.00/s  ▁▁▁▁▁▁▁▁
+
 
     """
-    def set_var(self, varname, default=None):
+    def __init__(self, info=True, usr1=True, usr2=False, output=None):
+        from siginfo import accessor, progress
+
+        super().__init__(info=info, usr1=usr1, usr2=usr2, output=output)
+        self._accessor = accessor
+        self._progress = progress
+        self._varname = None
+        self._default = None
+        self._var_accessor = None
+        self._accessors = None
+        self.trackers = []
+        self._ticker = None
+
+    def set_var(self, varname, default=None, use_globals=False):
         """
         Defines the variable that should be printed
 
         Args
         ----
         varname : str
-            Name of variable from stack frame that should be printed
+            Name of variable from stack frame that should be printed.
+            Can also be an expression like ``self.stats.rows``,
+            ``len(queue)`` or ``caller:batch_idx``
+            (see :class:`siginfo.accessor.Accessor`). Other strings
+            are looked up in the locals as they are.
         default
             Backup value to print if ``varname`` is not present in local
             stack frame.
             Default: None
+        use_globals : bool
+            Look up names that are not local variables in the frame's globals
+            Default: False
 
         Returns
         -------
         None
         """
+        try:
+            self._var_accessor = self._accessor.Accessor(varname, use_globals)
+        except ValueError:
+            # not an expression, e.g. a key that was added to f_locals
+            self._var_accessor = None
         self._varname = varname
         self._default = default
 
+    def set_vars(self, *expressions, use_globals=False):
+        """
+        Defines multiple variables or expressions that should be printed
+
+        Each expression is compiled once. A failing expression is
+        reported with its error and does not affect the others.
+
+        Args
+        ----
+        expressions : str
+            Variable names or expressions like ``self.cursor.pos``,
+            ``len(buf)`` or ``caller:batch_idx``
+            (see :class:`siginfo.accessor.Accessor`)
+        use_globals : bool
+            Look up names that are not local variables in the frame's globals
+            Default: False
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        ValueError
+            If an expression uses unsupported syntax
+        """
+        self._accessors = self._accessor.AccessorSet(expressions, use_globals)
+
+    @property
+    def accessors(self):
+        """
+        All :class:`siginfo.accessor.Accessor` of :meth:`set_var` and :meth:`set_vars`
+        """
+        res = []
+        if self._var_accessor is not None:
+            res.append(self._var_accessor)
+        if self._accessors:
+            res.extend(self._accessors.accessors)
+        return res
+
+    def track(self, varname, total=None, default=None, history=60):
+        """
+        Records a variable over time to report its progress
+
+        Args
+        ----
+        varname : str
+            Name of variable from stack frame or expression
+            that should be tracked
+        total : int or float
+            Value at which the task is complete. Enables percentage and ETA.
+            Default: None
+        default
+            Value to record if ``varname`` is not present in the stack frame
+            Default: None
+        history : int
+            Number of samples to keep for rate and sparkline
+            Default: 60
+
+        Returns
+        -------
+        : :class:`siginfo.progress.ProgressTracker`
+        """
+        tracker = self._progress.ProgressTracker(varname, total, default, history)
+        self.trackers.append(tracker)
+        return tracker
+
+    def start_ticks(self, interval=1.0, thread_id=None):
+        """
+        Samples all tracked variables periodically in a background thread
+
+        Args
+        ----
+        interval : float
+            Seconds between two samples
+            Default: 1.0
+        thread_id : int
+            Thread whose current frame is sampled
+            Default: None (the calling thread)
+
+        Returns
+        -------
+        None
+        """
+        self.stop_ticks()
+        if thread_id is None:
+            thread_id = threading.get_ident()
+        stop = threading.Event()
+
+        def tick():
+            while not stop.wait(interval):
+                frame = sys._current_frames().get(thread_id)
+                if frame is None:
+                    break
+                self._sample(frame)
+                del frame
+
+        thread = threading.Thread(target=tick, name='siginfo-ticks', daemon=True)
+        thread.start()
+        self._ticker = (thread, stop)
+
+    def stop_ticks(self):
+        """
+        Stops the periodic sampling
+
+        Returns
+        -------
+        None
+        """
+        if self._ticker is not None:
+            thread, stop = self._ticker
+            stop.set()
+            thread.join()
+            self._ticker = None
+
+    def _sample(self, frame):
+        for tracker in self.trackers:
+            tracker.sample(frame)
+
     # Print value of set variable
     def __call__(self, signum, frame):
         if self._varname:
-            self.OUTPUT.write('{}\n'.format(
-                frame.f_locals.get(self._varname, self._default)
-            ))
+            if self._var_accessor is None:
+                value = frame.f_locals.get(self._varname, self._default)
+            else:
+                value = self._var_accessor.get(frame, self._default)
+            self._write('{}\n'.format(value))
+        if self._accessors:
+            for expression, value, error in self._accessors.evaluate(frame):
+                if error is not None:
+                    value = '<{}: {}>'.format(type(error).__name__, error)
+                self._write('{}\t{}\n'.format(expression, value))
+        if self.trackers:
+            self._sample(frame)
+            for tracker in self.trackers:
+                self._write('{}\n'.format(tracker.report()))
+            self.OUTPUT.flush()
+
+
+class SigInfoTrigger(SiginfoBasic):
+    """
+    SigInfo class that dumps the call stack when a condition is met
+
+    Instead of waiting for a signal, the stack is printed as soon as
+    a predicate on the local variables of a function or line is true.
+    The instrumentation uses ``sys.monitoring`` (Python 3.12+) and is
+    only enabled on the monitored code objects, all other code runs
+    at full speed.
+
+    Signals are still handled like in ``SiginfoBasic``.
+
+    Example
+    -------
+        ::
+
+            foo = SigInfoTrigger(usr1=False)
+
+            # dump the stack when `i` hits one million
+            foo.add_trigger(read_lines, 'i >= 1e6', line=33)
+
+            # dump the stack when an empty batch is processed
+            foo.add_trigger(process_batch, 'len(batch) == 0')
+
+            # triggers can also be defined by file and line
+            foo.add_trigger('long_script.py:33', lambda local_vars: local_vars['i'] > 10)
+
+            read_lines()
+
+    """
+    def __init__(self, info=True, usr1=True, usr2=False, output=None):
+        from siginfo import monitor, trigger
+
+        super().__init__(info=info, usr1=usr1, usr2=usr2, output=output)
+        self._monitor = monitor
+        self._trigger = trigger
+        self.triggers = []
+
+    def add_trigger(self, target, predicate, line=None, min_interval=1.0, max_dumps=None):
+        """
+        Dumps the stack when ``predicate`` is true at ``target``
+
+        Args
+        ----
+        target : function, code object or str
+            Function to monitor or ``"file.py:line"``
+        predicate : str or callable
+            Python expression that is evaluated in the scope of the
+            monitored frame or a callable that receives the frame's locals
+        line : int
+            Line inside ``target`` to monitor
+            Default: None (evaluate on function entry)
+        min_interval : float
+            Minimum number of seconds between two dumps of this trigger
+            Default: 1.0
+        max_dumps : int
+            Remove the trigger after this many dumps, also from ``triggers``
+            Default: None (unlimited)
+
+        Returns
+        -------
+        : :class:`siginfo.trigger.Trigger`
+
+        Raises
+        ------
+        RuntimeError
+            If the interpreter does not support ``sys.monitoring``
+        ValueError
+            If the target can't be found
+
+        """
+        if not self._monitor.has_monitoring():
+            raise RuntimeError('SigInfoTrigger requires Python 3.12 or newer')
+        trigger = self._trigger.make_trigger(
+            target, predicate, self._dump_trigger, line, min_interval, max_dumps
+        )
+        trigger.on_retire = self.remove_trigger
+        trigger.install()
+        self.triggers.append(trigger)
+        return trigger
+
+    def remove_trigger(self, trigger):
+        """
+        Removes the instrumentation of a trigger
+
+        Args
+        ----
+        trigger : :class:`siginfo.trigger.Trigger`
+
+        Returns
+        -------
+        None
+
+        """
+        trigger.remove()
+        if trigger in self.triggers:
+            self.triggers.remove(trigger)
+
+    def clear_triggers(self):
+        """
+        Removes all triggers
+
+        Returns
+        -------
+        None
+
+        """
+        for trigger in list(self.triggers):
+            self.remove_trigger(trigger)
+
+    def _dump_trigger(self, trigger, frame):
+        self._write('\nTRIGGER\t{}\n'.format(trigger))
+        self._call(None, frame)
+
+
+class SigInfoMeter(SiginfoBasic):
+    """
+    SigInfo class that prints how often lines or functions are executed
+
+    Helps to tell a stuck job from a slow one: each meter counts the
+    executions of one line or the calls of one function and reports
+    the rate since the previous signal, decaying short and long term
+    averages and a histogram of the intervals between two executions.
+    Uses ``sys.monitoring`` (Python 3.12+) only on the metered code
+    objects. Meters can be added and removed at any time.
+
+    Example
+    -------
+        ::
+
+            foo = SigInfoMeter(usr1=True)
+
+            # count calls of process_row and executions of line 33
+            foo.add_meter(process_row)
+            foo.add_meter('long_script.py:33')
+
+            read_lines()
+
+        In another terminal window:
+
+        .. code-block:: bash
+
+            kill -s USR1 ${pid}
+
+            # Output:
+            METER   process_row:entry
+            COUNT   81234 (+1523 in 1.0s)
+            RATE    1523.0/s        SHORT 1498.2/s  LONG 1430.9/s   TREND steady
+            OVERHEAD        97.5ms (1200ns/event)
+            INTERVALS       <512us 12  <1ms 81220
+
+    """
+    def __init__(self, info=True, usr1=True, usr2=False, output=None):
+        from siginfo import meter, monitor
+
+        super().__init__(info=info, usr1=usr1, usr2=usr2, output=output)
+        self._meter = meter
+        self._monitor = monitor
+        self.meters = []
+
+    def add_meter(self, target, line=None, name=None):
+        """
+        Starts counting executions of a function or line
+
+        Args
+        ----
+        target : function, code object or str
+            Function to monitor or ``"file.py:line"``
+        line : int
+            Line inside ``target`` to count
+            Default: None (count function calls)
+        name : str
+            Label of the meter in the output
+
+        Returns
+        -------
+        : :class:`siginfo.meter.Meter`
+
+        Raises
+        ------
+        RuntimeError
+            If the interpreter does not support ``sys.monitoring``
+        ValueError
+            If the target can't be found
+
+        """
+        if not self._monitor.has_monitoring():
+            raise RuntimeError('SigInfoMeter requires Python 3.12 or newer')
+        # measured once outside of the signal handler, the report only reads the result
+        self._meter.calibrate()
+        meter = self._meter.make_meter(target, line, name)
+        meter.install()
+        self.meters.append(meter)
+        return meter
+
+    def remove_meter(self, meter):
+        """
+        Removes the instrumentation of a meter
+
+        Args
+        ----
+        meter : :class:`siginfo.meter.Meter`
+
+        Returns
+        -------
+        None
+
+        """
+        meter.remove()
+        if meter in self.meters:
+            self.meters.remove(meter)
+
+    def report(self):
+        """
+        Reports all meters
+
+        Returns
+        -------
+        : str
+
+        """
+        return '\n\n'.join(meter.report() for meter in self.meters)
+
+    # Print the rate of all meters
+    def __call__(self, signum, frame):
+        self._write('\n{}\n'.format(self.report()))
+        self.OUTPUT.flush()
+
+
+class SigInfoDeadlock(SiginfoBasic):
+    """
+    SigInfo class that searches all threads for deadlocks
+
+    On every signal the stacks of all threads are analysed. Threads that
+    wait for a lock held by another thread form a wait-for graph and
+    every cycle in that graph is reported together with the stacks
+    of the involved threads.
+
+    CPython doesn't record the owner of a plain ``threading.Lock``.
+    Use :class:`siginfo.deadlock.TrackedLock` for locks that should be
+    part of the analysis. ``RLock`` owners and ``Thread.join`` are
+    detected without changes.
+
+    Deadlocks can also be detected without a signal by starting
+    a watchdog thread.
+
+    Example
+    -------
+        ::
+
+            from siginfo.deadlock import TrackedLock
+
+            foo = SigInfoDeadlock(usr1=True)
+
+            # check for deadlocks every 10 seconds
+            foo.start_watchdog(10)
+
+            lock_a = TrackedLock(name='a')
+            lock_b = TrackedLock(name='b')
+
+        .. code-block:: bash
+
+            # Output:
+            DEADLOCK 1
+              MainThread waits for <TrackedLock b owned by worker> held by worker
+              worker waits for <TrackedLock a owned by MainThread> held by MainThread
+            STACK MainThread
+            ...
+
+    """
+    def __init__(self, info=True, usr1=True, usr2=False, output=None):
+        from siginfo import deadlock
+
+        super().__init__(info=info, usr1=usr1, usr2=usr2, output=output)
+        self._deadlock = deadlock
+        self._watchdog = None
+        self._reported = set()
+
+    def check(self):
+        """
+        Searches for deadlocks and prints all new ones
+
+        Deadlocks that were already reported by a previous check are
+        not printed again.
+
+        Returns
+        -------
+        : list
+            All current deadlock cycles
+            (see :func:`siginfo.deadlock.find_cycles`)
+        """
+        thread_frames = self._capture.readable_frames()
+        cycles = self._deadlock.detect_deadlocks(thread_frames)
+        keys = {tuple(edge.waiter for edge in cycle) for cycle in cycles}
+        new = [
+            cycle for cycle in cycles
+            if tuple(edge.waiter for edge in cycle) not in self._reported
+        ]
+        self._reported = keys
+        if new:
+            self._write('\n{}\n'.format(self._deadlock.format_deadlocks(new, thread_frames)))
+            self.OUTPUT.flush()
+        return cycles
+
+    def start_watchdog(self, interval=10.0):
+        """
+        Checks for deadlocks periodically in a background thread
+
+        Args
+        ----
+        interval : float
+            Seconds between two checks
+            Default: 10.0
+
+        Returns
+        -------
+        None
+        """
+        self.stop_watchdog()
+        stop = threading.Event()
+
+        def watch():
+            while not stop.wait(interval):
+                self.check()
+
+        thread = threading.Thread(target=watch, name='siginfo-deadlock', daemon=True)
+        thread.start()
+        self._watchdog = (thread, stop)
+
+    def stop_watchdog(self):
+        """
+        Stops the periodic deadlock check
+
+        Returns
+        -------
+        None
+        """
+        if self._watchdog is not None:
+            thread, stop = self._watchdog
+            stop.set()
+            thread.join()
+            self._watchdog = None
+
+    # Print all deadlocks
+    def __call__(self, signum, frame):
+        thread_frames = self._capture.readable_frames()
+        cycles = self._deadlock.detect_deadlocks(thread_frames)
+        if cycles:
+            self._write('\n{}\n'.format(self._deadlock.format_deadlocks(cycles, thread_frames)))
+        else:
+            self._write('\nNo deadlock found\n')
+        self.OUTPUT.flush()
+
+
+class SigInfoSnapshot(SiginfoBasic):
+    """
+    SigInfo class that writes the call stack to a snapshot file
+
+    Instead of printing the stack, code metadata, line numbers and
+    local variables of every frame are written to a binary file that
+    can be loaded later for offline analysis, e.g. in a notebook.
+    Local variables are pickled where possible. Values that can't be
+    pickled or are too large are stored as a bounded ``repr``.
+
+    ``MAX_LEVELS`` limits the number of frames and ``MODULE_FRAMES``
+    the locals of module level frames like in ``SiginfoBasic``.
+
+    Local variables may contain secrets: every snapshot is a new file
+    with mode 0600, it is never opened through a symlink or replaces
+    an existing file.
+
+    Args
+    ----
+    directory : str
+        Where snapshot files are written to
+        Default: None (``$SIGINFO_DIR`` or a private per-user directory,
+        see :func:`siginfo.registry.directory`)
+
+    Attributes
+    ----------
+    snapshots : list
+        Paths of all written snapshot files
+
+    Example
+    -------
+        ::
+
+            foo = SigInfoSnapshot(usr1=True, directory='/var/tmp')
+            read_lines()
+
+        In another terminal window:
+
+        .. code-block:: bash
+
+            kill -s USR1 ${pid}
+
+            # Output:
+            SNAPSHOT        /var/tmp/siginfo-1234-20240101-120000.snap
+
+        Later, in a REPL:
+
+        ::
+
+            from siginfo.snapshotfile import load_snapshot
+
+            snap = load_snapshot('/var/tmp/siginfo-1234-20240101-120000.snap')
+            snap[0].locals['line']
+
+    """
+    def __init__(self, info=True, usr1=True, usr2=False, output=None, directory=None):
+        from siginfo import registry, snapshotfile
+
+        super().__init__(info=info, usr1=usr1, usr2=usr2, output=output)
+        self._snapshotfile = snapshotfile
+        self.directory = directory or registry.directory()
+        self.snapshots = []
+
+    def write_snapshot(self, frame, signum=None):
+        """
+        Writes the stack of ``frame`` to a new snapshot file
+
+        Args
+        ----
+        frame : frame
+            The innermost frame
+        signum : int
+            Signal that triggered the snapshot
+            Default: None
+
+        Returns
+        -------
+        : str
+            Path of the snapshot file
+        """
+        filename = os.path.join(self.directory, 'siginfo-{}-{}.snap'.format(
+            self.pid, time.strftime('%Y%m%d-%H%M%S')
+        ))
+        base, counter = filename[:-len('.snap')], 1
+        flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_NOFOLLOW', 0)
+        while True:
+            try:
+                fd = os.open(filename, flags, 0o600)
+                break
+            except FileExistsError:
+                filename = '{}-{}.snap'.format(base, counter)
+                counter += 1
+        with os.fdopen(fd, 'wb') as fh:
+            writer = self._snapshotfile.SnapshotWriter(fh)
+            writer.write_meta(signum)
+            for level, stack_frame in enumerate(self._frames(frame)):
+                writer.write_frame(level, stack_frame, self.MODULE_FRAMES)
+            writer.close()
+        self.snapshots.append(filename)
+        return filename
+
+    # Write all stack frames to a file
+    def __call__(self, signum, frame):
+        filename = self.write_snapshot(frame, signum)
+        self._write('\nSNAPSHOT\t{}\n'.format(filename))
+        self.OUTPUT.flush()
+
+
+class SigInfoConsole(SiginfoBasic):
+    """
+    SigInfo class that serves a Python console over a Unix socket
+
+    Unlike ``SigInfoPDB`` the process keeps running: on every signal
+    the locals and globals of the stack are captured and a console
+    is served from a background thread. No tty is required, so it
+    also works for daemonized processes.
+
+    Code in the console runs concurrently with the main thread and
+    sees the live objects referenced by the captured frames.
+    The ``:freeze`` command stops the main thread inside the signal
+    handler until ``:resume`` is sent or the client disconnects.
+
+    Args
+    ----
+    path : str
+        Path of the Unix socket
+        Default: None (``console.sock`` in a new private temporary
+        directory, printed on the first signal)
+
+    Attributes
+    ----------
+    stack : list
+        :class:`siginfo.console.CapturedFrame` of the last signal
+
+    Example
+    -------
+        ::
+
+            foo = SigInfoConsole(usr1=True)
+            read_lines()
+
+        In another terminal window:
+
+        .. code-block:: bash
+
+            kill -s USR1 ${pid}
+            nc -U /tmp/siginfo-${pid}-k2j4x9/console.sock
+
+            siginfo console of pid 1234, 3 frames captured, type :help for help
+            0 read_lines long_script.py:33
+            >>> i
+            1523
+            >>> :frame 1
+            1 main2 long_script.py:22
+
+    """
+    def __init__(self, info=True, usr1=True, usr2=False, output=None, path=None):
+        from siginfo import console
+
+        super().__init__(info=info, usr1=usr1, usr2=usr2, output=output)
+        self._console = console
+        self.stack = []
+        self.server = console.ConsoleServer(path, self)
+        self._freeze_requested = False
+        self._frozen = threading.Event()
+        self._resume = threading.Event()
+
+    @property
+    def path(self):
+        """
+        Path of the Unix socket, ``None`` before the first start
+        """
+        return self.server.path
+
+    def capture(self, frame):
+        """
+        Captures locals and globals of ``frame`` and its parents
+
+        Args
+        ----
+        frame : frame
+            The innermost frame
+
+        Returns
+        -------
+        None
+        """
+        self.stack = [
+            self._console.CapturedFrame(level, stack_frame)
+            for level, stack_frame in enumerate(self._frames(frame))
+        ]
+
+    def start(self):
+        """
+        Starts serving the console
+
+        Returns
+        -------
+        None
+        """
+        if not self.server.running:
+            self.server.start()
+            atexit.register(self.stop)
+
+    def stop(self):
+        """
+        Stops the console server and resumes a frozen main thread
+
+        Returns
+        -------
+        None
+        """
+        self.resume()
+        self.server.stop()
+
+    def freeze(self, timeout=5.0):
+        """
+        Stops the main thread until :meth:`resume` is called
+
+        Sends the first bound signal to the process. The signal handler
+        captures the live stack and blocks.
+
+        Args
+        ----
+        timeout : float
+            Seconds to wait for the main thread to stop
+
+        Returns
+        -------
+        : str
+            Status message for the console
+        """
+        if self._frozen.is_set():
+            return 'Already frozen'
+        if not self._signums:
+            return 'Freeze requires a bound signal'
+        self._resume.clear()
+        self._freeze_requested = True
+        os.kill(self.pid, self._signums[0])
+        if not self._frozen.wait(timeout):
+            self._freeze_requested = False
+            return 'Main thread did not stop within {}s'.format(timeout)
+        return 'Frozen at {}'.format(self.stack[0] if self.stack else '?')
+
+    def resume(self):
+        """
+        Continues a frozen main thread
+
+        Returns
+        -------
+        : str
+            Status message for the console
+        """
+        if not self._frozen.is_set():
+            return 'Not frozen'
+        self._resume.set()
+        return 'Resumed'
+
+    # Capture the stack and serve the console
+    def __call__(self, signum, frame):
+        self.capture(frame)
+        if self._freeze_requested:
+            self._freeze_requested = False
+            self._frozen.set()
+            self._resume.wait()
+            self._frozen.clear()
+            return
+        self.start()
+        self._write('\nCONSOLE\t{}\n==> nc -U {}\n'.format(self.path, self.path))
+        self.OUTPUT.flush()
+
+
+class SigInfoReferrers(SiginfoBasic):
+    """
+    SigInfo class that explains what keeps the largest objects alive
+
+    On every signal the ``TOP_N`` largest objects in the locals of the
+    stack (and optionally of all objects tracked by the garbage
+    collector) are searched and for each of them the chains of
+    referrers back to a module global, a thread attribute or a local
+    variable of a running frame are printed. The frame the object
+    was found in is not reported, it is the obvious holder.
+
+    The search uses ``gc.get_referrers`` which scans the whole heap on
+    every call, it is bounded by ``MAX_NODES`` and ``TIMEOUT``.
+
+    Attributes
+    ----------
+    TOP_N : int
+        Number of objects
+        Default: 3
+    GC_SCAN : bool
+        Also consider all objects tracked by the garbage collector
+        Default: False
+    MAX_CHAINS : int
+        Chains per object
+        Default: 3
+    MAX_DEPTH : int
+        Maximum length of a chain
+        Default: 8
+    MAX_NODES : int
+        Maximum number of visited objects per search
+        Default: 500
+    TIMEOUT : float
+        Maximum search time per object in seconds
+        Default: 2.0
+
+    Example
+    -------
+        ::
+
+            foo = SigInfoReferrers(usr1=True)
+            load()
+
+        .. code-block:: bash
+
+            kill -s USR1 ${pid}
+
+            # Output:
+            REFERRERS
+            local 'rows' in load    list    685.2 KB
+                held by __main__.cache['k'] → dict['rows'] → list
+                held by __main__.holder.data → list
+
+    """
+    def __init__(self, info=True, usr1=True, usr2=False, output=None):
+        from siginfo import referrers
+
+        super().__init__(info=info, usr1=usr1, usr2=usr2, output=output)
+        self._referrers = referrers
+        self.TOP_N = 3
+        self.GC_SCAN = False
+        self.MAX_CHAINS = 3
+        self.MAX_DEPTH = 8
+        self.MAX_NODES = 500
+        self.TIMEOUT = 2.0
+
+    def explain(self, frame):
+        """
+        Finds the largest objects and their referrer chains
+
+        Args
+        ----
+        frame : frame
+            The innermost frame of the searched stack
+
+        Returns
+        -------
+        : list
+            ``(LargeObject, chains, complete)`` per object, see
+            :func:`siginfo.referrers.largest_objects` and
+            :func:`siginfo.referrers.find_referrer_chains`
+
+        """
+        res = []
+        for large in self._referrers.largest_objects(
+            self._frames(frame), self.TOP_N, self.GC_SCAN
+        ):
+            chains, complete = self._referrers.find_referrer_chains(
+                large.obj, self.MAX_CHAINS, self.MAX_DEPTH, self.MAX_NODES, self.TIMEOUT,
+                ignore=[large.frame] if large.frame is not None else ()
+            )
+            res.append((large, chains, complete))
+        return res
+
+    # Print the referrers of the largest objects
+    def __call__(self, signum, frame):
+        self._write('\nREFERRERS\n')
+        for large, chains, complete in self.explain(frame):
+            self._write('{}\t{}\t{}\n'.format(
+                large.description, type(large.obj).__name__, format_bytes(large.size)
+            ))
+            for chain in chains:
+                self._write('\t{}\n'.format(chain))
+            if not chains:
+                self._write('\tno other referrers found\n')
+            if not complete:
+                self._write('\t(search stopped at a limit)\n')
+        self.OUTPUT.flush()
+
+
+class SigInfoLoopLag(SiginfoBasic):
+    """
+    SigInfo class that monitors the lag of an asyncio event loop
+
+    A heartbeat on the loop measures how late its callbacks run.
+    When the loop is blocked for longer than ``threshold`` a watchdog
+    thread captures the stack of the loop thread. On signal the lag
+    histogram and the stacks of the worst stalls are printed.
+    Asyncio's debug mode is not needed.
+
+    Args
+    ----
+    interval : float
+        Seconds between two heartbeats
+        Default: 0.1
+    threshold : float
+        Lag in seconds that counts as stall
+        Default: 0.1
+
+    Attributes
+    ----------
+    monitor : :class:`siginfo.looplag.LoopLagMonitor`
+
+    Example
+    -------
+        ::
+
+            foo = SigInfoLoopLag(usr1=True, threshold=0.05)
+
+            async def main():
+                foo.start()
+                await serve()
+
+            asyncio.run(main())
+
+        .. code-block:: bash
+
+            kill -s USR1 ${pid}
+
+            # Output:
+            LOOP LAG    beats 19 interval 20ms threshold 50ms
+            LAG p50 <256us p90 <2ms p99 <524.3ms max 297.5ms
+                <   256us   15
+                <   512us   2
+                <     2ms   1
+                < 524.3ms   1
+            STALL   lag 0.298s at 12:43:37
+              File "server.py", line 10, in handle
+                blocking()
+              File "server.py", line 6, in blocking
+                time.sleep(0.3)
+
+    """
+    def __init__(self, info=True, usr1=True, usr2=False, output=None,
+                 interval=0.1, threshold=0.1):
+        from siginfo.looplag import LoopLagMonitor
+
+        super().__init__(info=info, usr1=usr1, usr2=usr2, output=output)
+        self.monitor = LoopLagMonitor(interval, threshold)
+
+    def start(self, loop=None):
+        """
+        Starts monitoring ``loop``, see :meth:`siginfo.looplag.LoopLagMonitor.start`
+        """
+        self.monitor.start(loop)
+
+    def stop(self):
+        """
+        Stops monitoring
+
+        Returns
+        -------
+        None
+        """
+        self.monitor.stop()
+
+    # Print the lag histogram and the worst stalls
+    def __call__(self, signum, frame):
+        self._write('\n{}\n'.format(self.monitor.report()))
+        self.OUTPUT.flush()
+
+
+class SigInfoGil(SiginfoBasic):
+    """
+    SigInfo class that probes GIL contention on demand
+
+    The first signal starts a :class:`siginfo.gilprobe.GilProbe` for
+    ``duration`` seconds. It measures how late a sleeping thread
+    wakes up, which is the time it waits for the GIL, and samples
+    the stacks of the threads that ran in the meantime. A signal
+    while the probe runs prints the report so far, the final report
+    is printed when the probe stops.
+
+    Args
+    ----
+    interval : float
+        Seconds the probe sleeps between two measurements
+        Default: 0.005
+    duration : float
+        Seconds the probe runs after a signal
+        Default: 10
+    max_overhead : float
+        Maximum share of the time spent sampling stacks
+        Default: 0.02
+
+    Attributes
+    ----------
+    probe : :class:`siginfo.gilprobe.GilProbe`
+    DURATION : float
+        Same as ``duration``
+    TOP_N : int
+        Number of stacks in the report
+        Default: 5
+
+    Example
+    -------
+        ::
+
+            foo = SigInfoGil(usr1=True, duration=5)
+
+        .. code-block:: bash
+
+            kill -s USR1 ${pid}
+
+            # Output after 5 seconds:
+            GIL PROBE   measurements 874 samples 861 skipped 13 interval 5ms overhead 1.8%
+            LATE    p50 <512us p90 <4.1ms p99 <8.2ms max 6.3ms
+            THREADS running share of samples
+                 71.3%  worker-1 (614 of 861, cpu 3.62s)
+                  0.5%  MainThread (4 of 861, cpu 0.02s)
+            RUNNING 70.8% of samples, late 1.9s
+              File "worker.py", line 12, in parse
+                rows.append(decode(line))
+
+    """
+    def __init__(self, info=True, usr1=True, usr2=False, output=None,
+                 interval=0.005, duration=10.0, max_overhead=0.02):
+        from siginfo.gilprobe import GilProbe
+
+        super().__init__(info=info, usr1=usr1, usr2=usr2, output=output)
+        self.DURATION = duration
+        self.TOP_N = 5
+        self.probe = GilProbe(interval, max_overhead)
+        self.probe.on_finish = self._print_report
+
+    def _print_report(self, probe):
+        self._write('\n{}\n'.format(probe.report(self.TOP_N)))
+        self.OUTPUT.flush()
+
+    def unbind(self):
+        super().unbind()
+        self.probe.stop()
+
+    # Start the probe or print the report so far
+    def __call__(self, signum, frame):
+        if self.probe.running:
+            self._print_report(self.probe)
+            return
+        self.probe.start(self.DURATION)
+        self._write('\nGIL PROBE\tstarted for {}s\n'.format(self.DURATION))
+        self.OUTPUT.flush()
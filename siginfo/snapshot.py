@@ -0,0 +1,281 @@
+import collections
+import json
+import types
+from operator import itemgetter
+
+
+# Policies for the locals of module level frames (the module's globals):
+# 'skip' no locals, 'names' names and types only,
+# 'values' no functions, classes or modules, 'all' everything
+MODULE_POLICIES = ('skip', 'names', 'values', 'all')
+
+
+class LocalSnapshot(tuple):
+    """
+    A local variable at the time of capture: ``(name, type name, text)``
+
+    ``text`` is the summary or ``str`` of the value. The value itself
+    is not referenced, so snapshots can be kept without keeping
+    objects alive.
+    """
+    __slots__ = ()
+
+    def __new__(cls, name, type_name, text):
+        return tuple.__new__(cls, (name, type_name, text))
+
+    name = property(itemgetter(0))
+    type_name = property(itemgetter(1))
+    text = property(itemgetter(2))
+
+    def __repr__(self):
+        return 'LocalSnapshot({!r}, {!r}, {!r})'.format(*self)
+
+
+class FrameSnapshot:
+    """
+    A stack frame at the time of capture
+
+    Only the code objects of the frame and its caller are referenced,
+    not the frames themselves.
+
+    Attributes
+    ----------
+    level : int
+        Position in the stack, 0 is the innermost frame
+    code : code
+        Code object of the frame
+    lineno : int
+        Currently executed line
+    caller : code
+        Code object of the calling frame, ``None`` for the outermost frame
+    locals : tuple
+        :class:`LocalSnapshot` of every local variable, ``None`` if
+        locals were not captured
+
+    """
+    __slots__ = ('level', 'code', 'lineno', 'caller', 'locals')
+
+    def __init__(self, level, code, lineno, caller=None, local_vars=None):
+        self.level = level
+        self.code = code
+        self.lineno = lineno
+        self.caller = caller
+        self.locals = local_vars
+
+    def __repr__(self):
+        return '<FrameSnapshot {} {}:{}>'.format(self.level, self.name, self.lineno)
+
+    @property
+    def name(self):
+        return self.code.co_name
+
+    @property
+    def filename(self):
+        return getattr(self.code, 'co_filename', None)
+
+    def to_dict(self):
+        """
+        JSON serializable representation
+
+        Returns
+        -------
+        : dict
+
+        """
+        return {
+            'level': self.level,
+            'name': self.name,
+            'filename': self.filename,
+            'lineno': self.lineno,
+            'caller': self.caller.co_name if self.caller is not None else None,
+            'locals': None if self.locals is None else [
+                {'name': name, 'type': type_name, 'value': text}
+                for name, type_name, text in self.locals
+            ],
+        }
+
+
+def format_value(value, summarize=None):
+    """
+    Text of a value for display
+
+    Args
+    ----
+    value
+    summarize : callable
+        Returns a summary string or ``None`` to use ``str(value)``
+
+    Returns
+    -------
+    : str
+
+    """
+    if summarize is not None:
+        summary = summarize(value)
+        if summary is not None:
+            return summary
+    return str(value)
+
+
+# Functions, methods, classes and modules, other callables like
+# ``functools.partial`` objects or instances with ``__call__`` are data
+_CODE_TYPES = (
+    types.FunctionType, types.BuiltinFunctionType, types.MethodType, type, types.ModuleType
+)
+
+
+def _is_code_or_module(value):
+    return isinstance(value, _CODE_TYPES)
+
+
+def _interest(item):
+    """
+    Sort key: user variables first, then private names,
+    dunder names and finally functions, classes and modules
+    """
+    name, value = item
+    return _is_code_or_module(value), name.startswith('__'), name.startswith('_')
+
+
+def capture_locals(local_vars, summarize=None, max_locals=None, module_policy=None):
+    """
+    Converts local variables to a tuple of :class:`LocalSnapshot`
+
+    With ``max_locals`` variables are ordered by interest: user
+    variables first, then private and dunder names, then functions,
+    classes and modules. Only the variables that are kept are formatted.
+
+    Args
+    ----
+    local_vars : dict
+    summarize : callable
+        See :func:`format_value`
+    max_locals : int
+        Maximum number of variables. If there are more, the last
+        entry is ``('...', '', '<n> more')``
+        Default: None (all variables)
+    module_policy : str
+        ``'names'`` or ``'values'`` for module level frames,
+        see ``MODULE_POLICIES``
+        Default: None (all variables with values)
+
+    Returns
+    -------
+    : tuple
+
+    """
+    items = list(local_vars.items())
+    if module_policy == 'values':
+        items = [
+            item for item in items
+            if not item[0].startswith('__') and not _is_code_or_module(item[1])
+        ]
+    hidden = 0
+    if max_locals is not None:
+        items.sort(key=_interest)
+        if len(items) > max_locals:
+            hidden = len(items) - max_locals
+            items = items[:max_locals]
+    if module_policy == 'names':
+        res = [LocalSnapshot(name, type(value).__name__, '') for name, value in items]
+    else:
+        res = [
+            LocalSnapshot(name, type(value).__name__, format_value(value, summarize))
+            for name, value in items
+        ]
+    if hidden:
+        res.append(LocalSnapshot('...', '', '{} more'.format(hidden)))
+    return tuple(res)
+
+
+def is_module_frame(frame):
+    """
+    ``True`` for frames that execute module level code
+    """
+    return frame.f_code.co_name == '<module>'
+
+
+def capture_frame(frame, level=0, summarize=None, with_locals=True,
+                  max_locals=None, module_policy='all'):
+    """
+    Captures a single frame
+
+    Args
+    ----
+    frame : frame
+    level : int
+        Position of the frame in the stack
+    summarize : callable
+        See :func:`format_value`
+    with_locals : bool
+        Capture the local variables
+    max_locals : int
+        See :func:`capture_locals`
+    module_policy : str
+        How to capture the locals of module level frames,
+        one of ``MODULE_POLICIES``
+        Default: 'all'
+
+    Returns
+    -------
+    : :class:`FrameSnapshot`
+
+    """
+    if module_policy not in MODULE_POLICIES:
+        raise ValueError('Unknown module policy {!r}'.format(module_policy))
+    policy = None
+    if with_locals and is_module_frame(frame):
+        if module_policy == 'skip':
+            with_locals = False
+        elif module_policy != 'all':
+            policy = module_policy
+    back = frame.f_back
+    return FrameSnapshot(
+        level,
+        frame.f_code,
+        frame.f_lineno,
+        back.f_code if back else None,
+        capture_locals(frame.f_locals, summarize, max_locals, policy) if with_locals else None
+    )
+
+
+def render_json(snapshots, **kwargs):
+    """
+    Renders frame snapshots as a JSON array
+
+    Args
+    ----
+    snapshots : list
+        :class:`FrameSnapshot` instances
+    kwargs
+        Passed to ``json.dumps``
+
+    Returns
+    -------
+    : str
+
+    """
+    return json.dumps([snapshot.to_dict() for snapshot in snapshots], **kwargs)
+
+
+def aggregate(stacks):
+    """
+    Counts how often each code location appears in several stacks
+
+    Args
+    ----
+    stacks : iterable
+        Lists of :class:`FrameSnapshot`, e.g. of repeated dumps
+
+    Returns
+    -------
+    : collections.Counter
+        ``{(filename, function name, line): count}``
+
+    """
+    counts = collections.Counter()
+    for stack in stacks:
+        counts.update(set(
+            (snapshot.filename, snapshot.name, snapshot.lineno) for snapshot in stack
+        ))
+    return counts
@@ -0,0 +1,388 @@
+import io
+import os
+import pickle
+import reprlib
+import struct
+import sys
+import time
+
+from siginfo.snapshot import _is_code_or_module, is_module_frame
+
+
+MAGIC = b'SIGINFO\x00'
+VERSION = 1
+
+# Pickle protocol 4 can be read by all supported Python versions
+PICKLE_PROTOCOL = 4
+
+# Locals larger than this (pickled) are stored as bounded repr
+MAX_VALUE_SIZE = 1024 * 1024
+
+# After this many bytes all further locals are stored without value
+MAX_FILE_SIZE = 64 * 1024 * 1024
+
+RECORD_META = 1
+RECORD_FRAME = 2
+RECORD_END = 3
+
+_record_header = struct.Struct('>BI')
+_version_header = struct.Struct('>H')
+
+_repr = reprlib.Repr()
+_repr.maxstring = 200
+_repr.maxother = 200
+_repr.maxlevel = 3
+
+
+class _TooLarge(Exception):
+    pass
+
+
+class _LimitedBuffer(io.BytesIO):
+    """
+    Aborts pickling as soon as the output exceeds ``limit``
+    so huge objects are never fully serialized
+    """
+    def __init__(self, limit):
+        super().__init__()
+        self.limit = limit
+
+    def write(self, data):
+        if self.tell() + len(data) > self.limit:
+            raise _TooLarge()
+        return super().write(data)
+
+
+class UnpicklableValue:
+    """
+    Placeholder for a local variable that could not be pickled
+    or unpickled
+
+    Attributes
+    ----------
+    type_name : str
+        Name of the original type
+    text : str
+        Bounded ``repr`` of the original value
+    reason : str
+        Why the value was not restored
+
+    """
+    __slots__ = ('type_name', 'text', 'reason')
+
+    def __init__(self, type_name, text, reason):
+        self.type_name = type_name
+        self.text = text
+        self.reason = reason
+
+    def __repr__(self):
+        return '<{} {} ({})>'.format(self.type_name, self.text, self.reason)
+
+
+class SnapshotFrame:
+    """
+    One stack frame of a loaded snapshot
+
+    Attributes
+    ----------
+    level : int
+        Position in the stack, 0 is the innermost frame
+    name : str
+        Name of the function
+    filename : str
+    lineno : int
+        Currently executed line
+    firstlineno : int
+        First line of the function
+    locals : dict
+        Restored local variables. Values that could not be restored
+        are :class:`UnpicklableValue` instances.
+
+    """
+    __slots__ = ('level', 'name', 'filename', 'lineno', 'firstlineno', 'locals')
+
+    def __init__(self, level, name, filename, lineno, firstlineno, local_vars):
+        self.level = level
+        self.name = name
+        self.filename = filename
+        self.lineno = lineno
+        self.firstlineno = firstlineno
+        self.locals = local_vars
+
+    def __repr__(self):
+        return '<SnapshotFrame {} {} {}:{}>'.format(
+            self.level, self.name, self.filename, self.lineno
+        )
+
+
+class Snapshot:
+    """
+    A loaded snapshot file
+
+    Attributes
+    ----------
+    meta : dict
+        ``pid``, ``time``, ``python``, ``argv`` and ``signal``
+    frames : list
+        :class:`SnapshotFrame` from innermost to outermost
+    complete : bool
+        ``False`` if the file was truncated, e.g. because the
+        process died while writing it
+
+    """
+    def __init__(self, meta, frames, complete):
+        self.meta = meta
+        self.frames = frames
+        self.complete = complete
+
+    def __repr__(self):
+        return '<Snapshot pid={} frames={}{}>'.format(
+            self.meta.get('pid'), len(self.frames), '' if self.complete else ' truncated'
+        )
+
+    def __getitem__(self, level):
+        return self.frames[level]
+
+    def __len__(self):
+        return len(self.frames)
+
+
+class SnapshotWriter:
+    """
+    Streams stack frames into a versioned binary snapshot file
+
+    The file starts with ``MAGIC`` and the format version, followed by
+    records of ``(type: uint8, length: uint32, pickled payload)``.
+    Every frame is written as soon as it is captured. Each local
+    variable is pickled on its own, values that can't be pickled or
+    exceed ``MAX_VALUE_SIZE`` are stored as a bounded ``repr``. Once
+    the values written so far, including those of the current frame,
+    reach ``max_file_size``, further locals are stored with their
+    name and type only.
+
+    Args
+    ----
+    fh : binary file object
+        Where to write the snapshot to
+    max_value_size : int
+        Maximum pickled size of a single local variable
+    max_file_size : int
+        Size after which no more values are stored
+
+    Example
+    -------
+        ::
+
+            with open('stack.snap', 'wb') as fh:
+                writer = SnapshotWriter(fh)
+                writer.write_meta(signum=10)
+                for level, frame in enumerate(frames):
+                    writer.write_frame(level, frame)
+                writer.close()
+
+    """
+    def __init__(self, fh, max_value_size=MAX_VALUE_SIZE, max_file_size=MAX_FILE_SIZE):
+        self.fh = fh
+        self.max_value_size = max_value_size
+        self.max_file_size = max_file_size
+        self.size = 0
+        self._write(MAGIC + _version_header.pack(VERSION))
+
+    def _write(self, data):
+        self.fh.write(data)
+        self.size += len(data)
+
+    def _record(self, kind, payload):
+        data = pickle.dumps(payload, PICKLE_PROTOCOL)
+        self._write(_record_header.pack(kind, len(data)))
+        self._write(data)
+
+    def write_meta(self, signum=None, **extra):
+        """
+        Writes information about the process
+
+        Args
+        ----
+        signum : int
+            The signal that triggered the snapshot
+        extra
+            Additional items to store
+
+        Returns
+        -------
+        None
+
+        """
+        meta = {
+            'pid': os.getpid(),
+            'time': time.time(),
+            'python': sys.version,
+            'argv': list(sys.argv),
+            'signal': signum,
+        }
+        meta.update(extra)
+        self._record(RECORD_META, meta)
+
+    def _value(self, value, used=0):
+        """
+        Pickled value or bounded repr and the number of bytes it adds,
+        ``used`` bytes of the current frame are not written yet
+        """
+        available = self.max_file_size - self.size - used
+        remaining = min(self.max_value_size, available)
+        if remaining > 0:
+            buf = _LimitedBuffer(remaining)
+            try:
+                pickle.Pickler(buf, PICKLE_PROTOCOL).dump(value)
+                data = buf.getvalue()
+                return ('pickle', data), len(data)
+            except _TooLarge:
+                reason = 'too large'
+            except Exception as err:
+                reason = 'not picklable: {}'.format(type(err).__name__)
+        else:
+            reason = 'file size limit'
+        text = ''
+        if available > 0:
+            try:
+                text = _repr.repr(value)[:available]
+            except Exception:
+                text = '?'
+        return ('repr', type(value).__name__, text, reason), len(text)
+
+    def write_frame(self, level, frame, module_policy='all'):
+        """
+        Writes one stack frame with its local variables
+
+        Args
+        ----
+        level : int
+            Position of the frame in the stack
+        frame : frame
+        module_policy : str
+            Locals of module level frames, see
+            :data:`siginfo.snapshot.MODULE_POLICIES`: ``'skip'``,
+            ``'names'`` (names and types only), ``'values'`` (no
+            callables or modules) or ``'all'``
+            Default: 'all'
+
+        Returns
+        -------
+        None
+
+        """
+        code = frame.f_code
+        local_vars = list(frame.f_locals.items())
+        module = is_module_frame(frame)
+        if module and module_policy == 'skip':
+            local_vars = []
+        elif module and module_policy == 'values':
+            local_vars = [
+                (name, value) for name, value in local_vars if not _is_code_or_module(value)
+            ]
+        names_only = module and module_policy == 'names'
+        values = {}
+        used = 0
+        for name, value in local_vars:
+            if names_only:
+                values[name] = ('repr', type(value).__name__, '', 'module frame')
+                continue
+            values[name], size = self._value(value, used)
+            used += size + len(name)
+        self._record(RECORD_FRAME, {
+            'level': level,
+            'name': code.co_name,
+            'filename': getattr(code, 'co_filename', None),
+            'lineno': frame.f_lineno,
+            'firstlineno': getattr(code, 'co_firstlineno', None),
+            'locals': values,
+        })
+
+    def close(self):
+        """
+        Marks the snapshot as complete and flushes the file
+
+        Returns
+        -------
+        None
+
+        """
+        self._record(RECORD_END, None)
+        self.fh.flush()
+
+
+def _restore(value):
+    if value[0] == 'pickle':
+        try:
+            return pickle.loads(value[1])
+        except Exception as err:
+            return UnpicklableValue('?', '', 'not unpicklable: {}'.format(type(err).__name__))
+    _, type_name, text, reason = value
+    return UnpicklableValue(type_name, text, reason)
+
+
+def load_snapshot(path):
+    """
+    Loads a snapshot file for offline analysis
+
+    Local variables are restored with ``pickle``: loading a file runs
+    the code it contains. Never load a ``.snap`` file from an untrusted
+    source or from a directory other users can write to.
+
+    Args
+    ----
+    path : str
+        Path to the snapshot file
+
+    Returns
+    -------
+    : :class:`Snapshot`
+
+    Raises
+    ------
+    ValueError
+        If the file is not a siginfo snapshot or has an unknown version
+
+    Example
+    -------
+        ::
+
+            snap = load_snapshot('/tmp/siginfo-1234-1700000000.snap')
+            snap[0].locals['line']
+
+    """
+    with open(path, 'rb') as fh:
+        header = fh.read(len(MAGIC) + _version_header.size)
+        if header[:len(MAGIC)] != MAGIC:
+            raise ValueError('{} is not a siginfo snapshot'.format(path))
+        version, = _version_header.unpack(header[len(MAGIC):])
+        if version > VERSION:
+            raise ValueError('Unsupported snapshot version {}'.format(version))
+
+        meta = {}
+        frames = []
+        complete = False
+        while True:
+            head = fh.read(_record_header.size)
+            if len(head) < _record_header.size:
+                break
+            kind, length = _record_header.unpack(head)
+            data = fh.read(length)
+            if len(data) < length:
+                break
+            payload = pickle.loads(data)
+            if kind == RECORD_META:
+                meta = payload
+            elif kind == RECORD_FRAME:
+                frames.append(SnapshotFrame(
+                    payload['level'],
+                    payload['name'],
+                    payload['filename'],
+                    payload['lineno'],
+                    payload['firstlineno'],
+                    {name: _restore(value) for name, value in payload['locals'].items()}
+                ))
+            elif kind == RECORD_END:
+                complete = True
+                break
+    return Snapshot(meta, frames, complete)
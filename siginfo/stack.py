@@ -0,0 +1,105 @@
+# Longest sequence of frames that is detected as one recursive pattern
+MAX_PATTERN_LENGTH = 8
+
+# Minimum number of repetitions of a pattern to collapse it
+MIN_REPEATS = 3
+
+
+def walk_stack(frame, depth):
+    """
+    Collects a frame and its parents
+
+    Args
+    ----
+    frame : frame
+        The innermost frame
+    depth : int
+        Maximum number of frames
+
+    Returns
+    -------
+    : list
+        Frames from the innermost to the outermost
+
+    """
+    frames = []
+    while frame and len(frames) < depth:
+        frames.append(frame)
+        frame = frame.f_back
+    return frames
+
+
+def stack_depth(frame):
+    """
+    Number of frames from ``frame`` to the outermost frame of its stack
+
+    Only follows ``f_back``, no locals are read.
+
+    Returns
+    -------
+    : int
+
+    """
+    depth = 0
+    while frame is not None:
+        depth += 1
+        frame = frame.f_back
+    return depth
+
+
+def frame_key(frame):
+    """
+    Identity of a frame's position in the code: ``(code object, line)``
+    """
+    return frame.f_code, frame.f_lineno
+
+
+def find_runs(keys, max_pattern=MAX_PATTERN_LENGTH, min_repeats=MIN_REPEATS):
+    """
+    Groups a sequence into runs of a repeated pattern
+
+    Used to collapse recursion: ``a b c b c b c d`` consists of the
+    single item ``a``, the pattern ``b c`` repeated three times and
+    the single item ``d``.
+
+    Args
+    ----
+    keys : list
+        Hashable items, e.g. :func:`frame_key` of each frame
+    max_pattern : int
+        Longest pattern that is detected
+    min_repeats : int
+        Minimum number of consecutive repetitions of a pattern
+
+    Returns
+    -------
+    : list
+        ``(start, pattern length, repeats)`` tuples that cover ``keys``
+        in order. Items that are not part of a run have pattern length
+        and repeats of 1.
+
+    Example
+    -------
+        ::
+
+            find_runs(['a', 'b', 'c', 'b', 'c', 'b', 'c', 'd'])
+            # => [(0, 1, 1), (1, 2, 3), (7, 1, 1)]
+
+    """
+    runs = []
+    idx = 0
+    total = len(keys)
+    while idx < total:
+        best_length, best_repeats = 1, 1
+        for length in range(1, min(max_pattern, (total - idx) // min_repeats) + 1):
+            pattern = keys[idx:idx + length]
+            repeats = 1
+            start = idx + length
+            while keys[start:start + length] == pattern:
+                repeats += 1
+                start += length
+            if repeats >= min_repeats and repeats * length > best_repeats * best_length:
+                best_length, best_repeats = length, repeats
+        runs.append((idx, best_length, best_repeats))
+        idx += best_length * best_repeats
+    return runs
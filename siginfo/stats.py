@@ -0,0 +1,173 @@
+from array import array
+
+from siginfo.utils import format_bytes
+
+
+# Number of power-of-two microsecond buckets of the pause histogram,
+# the last bucket collects all pauses of 2**22 µs (4.2s) and longer
+PAUSE_BUCKETS = 24
+
+
+def bucket(duration_ns):
+    """
+    Histogram bucket of a duration: ``i`` for durations shorter than
+    ``2**i`` µs and at least ``2**(i-1)`` µs
+    """
+    res = (duration_ns // 1000).bit_length()
+    return res if res < PAUSE_BUCKETS else PAUSE_BUCKETS - 1
+
+
+def percentile(counts, fraction):
+    """
+    Upper bound of a percentile of a histogram in µs,
+    ``None`` if the histogram is empty
+    """
+    total = sum(counts)
+    if not total:
+        return None
+    threshold = fraction * total
+    count = 0
+    for index, value in enumerate(counts):
+        count += value
+        if count >= threshold:
+            return 1 << index
+    return 1 << (PAUSE_BUCKETS - 1)
+
+
+def format_us(value):
+    """
+    Formats a duration in microseconds, e.g. ``'512us'``, ``'2ms'`` or ``'4s'``
+    """
+    if value < 1000:
+        return '{}us'.format(value)
+    if value < 1000000:
+        return '{:g}ms'.format(round(value / 1000.0, 1))
+    return '{:g}s'.format(round(value / 1000000.0, 1))
+
+
+class HandlerStats:
+    """
+    Metrics of a siginfo instance about itself
+
+    All counters are preallocated, recording an event does not
+    allocate containers. Times are recorded in nanoseconds.
+
+    Attributes
+    ----------
+    signals : int
+        Number of received signals
+    dumps : int
+        Number of completed dumps
+    coalesced : int
+        Signals that arrived while a dump was running and were
+        merged into that dump
+    dropped : int
+        Dumps that were aborted by an exception
+    bytes : int
+        Number of characters written to the output
+    capture_ns : int
+        Time spent capturing frames
+    render_ns : int
+        Time spent formatting the dump (without writing)
+    write_ns : int
+        Time spent in ``OUTPUT.write``
+    pause_ns : int
+        Total time spent in the signal handler
+    pauses : array
+        Histogram of pause times: bucket ``i`` counts the pauses
+        shorter than ``2**i`` µs (and at least ``2**(i-1)`` µs)
+
+    """
+    __slots__ = (
+        'signals', 'dumps', 'coalesced', 'dropped', 'bytes',
+        'capture_ns', 'render_ns', 'write_ns', 'pause_ns', 'pauses'
+    )
+
+    def __init__(self):
+        self.signals = 0
+        self.dumps = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.bytes = 0
+        self.capture_ns = 0
+        self.render_ns = 0
+        self.write_ns = 0
+        self.pause_ns = 0
+        self.pauses = array('L', [0]) * PAUSE_BUCKETS
+
+    def record_pause(self, duration_ns):
+        """
+        Adds one handler call to the pause histogram
+
+        Args
+        ----
+        duration_ns : int
+
+        Returns
+        -------
+        None
+
+        """
+        self.pause_ns += duration_ns
+        self.pauses[bucket(duration_ns)] += 1
+
+    def percentile(self, fraction):
+        """
+        Upper bound of the pause time percentile
+
+        Args
+        ----
+        fraction : float
+            e.g. 0.99 for the 99th percentile
+
+        Returns
+        -------
+        : int
+            Microseconds, ``None`` if nothing was recorded
+
+        """
+        return percentile(self.pauses, fraction)
+
+    def as_dict(self):
+        """
+        All metrics
+
+        Returns
+        -------
+        : dict
+            The attributes, ``pauses`` as ``{upper bound in µs: count}``
+            of all non-empty buckets
+
+        """
+        res = {name: getattr(self, name) for name in self.__slots__ if name != 'pauses'}
+        res['pauses'] = {
+            1 << index: count for index, count in enumerate(self.pauses) if count
+        }
+        return res
+
+    def report(self, running=0):
+        """
+        One line summary
+
+        Args
+        ----
+        running : int
+            Dumps in progress that are counted as dumps
+            Default: 0
+
+        Returns
+        -------
+        : str
+
+        """
+        res = 'signals {} dumps {} coalesced {} dropped {} written {}'.format(
+            self.signals, self.dumps + running, self.coalesced, self.dropped,
+            format_bytes(self.bytes)
+        )
+        if any(self.pauses):
+            res += ' pause p50 <{} p99 <{} max <{}'.format(
+                format_us(self.percentile(0.5)),
+                format_us(self.percentile(0.99)),
+                format_us(self.percentile(1.0))
+            )
+        return res
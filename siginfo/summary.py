@@ -0,0 +1,421 @@
+import _io
+import collections
+import csv
+import io
+import os
+import reprlib
+import stat
+import sys
+import time
+
+from siginfo.utils import format_bytes
+
+
+# Number of file positions to remember for rate calculation
+MAX_TRACKED_FILES = 256
+
+# Number of items shown for large containers
+MAX_ITEMS = 3
+
+# Containers and strings up to this length are displayed unchanged
+MAX_PLAIN_LENGTH = 200
+
+# Number of elements used to estimate min/max of large arrays
+ARRAY_SAMPLE_SIZE = 10000
+
+_range_iterator = type(iter(range(0)))
+_long_range_iterator = type(iter(range(1 << 64)))
+_list_iterator = type(iter([]))
+_tuple_iterator = type(iter(()))
+_csv_reader = type(csv.reader(()))
+
+
+class IOProgress:
+    """
+    Summarizes how far file handles and iterators have progressed
+
+    Open files are reported with their position relative to the file
+    size and the read rate since the previous summary of the same file.
+    ``range``, ``list`` and ``tuple`` iterators, ``enumerate`` objects
+    and ``csv.reader`` objects are reported with their position.
+
+    The position of files is read via ``os.lseek`` on the file
+    descriptor, so buffered and text objects are not touched.
+
+    Instances are callables that return ``None`` for all other values.
+
+    Example
+    -------
+        ::
+
+            summarize = IOProgress()
+            summarize(open('many_rows.txt'))
+            # => "many_rows.txt mode='r' 45.2% (482.1 MB / 1.0 GB) 12.3 MB/s"
+
+            it = iter(range(100))
+            next(it)
+            summarize(it)
+            # => 'range_iterator 1/100 (1.0%) next=1'
+
+    """
+    def __init__(self):
+        self._previous = collections.OrderedDict()
+
+    def __call__(self, value):
+        try:
+            if isinstance(value, io.IOBase):
+                return self.file(value)
+            if isinstance(value, _csv_reader):
+                return self.csv_reader(value)
+            if isinstance(value, enumerate):
+                return self.enumerate(value)
+            if isinstance(value, (_range_iterator, _long_range_iterator)):
+                return self.range_iterator(value)
+            if isinstance(value, (_list_iterator, _tuple_iterator)):
+                return self.sequence_iterator(value)
+        except Exception:
+            return None
+        return None
+
+    def file(self, value):
+        """
+        Summarizes an open file object
+
+        Args
+        ----
+        value : io.IOBase
+
+        Returns
+        -------
+        : str
+            ``None`` for closed files and objects without file descriptor
+
+        """
+        if value.closed:
+            return None
+        try:
+            fd = value.fileno()
+        except (OSError, ValueError):
+            return None
+        info = os.fstat(fd)
+        name = getattr(value, 'name', fd)
+        mode = getattr(value, 'mode', '')
+        parts = ['{} mode={!r}'.format(name, mode)]
+        if not stat.S_ISREG(info.st_mode):
+            return parts[0]
+        position = os.lseek(fd, 0, os.SEEK_CUR)
+        if 'r' in mode and info.st_size:
+            parts.append('{:.1f}% ({} / {})'.format(
+                100.0 * position / info.st_size,
+                format_bytes(position),
+                format_bytes(info.st_size)
+            ))
+        else:
+            parts.append(format_bytes(position))
+        rate = self._rate((id(value), info.st_dev, info.st_ino), position)
+        if rate is not None:
+            parts.append('{}/s'.format(format_bytes(rate)))
+        return ' '.join(parts)
+
+    def _rate(self, key, position):
+        now = time.monotonic()
+        previous = self._previous.pop(key, None)
+        self._previous[key] = (now, position)
+        if len(self._previous) > MAX_TRACKED_FILES:
+            self._previous.popitem(last=False)
+        if previous is None or now <= previous[0]:
+            return None
+        return (position - previous[1]) / (now - previous[0])
+
+    def csv_reader(self, value):
+        """
+        Summarizes a ``csv.reader`` with its current line number
+
+        Returns
+        -------
+        : str
+
+        """
+        return 'csv.reader line {}'.format(value.line_num)
+
+    def enumerate(self, value):
+        """
+        Summarizes an ``enumerate`` object and the iterator it wraps
+
+        Returns
+        -------
+        : str
+
+        """
+        _, (iterator, count) = value.__reduce__()[:2]
+        inner = self(iterator)
+        res = 'enumerate index={}'.format(count)
+        return '{} of {}'.format(res, inner) if inner else res
+
+    def range_iterator(self, value):
+        """
+        Summarizes an iterator over a ``range``
+
+        Returns
+        -------
+        : str
+
+        """
+        reduced = value.__reduce__()
+        remaining = reduced[1][0]
+        position = reduced[2] if len(reduced) > 2 else None
+        if position is not None:
+            # Python < 3.12 keeps the full range and the position
+            total = len(remaining)
+            remaining = remaining[position:]
+            res = 'range_iterator {}/{} ({:.1f}%)'.format(
+                position, total, 100.0 * position / total if total else 100.0
+            )
+        else:
+            res = 'range_iterator {} remaining'.format(len(remaining))
+        if remaining:
+            res += ' next={}'.format(remaining[0])
+        return res
+
+    def sequence_iterator(self, value):
+        """
+        Summarizes an iterator over a ``list`` or ``tuple``
+
+        Returns
+        -------
+        : str
+
+        """
+        reduced = value.__reduce__()
+        sequence = reduced[1][0]
+        if len(reduced) < 3:
+            return '{} exhausted'.format(type(value).__name__)
+        total = len(sequence)
+        return '{} {}/{} ({:.1f}%)'.format(
+            type(value).__name__,
+            reduced[2],
+            total,
+            100.0 * reduced[2] / total if total else 100.0
+        )
+
+
+class SummarizerRegistry:
+    """
+    Maps types to functions that summarize their values for display
+
+    Summarizers are looked up along the MRO of a value's type and the
+    result is cached per type, so dispatch costs one dict lookup for
+    every type that was seen before.
+
+    Types can be registered by their dotted name (e.g. ``"numpy.ndarray"``).
+    Such registrations never import anything, they are resolved once
+    the module is present in ``sys.modules``.
+
+    Summarizers are called with the value and return a string or ``None``
+    to fall back to ``str(value)``. Exceptions inside a summarizer are
+    swallowed and also fall back to ``str(value)``.
+
+    Example
+    -------
+        ::
+
+            from siginfo.summary import summarizers
+
+            @summarizers.register('mypackage.models.Model')
+            def summarize_model(model):
+                return 'Model {} ({} params)'.format(model.name, model.n_params)
+
+    """
+    def __init__(self):
+        self._types = {}
+        self._names = {}
+        self._cache = {}
+
+    def register(self, cls, func=None):
+        """
+        Registers a summarizer for a type and all its subclasses
+
+        Can be used as a decorator if ``func`` is omitted.
+
+        Args
+        ----
+        cls : type or str
+            The type or its dotted name ``"module.Class"``
+        func : callable
+            Called with the value, returns ``str`` or ``None``
+
+        Returns
+        -------
+        : callable
+            ``func``
+
+        """
+        if func is None:
+            return lambda func: self.register(cls, func)
+        if isinstance(cls, str):
+            self._names[cls] = func
+        else:
+            self._types[cls] = func
+        self._cache.clear()
+        return func
+
+    def _resolve_names(self):
+        for name in list(self._names):
+            module_name, _, attr = name.rpartition('.')
+            module = sys.modules.get(module_name)
+            if module is None:
+                continue
+            cls = getattr(module, attr, None)
+            func = self._names.pop(name)
+            if isinstance(cls, type):
+                self._types.setdefault(cls, func)
+
+    def dispatch(self, cls):
+        """
+        Finds the summarizer for a type
+
+        Args
+        ----
+        cls : type
+
+        Returns
+        -------
+        : callable
+            ``None`` if no summarizer is registered for ``cls``
+            or any of its base classes
+
+        """
+        try:
+            return self._cache[cls]
+        except KeyError:
+            pass
+        if self._names:
+            self._resolve_names()
+        func = None
+        for base in cls.__mro__:
+            func = self._types.get(base)
+            if func is not None:
+                break
+        self._cache[cls] = func
+        return func
+
+    def __call__(self, value):
+        func = self.dispatch(type(value))
+        if func is None:
+            return None
+        try:
+            return func(value)
+        except Exception:
+            return None
+
+
+_repr = reprlib.Repr()
+_repr.maxlevel = 2
+_repr.maxstring = 40
+_repr.maxother = 40
+for _attr in ('maxlist', 'maxtuple', 'maxdict', 'maxset', 'maxfrozenset', 'maxdeque'):
+    setattr(_repr, _attr, MAX_ITEMS)
+
+
+def summarize_container(value):
+    """
+    Length and the first items of large lists, tuples, dicts and sets
+
+    Returns
+    -------
+    : str
+        ``None`` for small containers
+
+    """
+    if len(value) <= MAX_ITEMS:
+        return None
+    return 'len={} {}'.format(len(value), _repr.repr(value))
+
+
+def summarize_string(value):
+    """
+    Length and the beginning of long ``str`` and ``bytes``
+
+    Returns
+    -------
+    : str
+        ``None`` for short strings
+
+    """
+    if len(value) <= MAX_PLAIN_LENGTH:
+        return None
+    return 'len={} {}'.format(len(value), _repr.repr(value))
+
+
+def summarize_ndarray(value):
+    """
+    Shape, dtype, size and sampled min/max of a numpy array
+
+    Returns
+    -------
+    : str
+
+    """
+    res = 'shape={} dtype={} nbytes={}'.format(
+        value.shape, value.dtype, format_bytes(value.nbytes)
+    )
+    if value.size and value.dtype.kind in 'biuf':
+        step = max(value.size // ARRAY_SAMPLE_SIZE, 1)
+        sample = value.flat[::step]
+        res += ' {}min={} max={}'.format(
+            '~' if step > 1 else '', sample.min(), sample.max()
+        )
+    return res
+
+
+def summarize_dataframe(value):
+    """
+    Shape, memory usage and dtypes of a pandas DataFrame
+
+    Returns
+    -------
+    : str
+
+    """
+    dtypes = ', '.join(
+        '{}×{}'.format(dtype, count)
+        for dtype, count in value.dtypes.astype(str).value_counts().items()
+    )
+    return 'shape={} memory={} dtypes=[{}]'.format(
+        value.shape, format_bytes(int(value.memory_usage(deep=False).sum())), dtypes
+    )
+
+
+def register_io_progress(registry, progress):
+    """
+    Registers the methods of an :class:`IOProgress` instance
+
+    Args
+    ----
+    registry : :class:`SummarizerRegistry`
+    progress : :class:`IOProgress`
+
+    Returns
+    -------
+    None
+
+    """
+    registry.register(_io._IOBase, progress.file)
+    registry.register(_csv_reader, progress.csv_reader)
+    registry.register(enumerate, progress.enumerate)
+    registry.register(_range_iterator, progress.range_iterator)
+    registry.register(_long_range_iterator, progress.range_iterator)
+    registry.register(_list_iterator, progress.sequence_iterator)
+    registry.register(_tuple_iterator, progress.sequence_iterator)
+
+
+summarizers = SummarizerRegistry()
+"""The default registry used by all siginfo classes"""
+
+for _cls in (list, tuple, dict, set, frozenset, collections.deque):
+    summarizers.register(_cls, summarize_container)
+summarizers.register(str, summarize_string)
+summarizers.register(bytes, summarize_string)
+summarizers.register('numpy.ndarray', summarize_ndarray)
+summarizers.register('pandas.DataFrame', summarize_dataframe)
+register_io_progress(summarizers, IOProgress())
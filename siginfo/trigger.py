@@ -0,0 +1,150 @@
+import threading
+import time
+
+from siginfo.monitor import monitor, resolve_target
+
+
+class Trigger:
+    """
+    A conditional dump on one function or line
+
+    The predicate is evaluated every time the monitored function is
+    entered or the monitored line is executed. When it returns a truthy
+    value, ``dump`` is called with the executing frame.
+
+    Args
+    ----
+    code : code
+        Monitored code object
+    line : int
+        Monitored line number or ``None`` for function entry
+    predicate : str or callable
+        Either a Python expression (e.g. ``"i >= 1e6"``), compiled once
+        and evaluated in the scope of the frame, or a callable that
+        receives the frame's locals.
+    dump : callable
+        Called with the frame when the predicate fires
+    min_interval : float
+        Minimum number of seconds between two dumps
+        Default: 1.0
+    max_dumps : int
+        Remove the trigger after this many dumps
+        Default: None (unlimited)
+
+    Attributes
+    ----------
+    hits : int
+        Number of times the predicate was evaluated
+    dumps : int
+        Number of dumps produced
+    suppressed : int
+        Number of times the predicate fired during ``min_interval``
+    errors : int
+        Number of times the predicate raised an exception
+    on_retire : callable
+        Called with the trigger when it is removed after ``max_dumps``
+
+    """
+    def __init__(self, code, line, predicate, dump, min_interval=1.0, max_dumps=None):
+        self.code = code
+        self.line = line
+        self.min_interval = min_interval
+        self.max_dumps = max_dumps
+        self.hits = 0
+        self.dumps = 0
+        self.suppressed = 0
+        self.errors = 0
+        self.hook = None
+        self.on_retire = None
+        self._dump = dump
+        self._last_dump = None
+        self._busy = threading.local()
+        if callable(predicate):
+            self._source = getattr(predicate, '__name__', repr(predicate))
+            self._predicate = predicate
+            self._compiled = None
+        else:
+            self._source = predicate
+            self._predicate = None
+            self._compiled = compile(predicate, '<siginfo trigger>', 'eval')
+
+    def __str__(self):
+        return '{}:{} if {}'.format(
+            self.code.co_name,
+            'entry' if self.line is None else self.line,
+            self._source
+        )
+
+    def _matches(self, frame):
+        if self._compiled is None:
+            return self._predicate(frame.f_locals)
+        return eval(self._compiled, frame.f_globals, frame.f_locals)
+
+    # callback for the code monitor
+    def __call__(self, frame):
+        # The predicate or the dump might call the monitored function again
+        if getattr(self._busy, 'active', False):
+            return
+        self._busy.active = True
+        try:
+            self.hits += 1
+            try:
+                matched = self._matches(frame)
+            except Exception:
+                self.errors += 1
+                return
+            if not matched:
+                return
+            now = time.monotonic()
+            if self._last_dump is not None and now - self._last_dump < self.min_interval:
+                self.suppressed += 1
+                return
+            self._last_dump = now
+            self.dumps += 1
+            self._dump(self, frame)
+            if self.max_dumps is not None and self.dumps >= self.max_dumps:
+                self.remove()
+                if self.on_retire is not None:
+                    self.on_retire(self)
+        finally:
+            self._busy.active = False
+
+    def install(self):
+        """
+        Enables the instrumentation of the monitored code object
+
+        Returns
+        -------
+        None
+
+        """
+        if self.hook is None:
+            self.hook = monitor.add(self.code, self.line, self)
+
+    def remove(self):
+        """
+        Removes the instrumentation again
+
+        Returns
+        -------
+        None
+
+        """
+        if self.hook is not None:
+            monitor.remove(self.hook)
+            self.hook = None
+
+
+def make_trigger(target, predicate, dump, line=None, min_interval=1.0, max_dumps=None):
+    """
+    Creates a :class:`Trigger` for a function or ``file:line`` target
+
+    See :func:`siginfo.monitor.resolve_target` for valid targets
+
+    Returns
+    -------
+    : :class:`Trigger`
+
+    """
+    code, line = resolve_target(target, line)
+    return Trigger(code, line, predicate, dump, min_interval, max_dumps)
@@ -37,3 +37,72 @@ def left_string(string: str, padding: int) -> str:
             string=string,
             padding=' '*(int(padding)-len(string))
         )
+
+
+SPARK_CHARS = '▁▂▃▄▅▆▇█'
+
+
+def sparkline(values) -> str:
+    """
+    Draws a compact chart of numeric values with block characters
+
+    Args
+    ----
+    values : list
+        Numbers to plot
+
+    Returns
+    -------
+    : str
+        One character per value
+
+    Example
+    -------
+        ::
+
+            sparkline([1, 2, 3, 4])
+            # => '▁▃▆█'
+
+    """
+    values = list(values)
+    if not values:
+        return ''
+    low = min(values)
+    span = max(values) - low
+    if not span:
+        return SPARK_CHARS[0] * len(values)
+    top = len(SPARK_CHARS) - 1
+    return ''.join(SPARK_CHARS[int(round((val - low) / span * top))] for val in values)
+
+
+def format_bytes(size: float) -> str:
+    """
+    Formats a number of bytes in human readable units
+
+    Args
+    ----
+    size : int or float
+        Number of bytes
+
+    Returns
+    -------
+    : str
+
+    Example
+    -------
+        ::
+
+            format_bytes(123)
+            # => '123 B'
+
+            format_bytes(1536)
+            # => '1.5 KB'
+
+    """
+    for unit in ('B', 'KB', 'MB', 'GB', 'TB'):
+        if abs(size) < 1024 or unit == 'TB':
+            break
+        size /= 1024.0
+    if unit == 'B':
+        return '{} B'.format(int(size))
+    return '{:.1f} {}'.format(size, unit)
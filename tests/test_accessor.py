@@ -0,0 +1,123 @@
+import sys
+import unittest
+
+from siginfo.accessor import Accessor, AccessorSet
+
+
+class MockClass(object):
+    def __init__(self, **attrs):
+        for key in attrs:
+            setattr(self, key, attrs[key])
+
+
+class MockFrame(object):
+    def __init__(self, local_vars, back=None, global_vars=None):
+        self.f_locals = local_vars
+        self.f_globals = global_vars or {}
+        self.f_back = back
+
+
+class AccessorTests(unittest.TestCase):
+    def test_plain_name(self):
+        acc = Accessor('foo')
+        assert acc.evaluate(MockFrame({'foo': 12})) == 12
+        assert acc.depth == 0
+        assert acc.ops == ()
+
+    def test_locals_only(self):
+        acc = Accessor('foo')
+        with self.assertRaises(NameError):
+            acc.evaluate(MockFrame({}, global_vars={'foo': 1}))
+
+    def test_global_fallback(self):
+        acc = Accessor('foo', use_globals=True)
+        assert acc.evaluate(MockFrame({}, global_vars={'foo': 1})) == 1
+        assert acc.evaluate(MockFrame({'foo': 2}, global_vars={'foo': 1})) == 2
+        with self.assertRaises(NameError):
+            acc.evaluate(MockFrame({}))
+
+    def test_dotted_path(self):
+        obj = MockClass(stats=MockClass(rows_done=42))
+        acc = Accessor('self.stats.rows_done')
+        assert acc.evaluate(MockFrame({'self': obj})) == 42
+
+    def test_subscripts_and_len(self):
+        frame = MockFrame({'buf': [1, 2, 3], 'conf': {'a': {'b': 'c'}}})
+        assert Accessor('len(buf)').evaluate(frame) == 3
+        assert Accessor('buf[-1]').evaluate(frame) == 3
+        assert Accessor("conf['a']['b']").evaluate(frame) == 'c'
+        assert Accessor("len(conf['a'])").evaluate(frame) == 1
+
+    def test_caller_prefix(self):
+        frame = MockFrame({'i': 0}, back=MockFrame({'i': 1}, back=MockFrame({'i': 2})))
+        assert Accessor('caller:i').evaluate(frame) == 1
+        assert Accessor('caller2:i').evaluate(frame) == 2
+        assert Accessor('caller1: i').evaluate(frame) == 1
+        with self.assertRaises(LookupError):
+            Accessor('caller5:i').evaluate(frame)
+
+    def test_caller_name_is_not_a_prefix(self):
+        frame = MockFrame({'caller': {'a:b': 1}})
+        assert Accessor("caller['a:b']").evaluate(frame) == 1
+
+    def test_restricted_syntax(self):
+        for expression in (
+            'a + b',
+            'foo()',
+            'len(a, b)',
+            'open("x")',
+            'a.__class__',
+            'a[b]',
+            'a[1:2]',
+            'lambda: 1',
+            'a b',
+        ):
+            with self.assertRaises(ValueError, msg=expression):
+                Accessor(expression)
+
+    def test_get_with_default(self):
+        acc = Accessor('self.missing')
+        assert acc.get(MockFrame({'self': MockClass()}), 'default') == 'default'
+
+
+class AccessorSetTests(unittest.TestCase):
+    def test_error_isolation(self):
+        accessors = AccessorSet(['a', 'b.missing', 'len(c)', 'caller:d'])
+        frame = MockFrame({'a': 1, 'b': MockClass(), 'c': 'xyz'}, back=MockFrame({'d': 4}))
+        res = accessors.evaluate(frame)
+        assert len(accessors) == 4
+        assert res[0] == ('a', 1, None)
+        assert isinstance(res[1][2], AttributeError)
+        assert res[2] == ('len(c)', 3, None)
+        assert res[3] == ('caller:d', 4, None)
+
+    def test_reads_locals_once_per_frame(self):
+        class CountingFrame(MockFrame):
+            reads = 0
+
+            @property
+            def f_locals(self):
+                CountingFrame.reads += 1
+                return {'a': 1, 'b': 2}
+
+            @f_locals.setter
+            def f_locals(self, value):
+                pass
+
+        accessors = AccessorSet(['a', 'b', 'a'])
+        accessors.evaluate(CountingFrame({}))
+        assert CountingFrame.reads == 1
+
+    def test_real_frame(self):
+        rows_done = 7  # noqa: F841
+
+        def inner():
+            batch = [1, 2]  # noqa: F841
+            return AccessorSet(['len(batch)', 'caller:rows_done']).evaluate(sys._getframe())
+
+        res = inner()
+        assert res == [('len(batch)', 2, None), ('caller:rows_done', 7, None)]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import contextlib
+import importlib.util
+import io
+import os
+import threading
+import unittest
+
+from siginfo import siginfoclass as si
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PATH = os.path.join(ROOT, 'benchmarks', 'run.py')
+
+
+def load_benchmarks():
+    spec = importlib.util.spec_from_file_location('benchmarks_run', PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class BenchmarkTests(unittest.TestCase):
+    def setUp(self):
+        self.bench = load_benchmarks()
+
+    def results(self, **metrics):
+        return {'results': {'basic/shallow': metrics}}
+
+    def test_compare(self):
+        baseline = self.results(pause_median_ms=2.0, pause_max_ms=3.0, bytes=1000, peak_kb=10.0)
+        current = self.results(pause_median_ms=2.2, pause_max_ms=30.0, bytes=1500, peak_kb=10.0)
+        regressions = self.bench.compare(baseline, current, 0.25)
+        assert regressions == ['basic/shallow bytes: 1000.000 -> 1500.000 (+50%)']
+
+    def test_ignore_small_time_differences(self):
+        baseline = self.results(pause_median_ms=0.1)
+        current = self.results(pause_median_ms=0.3)
+        assert self.bench.compare(baseline, current) == []
+
+    def test_measure(self):
+        scenario = ('tiny', 3, 2, 10, 5, 1)
+        res = self.bench.measure(self.bench.MODES[0], scenario, 2)
+        assert res['bytes'] > 0
+        assert res['pause_median_ms'] > 0
+        assert res['peak_kb'] > 0
+
+    def test_all_modes(self):
+        scenario = ('tiny', 3, 2, 10, 5, 1)
+        threads = threading.active_count()
+        for mode in self.bench.MODES:
+            if not self.bench.available(mode):
+                continue
+            res = self.bench.measure(mode, scenario, 2)
+            assert res['bytes'] > 0, mode[0]
+            assert res['pause_median_ms'] > 0, mode[0]
+            assert 'init_median_ms' in self.bench.measure_init(mode, 1)
+        assert threading.active_count() == threads
+
+    def test_failing_handler(self):
+        # handle() counts the failure, the dispatcher only prints it
+        mode = ('broken', si.SiginfoBasic, None, lambda instance: setattr(
+            instance, '_frames', None
+        ), None)
+        with contextlib.redirect_stderr(io.StringIO()) as stderr:
+            with self.assertRaises(RuntimeError):
+                self.bench.measure(mode, ('tiny', 3, 2, 10, 5, 0), 1)
+        assert 'TypeError' in stderr.getvalue()
+
+    def test_measure_capture(self):
+        res = self.bench.measure_capture(2, 2, depth=5, duration=0.05)
+        assert res['capture_median_ms'] > 0
+        assert res['worker_slowdown'] < 1.0
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import sys
+import threading
+import traceback
+import unittest
+from unittest import mock
+
+from siginfo import capture
+
+
+def finished_frame():
+    return sys._getframe()
+
+
+def other_frame():
+    return sys._getframe()
+
+
+class CaptureTests(unittest.TestCase):
+    def setUp(self):
+        self.stop = threading.Event()
+        self.parked = threading.Thread(target=self.stop.wait, name='parked-worker')
+        self.parked.start()
+
+    def tearDown(self):
+        self.stop.set()
+        self.parked.join()
+
+    def test_gil_enabled(self):
+        if hasattr(sys, '_is_gil_enabled'):
+            assert capture.gil_enabled() == sys._is_gil_enabled()
+        else:
+            assert capture.gil_enabled()
+
+    def test_stack_entries(self):
+        frame = sys._getframe()
+        entries = capture.stack_entries(frame, 100)
+        assert entries[0][0] == __file__.rstrip('c')
+        assert entries[0][2] == 'test_stack_entries'
+        assert entries[1][2] == frame.f_back.f_code.co_name
+        assert len(capture.stack_entries(frame, 2)) == 2
+        assert capture.stack_entries(finished_frame(), 100)[0][2] == 'finished_frame'
+        assert capture.stack_entries(None, 100) == []
+
+    def test_capture_threads(self):
+        for validate in (False, True):
+            stacks = {stack.ident: stack for stack in capture.capture_threads(validate=validate)}
+            current = stacks[threading.get_ident()]
+            assert current.entries[0][2] == 'test_capture_threads'
+            assert current.consistent
+            parked = stacks[self.parked.ident]
+            assert parked.name == 'parked-worker'
+            assert parked.consistent
+            assert any(entry[2] == 'wait' for entry in parked.entries)
+
+        frame = sys._getframe()
+        stacks = capture.capture_threads(frame)
+        stack = [stack for stack in stacks if stack.ident == threading.get_ident()][0]
+        lines = stack.format().splitlines()
+        # the line of the current frame moved on
+        assert lines[:-2] == ''.join(traceback.format_stack(frame)).splitlines()[:-2]
+        assert lines[-2].endswith(', in test_capture_threads')
+        assert lines[-1] == '    stacks = capture.capture_threads(frame)'
+
+    def test_moving_thread(self):
+        ident = self.parked.ident
+        frames = iter([finished_frame(), other_frame()] * 10)
+        current_frames = sys._current_frames
+
+        def moving():
+            res = current_frames()
+            res[ident] = next(frames)
+            return res
+
+        with mock.patch.object(capture.sys, '_current_frames', moving):
+            stacks = capture.capture_threads(validate=True, retries=2)
+        moved = [stack for stack in stacks if stack.ident == ident][0]
+        assert not moved.consistent
+        assert moved.entries[0][2] in ('finished_frame', 'other_frame')
+        assert 'moving' in repr(moved)
+
+    def test_finished_thread(self):
+        ident = self.parked.ident
+        calls = []
+        current_frames = sys._current_frames
+
+        def finishing():
+            res = current_frames()
+            if calls:
+                del res[ident]
+            calls.append(1)
+            return res
+
+        with mock.patch.object(capture.sys, '_current_frames', finishing):
+            stacks = capture.capture_threads(validate=True)
+        assert ident not in [stack.ident for stack in stacks]
+        assert len(calls) == 2
+
+    def test_vanishing_threads(self):
+        threads = []
+        for _ in range(50):
+            thread = threading.Thread(target=sum, args=(range(1000),))
+            thread.start()
+            threads.append(thread)
+            for stack in capture.capture_threads(validate=True):
+                assert isinstance(stack.entries, list)
+        for thread in threads:
+            thread.join()
+
+    def test_readable_frames(self):
+        assert set(capture.readable_frames()) == set(sys._current_frames())
+        with mock.patch.object(capture, 'gil_enabled', return_value=False):
+            frames = capture.readable_frames()
+        assert frames[threading.get_ident()].f_code.co_name == 'test_readable_frames'
+        assert self.parked.ident in frames
+
+        ident = self.parked.ident
+        current_frames = sys._current_frames
+        frames = iter([finished_frame(), other_frame()] * 10)
+
+        def moving():
+            res = current_frames()
+            res[ident] = next(frames)
+            return res
+
+        with mock.patch.object(capture, 'gil_enabled', return_value=False), \
+                mock.patch.object(capture.sys, '_current_frames', moving):
+            assert ident not in capture.readable_frames()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,222 @@
+import contextlib
+import io
+import os
+import json
+import shutil
+import signal
+import stat
+import tempfile
+import unittest
+
+from siginfo import siginfoclass as si
+from siginfo import registry
+from siginfo.__main__ import main, registered_signal, resolve, write_scripts
+
+
+class MockOutput(object):
+    def __init__(self):
+        self.lines = []
+
+    def write(self, line):
+        self.lines.append(line)
+
+    def flush(self):
+        pass
+
+
+class RegistryTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        os.environ[registry.DIRECTORY_VARIABLE] = self.directory
+
+    def tearDown(self):
+        del os.environ[registry.DIRECTORY_VARIABLE]
+        shutil.rmtree(self.directory)
+
+    def test_update(self):
+        pid = os.getpid()
+        assert registry.read_registry(pid) == {}
+        registry.update_registry(pid, commands={'stack': 34})
+        registry.update_registry(pid, other=1)
+        assert registry.read_registry(pid) == {'pid': pid, 'commands': {'stack': 34}, 'other': 1}
+        assert registry.list_registries() == [registry.read_registry(pid)]
+        registry.update_registry(pid, commands=None)
+        registry.remove_at_exit(pid, 'other')
+        assert not os.path.exists(registry.registry_path(pid))
+        assert os.listdir(self.directory) == []
+
+    def test_dead_process(self):
+        with open(os.path.join(self.directory, 'siginfo-999999999.json'), 'w') as fh:
+            fh.write('{"pid": 999999999}')
+        assert registry.list_registries() == []
+
+    def test_private_directory(self):
+        del os.environ[registry.DIRECTORY_VARIABLE]
+        original = tempfile.tempdir
+        tempfile.tempdir = self.directory
+        try:
+            path = registry.directory()
+            assert path == os.path.join(self.directory, 'siginfo-{}'.format(os.getuid()))
+            assert stat.S_IMODE(os.stat(path).st_mode) == 0o700
+            assert registry.directory() == path
+            assert registry.registry_path(1234) == os.path.join(path, 'siginfo-1234.json')
+
+            os.chmod(path, 0o755)
+            with self.assertRaises(PermissionError):
+                registry.directory()
+            os.rmdir(path)
+            os.symlink(self.directory, path)
+            with self.assertRaises(PermissionError):
+                registry.directory()
+        finally:
+            tempfile.tempdir = original
+            os.environ[registry.DIRECTORY_VARIABLE] = self.directory
+
+    def test_untrusted_file(self):
+        pid = os.getpid()
+        target = os.path.join(self.directory, 'target.json')
+        with open(target, 'w') as fh:
+            json.dump({'pid': pid, 'commands': {'stack': 34}}, fh)
+        os.symlink(target, registry.registry_path(pid))
+        assert registry.read_registry(pid) == {}
+        os.remove(registry.registry_path(pid))
+        if os.getuid() == 0:
+            os.rename(target, registry.registry_path(pid))
+            os.chown(registry.registry_path(pid), 1, 1)
+            assert registry.read_registry(pid) == {}
+
+
+@unittest.skipUnless(hasattr(signal, 'SIGRTMIN'), 'Real-time signals are not available')
+class CommandTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        os.environ[registry.DIRECTORY_VARIABLE] = self.directory
+        self.out = MockOutput()
+        self.siginfo = si.SiginfoBasic(info=False, usr1=False, usr2=False, output=self.out)
+        self.siginfo.STATS_FOOTER = False
+
+    def tearDown(self):
+        self.siginfo.unbind()
+        del os.environ[registry.DIRECTORY_VARIABLE]
+        shutil.rmtree(self.directory)
+
+    def output(self):
+        res = ''.join(self.out.lines)
+        del self.out.lines[:]
+        return res
+
+    def test_bind(self):
+        commands = self.siginfo.bind_commands(offset=2)
+        assert commands == {
+            command: signal.SIGRTMIN + 2 + index for index, command in enumerate(si.COMMANDS)
+        }
+        assert 'Listening for >>SIGRTMIN+3<< (threads)\n' in self.out.lines
+        assert registry.read_registry(os.getpid())['commands'] == commands
+        self.siginfo.unbind()
+        assert self.siginfo.commands == {}
+        assert registry.read_registry(os.getpid()) == {}
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            self.siginfo.bind_commands(['stack', 'unknown'])
+        with self.assertRaises(ValueError):
+            self.siginfo.bind_commands(offset=signal.SIGRTMAX - signal.SIGRTMIN)
+        assert self.siginfo.commands == {}
+
+    def test_fallback_signal_is_reserved(self):
+        last = signal.SIGRTMAX - signal.SIGRTMIN
+        with self.assertRaises(ValueError):
+            self.siginfo.bind_commands(['stack'], offset=last)
+        assert self.siginfo.bind_commands(['stack'], offset=last - 1) == {
+            'stack': signal.SIGRTMAX - 1
+        }
+        self.siginfo.unbind()
+
+        self.siginfo.enable_fallback(signal.SIGRTMIN + 1)
+        with self.assertRaises(ValueError):
+            self.siginfo.bind_commands(['stack', 'threads'])
+        assert self.siginfo.commands == {}
+
+    def test_commands(self):
+        commands = self.siginfo.bind_commands()
+        self.output()
+
+        os.kill(os.getpid(), commands['stack'])
+        output = self.output()
+        assert 'METHOD\t\ttest_commands\n' in output
+
+        os.kill(os.getpid(), commands['threads'])
+        output = self.output()
+        assert '\nTHREAD\tMainThread (' in output
+        assert 'in test_commands\n' in output
+
+        os.kill(os.getpid(), commands['sample'])
+        output = self.output()
+        assert output.startswith('\nSAMPLE\t')
+        assert '\nMainThread\ttest_commands {}:'.format(__file__.rstrip('c')) in output
+
+        os.kill(os.getpid(), commands['memory'])
+        output = self.output()
+        assert output.startswith('\nMEMORY\n')
+        assert '\nGC\tcollections ' in output
+
+        os.kill(os.getpid(), commands['diff'])
+        os.kill(os.getpid(), commands['diff'])
+        output = self.output()
+        assert '\nDIFF\t' in output
+        assert not self.siginfo.DIFF
+        assert self.siginfo.stats()['dumps'] == 6
+
+    def test_create_info_script(self):
+        commands = self.siginfo.bind_commands(['threads'])
+        self.siginfo.create_info_script(self.directory, prefix='test-')
+        with open(os.path.join(self.directory, 'test-siginfo-threads')) as fh:
+            assert fh.read() == '#!/bin/sh\nkill -{} {}'.format(commands['threads'], os.getpid())
+
+    def test_cli(self):
+        commands = self.siginfo.bind_commands(['stack', 'threads'])
+        pid = os.getpid()
+        assert resolve(pid, 'threads') == commands['threads']
+        assert resolve(pid, 'USR1') == signal.SIGUSR1
+        assert resolve(pid, 'SIGUSR2') == signal.SIGUSR2
+        with self.assertRaises(ValueError):
+            resolve(pid, 'memory')
+
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            assert main([str(pid), 'threads']) == 0
+            assert main(['--list']) == 0
+        assert '\nTHREAD\tMainThread (' in self.output()
+        assert stdout.getvalue() == (
+            'Sent signal {} (threads) to {}\n{}\tstack={} threads={}\n'.format(
+                commands['threads'], pid, pid, commands['stack'], commands['threads']
+            )
+        )
+
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            assert main([str(pid), 'memory']) == 1
+        assert "Unknown command 'memory'" in stderr.getvalue()
+
+        scripts = write_scripts(pid, self.directory)
+        assert sorted(os.path.basename(script) for script in scripts) == [
+            'siginfo-stack', 'siginfo-threads'
+        ]
+
+    def test_registered_signal(self):
+        assert registered_signal(signal.SIGRTMIN) == signal.SIGRTMIN
+        assert registered_signal(signal.SIGRTMAX) == signal.SIGRTMAX
+        for signum in (signal.SIGKILL, signal.SIGTERM, '9; rm -rf ~', None, True):
+            with self.assertRaises(ValueError):
+                registered_signal(signum)
+
+        pid = os.getpid()
+        registry.update_registry(pid, commands={'stack': int(signal.SIGKILL)})
+        with self.assertRaises(ValueError):
+            resolve(pid, 'stack')
+        with self.assertRaises(ValueError):
+            write_scripts(pid, self.directory)
+        registry.update_registry(pid, commands=None, fallback={'signal': int(signal.SIGTERM)})
+        with self.assertRaises(ValueError):
+            resolve(pid, 'fallback')
+        registry.update_registry(pid, fallback=None)
@@ -0,0 +1,205 @@
+import concurrent.futures
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from siginfo import siginfoclass as si
+from siginfo.concurrency import blocked_threads, find_bottlenecks, rlock_owner, stdlib_name
+from siginfo.summary import summarizers
+
+
+class MockOutput(object):
+    def __init__(self):
+        self.lines = []
+
+    def write(self, line):
+        self.lines.append(line)
+
+    def flush(self):
+        pass
+
+
+class MockFrame(object):
+    def __init__(self, local_vars):
+        self.f_locals = local_vars
+        self.f_back = None
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('Timeout')
+        time.sleep(0.001)
+
+
+class SummarizerTests(unittest.TestCase):
+    def test_queue(self):
+        q = queue.Queue(2)
+        q.put(1)
+        assert summarizers(q) == 'Queue 1/2 unfinished=1 waiting get=0 put=0'
+        q.put(2)
+        assert summarizers(q).startswith('Queue 2/2 FULL ')
+        assert summarizers(queue.Queue()).startswith('Queue 0/inf ')
+
+    def test_locks(self):
+        lock = threading.Lock()
+        assert summarizers(lock) == 'Lock unlocked'
+        with lock:
+            assert summarizers(lock) == 'Lock locked'
+
+        rlock = threading.RLock()
+        assert rlock_owner(rlock) is None
+        assert summarizers(rlock) == 'RLock unlocked'
+        with rlock:
+            assert rlock_owner(rlock) == threading.get_ident()
+            assert summarizers(rlock) == 'RLock locked by {}'.format(
+                threading.current_thread().name
+            )
+
+    def test_rlock_repr(self):
+        # rlock_owner parses the repr of the C RLock, unchanged from Python 3.7 to 3.13
+        rlock = threading.RLock()
+        if not hasattr(rlock, '_owner'):
+            assert ' owner=0 count=0 at ' in repr(rlock)
+            with rlock, rlock:
+                expected = '<locked _thread.RLock object owner={} count=2 at '.format(
+                    threading.get_ident()
+                )
+                assert repr(rlock).startswith(expected)
+        py_rlock = threading._PyRLock()
+        assert rlock_owner(py_rlock) is None
+        with py_rlock:
+            assert rlock_owner(py_rlock) == threading.get_ident()
+
+    def test_semaphore_condition_event(self):
+        assert summarizers(threading.Semaphore(3)) == 'Semaphore value=3 waiting=0'
+        assert summarizers(threading.BoundedSemaphore(2)) == 'BoundedSemaphore value=2/2 waiting=0'
+        assert summarizers(threading.Condition()) == 'Condition waiting=0'
+        assert summarizers(threading.Event()) == 'Event clear waiting=0'
+
+    def test_thread_pool(self):
+        with ThreadPoolExecutor(2) as pool:
+            assert summarizers(pool).startswith('ThreadPoolExecutor workers=0/2 pending=0')
+
+
+class BottleneckTests(unittest.TestCase):
+    def test_full_queue(self):
+        q = queue.Queue(1)
+        q.put(0)
+        producer = threading.Thread(target=q.put, args=(1,), name='producer')
+        producer.start()
+        try:
+            wait_for(lambda: q.not_full._waiters)
+            waiting = blocked_threads()
+            assert [b.name for b in waiting[id(q)]] == ['producer']
+            assert waiting[id(q)][0].function == 'put'
+
+            res = find_bottlenecks([MockFrame({'jobs': q})])
+            assert len(res) == 1
+            assert res[0].startswith('FULL\tjobs (Queue 1/1 FULL ')
+            assert res[0].endswith('blocked producers: producer')
+        finally:
+            q.get()
+            producer.join()
+
+    def test_full_queue_without_producers(self):
+        q = queue.Queue(1)
+        q.put(0)
+        res = find_bottlenecks([MockFrame({'jobs': q})])
+        assert len(res) == 1
+        assert res[0].startswith('FULL\tjobs (Queue 1/1 FULL ')
+        assert 'producers' not in res[0]
+
+    def test_starved_queue(self):
+        q = queue.Queue()
+        consumer = threading.Thread(target=q.get, name='consumer')
+        consumer.start()
+        try:
+            wait_for(lambda: q.not_empty._waiters)
+            res = find_bottlenecks()
+            assert len(res) == 1
+            assert res[0].startswith('STARVED\tq (Queue 0/inf ')
+            assert res[0].endswith('waiting consumers: consumer')
+        finally:
+            q.put(None)
+            consumer.join()
+
+    def test_contended_lock(self):
+        event = threading.Event()
+        waiter = threading.Thread(target=event.wait, name='waiter')
+        waiter.start()
+        try:
+            wait_for(lambda: event._cond._waiters)
+            res = find_bottlenecks()
+            assert res == ['CONTENDED\tevent (Event clear waiting=1) waiting: waiter'], res
+        finally:
+            event.set()
+            waiter.join()
+
+    def test_stdlib_name(self):
+        assert stdlib_name(threading.__file__) == 'threading.py'
+        assert stdlib_name(concurrent.futures._base.__file__) == 'concurrent/futures/_base.py'
+        assert stdlib_name(os.path.join(os.path.dirname(__file__), 'queue.py')) is None
+
+    def test_application_module_with_stdlib_name(self):
+        # a get() in an application's queue.py is not a blocking call
+        namespace = {}
+        exec(compile(
+            'def get(self, event):\n    event.wait()\n',
+            os.path.join(os.path.dirname(__file__), 'queue.py'), 'exec'
+        ), namespace)
+        event = threading.Event()
+        waiter = threading.Thread(target=namespace['get'], args=(object(), event))
+        waiter.start()
+        try:
+            wait_for(lambda: event._cond._waiters)
+            waiting = blocked_threads()
+            assert [b.function for b in waiting[id(event)]] == ['wait']
+        finally:
+            event.set()
+            waiter.join()
+
+    def test_no_bottlenecks(self):
+        assert find_bottlenecks([sys._getframe()]) == []
+
+    def test_dump_while_queue_mutex_is_held(self):
+        # Queue.qsize() would wait for the mutex forever inside the signal handler,
+        # the holder releases it after 5 seconds so a regression doesn't hang the tests
+        jobs = queue.Queue(1)
+        jobs.put(0)
+        locked = threading.Event()
+        done = threading.Event()
+
+        def hold():
+            with jobs.mutex:
+                locked.set()
+                done.wait(5)
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        out = MockOutput()
+        siginfo = si.SiginfoBasic(info=False, usr1=True, usr2=False, output=out)
+        siginfo.BOTTLENECKS = True
+        siginfo.STATS_FOOTER = False
+        siginfo.MAX_LEVELS = 1
+        try:
+            locked.wait()
+            os.kill(os.getpid(), signal.SIGUSR1)
+            assert not done.is_set() and jobs.mutex.locked()
+        finally:
+            done.set()
+            holder.join()
+            siginfo.unbind()
+        output = ''.join(out.lines)
+        assert 'Queue 1/1 FULL unfinished=1' in output
+        assert '\nBOTTLENECKS\nFULL\tjobs (Queue 1/1 FULL ' in output
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,223 @@
+import os
+import shutil
+import signal
+import socket
+import sys
+import stat
+import tempfile
+import threading
+import time
+import unittest
+
+from siginfo import siginfoclass as si
+from siginfo.console import peer_uid
+
+
+class MockOutput(object):
+    def __init__(self):
+        self.lines = []
+
+    def write(self, line):
+        self.lines.append(line)
+
+    def flush(self):
+        pass
+
+
+def capture(**local_vars):
+    def inner(**kwargs):
+        total = sum(kwargs.values())  # noqa: F841
+        return sys._getframe()
+
+    return inner(**local_vars)
+
+
+class Client(object):
+    def __init__(self, path):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(path)
+        self.sock.settimeout(5)
+        self.data = ''
+
+    def read_prompt(self):
+        while not self.data.endswith('>>> '):
+            chunk = self.sock.recv(4096)
+            if not chunk:
+                break
+            self.data += chunk.decode('utf-8')
+        res, self.data = self.data[:-4], ''
+        return res
+
+    def send(self, line):
+        self.sock.sendall((line + '\n').encode('utf-8'))
+        return self.read_prompt()
+
+    def close(self):
+        self.sock.close()
+
+
+@unittest.skipUnless(hasattr(socket, 'AF_UNIX'), 'Unix sockets are not available')
+class SigInfoConsoleTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'console.sock')
+        self.siginfo = si.SigInfoConsole(
+            info=False, usr1=False, usr2=False, output=MockOutput(), path=self.path
+        )
+
+    def tearDown(self):
+        self.siginfo.stop()
+        shutil.rmtree(self.directory)
+
+    def connect(self):
+        client = Client(self.path)
+        banner = client.read_prompt()
+        return client, banner
+
+    def test_signal_starts_console(self):
+        self.siginfo.MAX_LEVELS = 2
+        self.siginfo(10, capture(a=1, b=2))
+        assert self.siginfo.OUTPUT.lines[-1].startswith('\nCONSOLE\t{}'.format(self.path))
+        assert oct(os.stat(self.path).st_mode & 0o777) == oct(0o600)
+        client, banner = self.connect()
+        assert '2 frames captured' in banner
+        assert 'inner' in banner
+        assert client.send('total') == '3\n'
+        assert client.send('kwargs["b"] * 10') == '20\n'
+        assert client.send('print("x", total)') == 'x 3\n'
+        assert client.send('print("x", total, sep=None, end=None)') == 'x 3\n'
+        assert client.send('print("x", total, sep="-", end="!\\n")') == 'x-3!\n'
+        assert client.send('for i in range(2):\n    i\n') == '... ... 0\n1\n'
+        client.close()
+
+    def test_errors_are_sent_to_client(self):
+        self.siginfo(10, capture(a=1))
+        client, _ = self.connect()
+        assert 'NameError' in client.send('unknown')
+        client.close()
+
+    def test_frames(self):
+        self.siginfo(10, capture(a=1))
+        client, _ = self.connect()
+        stack = client.send(':stack')
+        assert stack.startswith('> 0 inner')
+        assert '  1 capture' in stack
+        assert client.send(':frame 1').startswith('1 capture')
+        assert client.send('local_vars') == "{'a': 1}\n"
+        assert 'Invalid level' in client.send(':frame 99')
+        assert 'Commands' in client.send(':help')
+        client.close()
+
+    def test_assignments_do_not_change_frame(self):
+        frame = capture(a=1)
+        self.siginfo(10, frame)
+        client, _ = self.connect()
+        client.send('total = 100')
+        assert client.send('total') == '100\n'
+        assert frame.f_locals['total'] == 1
+        client.close()
+
+    def test_display_is_local(self):
+        self.siginfo(10, capture(a=1))
+        client, _ = self.connect()
+        assert client.send('import sys; sys.displayhook is sys.__displayhook__') == 'True\n'
+        assert client.send('def double(x):\n    x * 2\n    return x * 2\n') == '... ... ... '
+        assert client.send('double(total)') == '2\n'
+        assert client.send('_ + 1') == '3\n'
+        client.close()
+
+    def test_existing_path(self):
+        self.siginfo.stop()
+        with open(self.path, 'w'):
+            pass
+        with self.assertRaises(FileExistsError):
+            self.siginfo.start()
+        os.remove(self.path)
+        os.symlink(os.path.join(self.directory, 'target'), self.path)
+        with self.assertRaises(FileExistsError):
+            self.siginfo.start()
+        os.remove(self.path)
+        # a stale socket of the same user is replaced
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(self.path)
+        sock.close()
+        self.siginfo.start()
+        assert self.siginfo.server.running
+
+    def test_peer_uid(self):
+        left, right = socket.socketpair(socket.AF_UNIX)
+        try:
+            assert peer_uid(left) in (os.getuid(), None)
+        finally:
+            left.close()
+            right.close()
+
+    def test_freeze_without_signal(self):
+        assert self.siginfo.freeze() == 'Freeze requires a bound signal'
+        assert self.siginfo.resume() == 'Not frozen'
+
+
+@unittest.skipUnless(hasattr(socket, 'AF_UNIX'), 'Unix sockets are not available')
+class DefaultPathTests(unittest.TestCase):
+    def test_private_directory(self):
+        siginfo = si.SigInfoConsole(info=False, usr1=False, usr2=False, output=MockOutput())
+        assert siginfo.path is None
+        try:
+            siginfo(10, capture(a=1))
+            directory = os.path.dirname(siginfo.path)
+            assert os.path.basename(directory).startswith('siginfo-{}-'.format(os.getpid()))
+            assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+            assert stat.S_IMODE(os.stat(siginfo.path).st_mode) == 0o600
+            assert siginfo.OUTPUT.lines[-1].startswith('\nCONSOLE\t{}'.format(siginfo.path))
+            client = Client(siginfo.path)
+            assert 'frames captured' in client.read_prompt()
+            client.close()
+        finally:
+            siginfo.stop()
+        assert not os.path.exists(directory)
+
+
+@unittest.skipUnless(
+    hasattr(socket, 'AF_UNIX') and hasattr(signal, 'SIGUSR2'),
+    'Unix sockets or SIGUSR2 are not available'
+)
+class FreezeTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'console.sock')
+        self.siginfo = si.SigInfoConsole(
+            info=False, usr1=False, usr2=False, output=MockOutput(), path=self.path
+        )
+        self.siginfo._bind(signal.SIGUSR2)
+
+    def tearDown(self):
+        self.siginfo.stop()
+        self.siginfo.unbind()
+        shutil.rmtree(self.directory)
+
+    def test_freeze_and_resume(self):
+        self.siginfo(signal.SIGUSR2, capture(a=1))
+        results = []
+
+        def client():
+            client = Client(self.path)
+            client.read_prompt()
+            results.append(client.send(':freeze'))
+            results.append(client.send('loops > 0'))
+            results.append(client.send(':resume'))
+            client.close()
+
+        thread = threading.Thread(target=client)
+        thread.start()
+        loops = 0
+        while thread.is_alive():
+            loops += 1
+            time.sleep(0.001)
+        thread.join()
+        assert results[0].startswith('Frozen at 0 test_freeze_and_resume')
+        assert results[1] == 'True\n'
+        assert results[2] == 'Resumed\n'
+
+
+if __name__ == '__main__':
+    unittest.main()
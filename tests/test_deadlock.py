@@ -0,0 +1,149 @@
+import threading
+import time
+import unittest
+
+from siginfo import siginfoclass as si
+from siginfo.deadlock import (
+    TrackedLock,
+    TrackedRLock,
+    WaitEdge,
+    detect_deadlocks,
+    find_cycles,
+    format_deadlocks,
+    _waiting
+)
+
+
+class MockOutput(object):
+    def __init__(self):
+        self.lines = []
+
+    def write(self, line):
+        self.lines.append(line)
+
+    def flush(self):
+        pass
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('Timeout')
+        time.sleep(0.001)
+
+
+def graph(*pairs):
+    res = {}
+    for waiter, owner in pairs:
+        res.setdefault(waiter, []).append(WaitEdge(waiter, owner, 'lock'))
+    return res
+
+
+class FindCyclesTests(unittest.TestCase):
+    def test_no_cycle(self):
+        assert find_cycles(graph((1, 2), (2, 3))) == []
+
+    def test_simple_cycle(self):
+        cycles = find_cycles(graph((2, 1), (1, 2)))
+        assert len(cycles) == 1
+        assert [(e.waiter, e.owner) for e in cycles[0]] == [(1, 2), (2, 1)]
+
+    def test_cycle_behind_a_chain(self):
+        cycles = find_cycles(graph((1, 2), (2, 3), (3, 4), (4, 2)))
+        assert len(cycles) == 1
+        assert [(e.waiter, e.owner) for e in cycles[0]] == [(2, 3), (3, 4), (4, 2)]
+
+    def test_multiple_cycles(self):
+        cycles = find_cycles(graph((1, 2), (2, 1), (3, 4), (4, 3)))
+        assert len(cycles) == 2
+
+
+class TrackedLockTests(unittest.TestCase):
+    def test_owner(self):
+        lock = TrackedLock(name='a')
+        assert not lock.locked()
+        with lock:
+            assert lock.owner == threading.get_ident()
+            assert 'owned by' in repr(lock)
+        assert lock.owner is None
+        assert repr(lock) == '<TrackedLock a>'
+
+    def test_reentrant(self):
+        lock = TrackedRLock()
+        with lock:
+            with lock:
+                assert lock.owner == threading.get_ident()
+            assert lock.owner == threading.get_ident()
+        assert lock.owner is None
+
+    def test_non_blocking(self):
+        lock = TrackedLock()
+        lock.acquire()
+        thread = threading.Thread(target=lambda: setattr(self, 'res', lock.acquire(False)))
+        thread.start()
+        thread.join()
+        assert self.res is False
+        lock.release()
+
+
+class DeadlockTests(unittest.TestCase):
+    def test_detect_deadlock(self):
+        lock_a = TrackedLock(name='a')
+        lock_b = TrackedLock(name='b')
+        barrier = threading.Barrier(2)
+
+        def worker(first, second):
+            # `first` is released by the test to resolve the deadlock
+            first.acquire()
+            barrier.wait()
+            with second:
+                pass
+
+        thread_1 = threading.Thread(target=worker, args=(lock_a, lock_b), name='worker-1')
+        thread_2 = threading.Thread(target=worker, args=(lock_b, lock_a), name='worker-2')
+        thread_1.start()
+        thread_2.start()
+        try:
+            wait_for(lambda: len(_waiting) == 2)
+            cycles = detect_deadlocks()
+            assert len(cycles) == 1
+            assert {e.waiter for e in cycles[0]} == {thread_1.ident, thread_2.ident}
+
+            report = format_deadlocks(cycles)
+            assert report.startswith('DEADLOCK 1\n')
+            assert 'waits for <TrackedLock a owned by worker-1> held by worker-1' in report
+            assert 'STACK worker-2' in report
+            assert 'in worker' in report
+
+            output = MockOutput()
+            res = si.SigInfoDeadlock(info=False, usr1=False, usr2=False, output=output)
+            output.lines = []
+            assert len(res.check()) == 1
+            assert len(output.lines) == 1
+            res.check()
+            assert len(output.lines) == 1, 'Deadlocks are only reported once'
+        finally:
+            # plain locks can be released by any thread
+            lock_a.release()
+            thread_2.join()
+            lock_b.release()
+            thread_1.join()
+            thread_2.join()
+
+    def test_signal_without_deadlock(self):
+        output = MockOutput()
+        res = si.SigInfoDeadlock(info=False, usr1=False, usr2=False, output=output)
+        output.lines = []
+        res(1, None)
+        assert output.lines == ['\nNo deadlock found\n']
+
+    def test_watchdog(self):
+        res = si.SigInfoDeadlock(info=False, usr1=False, usr2=False, output=MockOutput())
+        res.start_watchdog(0.001)
+        res.stop_watchdog()
+        assert res._watchdog is None
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import sys
+import unittest
+
+from siginfo import siginfoclass as si
+from siginfo.diff import capture_state, diff_states, format_change, VariableChange
+from siginfo.snapshot import FrameSnapshot, LocalSnapshot
+
+
+def code_a():
+    pass
+
+
+def code_b():
+    pass
+
+
+class MockOutput(object):
+    def __init__(self):
+        self.lines = []
+
+    def write(self, line):
+        self.lines.append(line)
+
+    def flush(self):
+        pass
+
+
+def make_state(frames, timestamp):
+    """
+    ``frames`` innermost first: ``(code, lineno, locals dict or None)``
+    """
+    snapshots = {}
+    for level, (code, lineno, local_vars) in enumerate(frames):
+        if local_vars is not None:
+            local_vars = tuple(
+                LocalSnapshot(name, type(value).__name__, str(value))
+                for name, value in local_vars.items()
+            )
+        snapshots[level] = FrameSnapshot(level, code.__code__, lineno, None, local_vars)
+    return capture_state(snapshots, len(frames), max_repr=10, timestamp=timestamp)
+
+
+class DiffStatesTests(unittest.TestCase):
+    def test_unchanged(self):
+        frames = [(code_a, 3, {'i': 1}), (code_b, 5, {'x': 'abc'})]
+        changed, removed, elapsed = diff_states(make_state(frames, 0.0), make_state(frames, 2.0))
+        assert changed == []
+        assert removed == 0
+        assert elapsed == 2.0
+
+    def test_changed_variables(self):
+        old = make_state([(code_a, 3, {'i': 1, 'gone': 1, 'f': 0.5}), (code_b, 5, {})], 0.0)
+        new = make_state([(code_a, 4, {'i': 11, 'added': 'x', 'f': 1.0}), (code_b, 5, {})], 2.0)
+        changed, removed, _ = diff_states(old, new)
+        assert removed == 0
+        assert len(changed) == 1
+        change = changed[0]
+        assert change.level == 0
+        assert change.name == 'code_a'
+        assert (change.old_lineno, change.lineno) == (3, 4)
+        assert not change.new
+        assert change.changes == [
+            VariableChange('i', '1', '11', 10, 5.0),
+            VariableChange('added', None, 'x'),
+            VariableChange('f', '0.5', '1.0', 0.5, 0.25),
+            VariableChange('gone', '1', None),
+        ]
+
+    def test_new_and_returned_frames(self):
+        # code_b called code_a, now code_b calls code_b
+        old = make_state([(code_a, 3, {}), (code_b, 5, {})], 0.0)
+        new = make_state([(code_b, 8, {}), (code_b, 6, {})], 1.0)
+        changed, removed, _ = diff_states(old, new)
+        assert removed == 1
+        assert [(change.level, change.new) for change in changed] == [(0, True), (1, False)]
+
+    def test_shortened_text(self):
+        state = make_state([(code_a, 1, {'s': 'x' * 100})], 0.0)
+        value = list(state.frames.values())[0].variables['s']
+        assert value[1] == 'xxxxxxx...'
+        assert value[2] is None
+
+    def test_format_change(self):
+        assert format_change(VariableChange('i', '100', '250', 150, 5.0)) == '100 → 250 (+150, 5/s)'
+        assert format_change(VariableChange('f', '1.5', '1.0', -0.5, None)) == '1.5 → 1.0 (-0.5)'
+        assert format_change(VariableChange('s', 'a', 'b')) == 'a → b'
+        assert format_change(VariableChange('s', None, 'b')) == 'new: b'
+        assert format_change(VariableChange('s', 'a', None)) == 'removed (was a)'
+
+
+class DiffModeTests(unittest.TestCase):
+    def setUp(self):
+        self.out = MockOutput()
+        self.siginfo = si.SiginfoBasic(info=False, usr1=False, usr2=False, output=self.out)
+        self.siginfo.DIFF = True
+        self.siginfo.STATS_FOOTER = False
+        self.siginfo.BOTTLENECKS = False
+
+    def test_diff_mode(self):
+        # the caller's locals must not change between the dumps
+        self.siginfo.MAX_LEVELS = 2
+        self.outputs = []
+
+        def work(values):
+            for counter in values:
+                self.siginfo(1, sys._getframe())
+                self.outputs.append(''.join(self.out.lines))
+                del self.out.lines[:]
+
+        work([1, 5, 5])
+        assert 'LOCALS' in self.outputs[0]
+        assert 'DIFF' not in self.outputs[0]
+
+        assert 'LOCALS' not in self.outputs[1]
+        assert 'DIFF\t1 frame changed in ' in self.outputs[1]
+        assert 'METHOD\t\twork\n' in self.outputs[1]
+        assert 'counter\t1 → 5 (+4' in self.outputs[1]
+
+        assert 'DIFF\t0 frames changed in ' in self.outputs[2]
+        assert 'counter' not in self.outputs[2]
+
+    def test_deeper_than_max_levels(self):
+        # frames on top of `work` shift the captured window
+        self.siginfo.MAX_LEVELS = 2
+        self.outputs = []
+
+        def dump():
+            self.siginfo(1, sys._getframe())
+
+        def work(values):
+            for counter in values:
+                if counter > 1:
+                    dump()
+                else:
+                    self.siginfo(1, sys._getframe())
+                self.outputs.append(''.join(self.out.lines))
+                del self.out.lines[:]
+
+        work([1, 5])
+        assert 'DIFF\t2 frames changed in ' in self.outputs[1]
+        assert 'returned' not in self.outputs[1]
+        assert 'LEVEL    \t0 (new)\nMETHOD\t\tdump\n' in self.outputs[1]
+        assert 'LEVEL    \t1\nMETHOD\t\twork\n' in self.outputs[1]
+        assert 'counter\t1 → 5 (+4' in self.outputs[1]
+
+    def test_disabled(self):
+        self.siginfo.DIFF = False
+        self.siginfo(1, sys._getframe())
+        self.siginfo(1, sys._getframe())
+        assert self.siginfo._previous_state is None
+        assert not any(line.startswith('\nDIFF') for line in self.out.lines)
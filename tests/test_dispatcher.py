@@ -0,0 +1,134 @@
+import sys
+import unittest
+
+from siginfo import dispatcher
+from siginfo import siginfoclass as si
+
+
+class MockOutput(object):
+    def __init__(self):
+        self.lines = []
+
+    def write(self, line):
+        self.lines.append(line)
+
+    def flush(self):
+        pass
+
+
+class MockSignal(object):
+    SIG_DFL = 0
+    SIGUSR1 = 2
+
+    def __init__(self):
+        self.handlers = {}
+
+    def signal(self, sigtype, func):
+        self.handlers[sigtype] = func
+
+    def getsignal(self, sigtype):
+        return self.handlers.get(sigtype)
+
+
+class Consumer(object):
+    def __init__(self, calls, fail=False):
+        self.calls = calls
+        self.fail = fail
+
+    def handle(self, signum, frame, stack):
+        self.calls.append((self, stack))
+        if self.fail:
+            raise ValueError('broken consumer')
+
+
+def get_frame():
+    return sys._getframe()
+
+
+class DispatcherTests(unittest.TestCase):
+    def setUp(self):
+        self.old_signal = dispatcher.signal
+        self.signal = dispatcher.signal = MockSignal()
+
+    def tearDown(self):
+        dispatcher.signal = self.old_signal
+        dispatcher.dispatchers.clear()
+
+    def test_chains_previous_handler(self):
+        calls = []
+        def previous(signum, frame):
+            calls.append('previous')
+
+        self.signal.signal(2, previous)
+        handler = dispatcher.register(2, lambda signum, frame: calls.append('consumer'))
+        assert self.signal.getsignal(2) is handler
+        handler(2, get_frame())
+        assert calls == ['consumer', 'previous']
+
+    def test_stack_is_shared(self):
+        calls = []
+        first, second = Consumer(calls), Consumer(calls)
+        dispatcher.register(2, first)
+        handler = dispatcher.register(2, second)
+        frame = get_frame()
+        handler(2, frame)
+        assert [consumer for consumer, _ in calls] == [first, second]
+        assert calls[0][1] is calls[1][1]
+        assert calls[0][1][0] is frame
+
+    def test_failing_consumer(self):
+        calls = []
+        dispatcher.register(2, Consumer(calls, fail=True))
+        handler = dispatcher.register(2, Consumer(calls))
+        stderr, sys.stderr = sys.stderr, MockOutput()
+        try:
+            handler(2, get_frame())
+            assert 'broken consumer' in ''.join(sys.stderr.lines)
+        finally:
+            sys.stderr = stderr
+        assert len(calls) == 2
+
+    def test_unregister_restores_previous(self):
+        def previous(signum, frame):
+            pass
+
+        self.signal.signal(2, previous)
+        consumer = Consumer([])
+        dispatcher.register(2, consumer)
+        dispatcher.unregister(2, consumer)
+        assert self.signal.getsignal(2) is previous
+        assert 2 not in dispatcher.dispatchers
+
+    def test_reinstall_after_replacement(self):
+        calls = []
+        handler = dispatcher.register(2, Consumer(calls))
+        def other(signum, frame):
+            calls.append('other')
+
+        self.signal.signal(2, other)
+        assert dispatcher.register(2, Consumer(calls)) is handler
+        assert self.signal.getsignal(2) is handler
+        handler(2, get_frame())
+        assert calls[-1] == 'other'
+        assert len(calls) == 3
+
+    def test_multiple_siginfo_instances(self):
+        old_signal = si.signal
+        si.signal = self.signal
+        try:
+            first = si.SigInfoSingle(info=False, usr1=True, output=MockOutput())
+            second = si.SiginfoBasic(info=False, usr1=True, output=MockOutput())
+        finally:
+            si.signal = old_signal
+        first.set_var('value')
+        second.BOTTLENECKS = False
+        value = 42
+        self.signal.getsignal(2)(2, sys._getframe())
+        assert first.OUTPUT.lines[-1] == '{}\n'.format(value)
+        assert 'test_multiple_siginfo_instances' in ''.join(second.OUTPUT.lines)
+        first.unbind()
+        assert dispatcher.dispatchers[2].consumers == [second]
+
+
+if __name__ == '__main__':
+    unittest.main()
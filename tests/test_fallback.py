@@ -0,0 +1,135 @@
+import contextlib
+import io
+import os
+import shutil
+import signal
+import stat
+import tempfile
+import time
+import unittest
+
+from siginfo import siginfoclass as si
+from siginfo import registry
+from siginfo.__main__ import main, resolve
+from siginfo.fallback import FallbackDump, default_signal, traceback_path
+
+
+class MockOutput(object):
+    def __init__(self):
+        self.lines = []
+
+    def write(self, line):
+        self.lines.append(line)
+
+    def flush(self):
+        pass
+
+
+class FallbackTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        os.environ[registry.DIRECTORY_VARIABLE] = self.directory
+        self.out = MockOutput()
+        self.siginfo = si.SiginfoBasic(info=False, usr1=False, usr2=False, output=self.out)
+        self.siginfo.STATS_FOOTER = False
+
+    def tearDown(self):
+        self.siginfo.unbind()
+        del os.environ[registry.DIRECTORY_VARIABLE]
+        shutil.rmtree(self.directory)
+
+    def read(self, path):
+        with open(path) as fh:
+            return fh.read()
+
+    def test_signal(self):
+        pid = os.getpid()
+        fallback = self.siginfo.enable_fallback()
+        assert fallback.signum == default_signal()
+        assert fallback.path == traceback_path(pid)
+        assert registry.read_registry(pid)['fallback'] == {
+            'signal': fallback.signum, 'path': fallback.path, 'timeout': None
+        }
+        line = 'Fallback dump on >>{}<< to {}\n'.format(fallback.signum, fallback.path)
+        assert line in self.out.lines
+
+        os.kill(pid, fallback.signum)
+        content = self.read(fallback.path)
+        header = 'SIGINFO FALLBACK\tpid {} signal {} '.format(pid, fallback.signum)
+        assert content.startswith(header)
+        assert 'in test_signal\n' in content
+
+        self.siginfo.unbind()
+        assert not fallback.running
+        assert registry.read_registry(pid) == {}
+
+    def test_timeout(self):
+        path = os.path.join(self.directory, 'hang.txt')
+        fallback = self.siginfo.enable_fallback(path=path, timeout=0.2)
+        time.sleep(0.1)
+        fallback.reset()
+        time.sleep(0.1)
+        assert 'Timeout' not in self.read(path)
+        time.sleep(0.4)
+        content = self.read(path)
+        assert 'Timeout (0:00:00.200000)!\n' in content
+        assert 'in test_timeout\n' in content
+
+    def test_failed_dump(self):
+        def fail(signum, frame):
+            raise RuntimeError('no memory')
+
+        path = os.path.join(self.directory, 'failed.txt')
+        self.siginfo.enable_fallback(path=path)
+        self.siginfo.commands[signal.SIGUSR1] = 'fail'
+        self.siginfo._command_fail = fail
+        with self.assertRaises(RuntimeError):
+            self.siginfo.handle(signal.SIGUSR1, None, [])
+        assert 'in test_failed_dump\n' in self.read(path)
+        assert self.siginfo.stats()['dropped'] == 1
+
+    def test_private_file(self):
+        path = os.path.join(self.directory, 'private.txt')
+        fallback = self.siginfo.enable_fallback(path=path)
+        assert stat.S_IMODE(os.stat(fallback.path).st_mode) == 0o600
+
+    @unittest.skipUnless(hasattr(os, 'O_NOFOLLOW'), 'O_NOFOLLOW is not available')
+    def test_symlink(self):
+        target = os.path.join(self.directory, 'target.txt')
+        path = os.path.join(self.directory, 'link.txt')
+        os.symlink(target, path)
+        with self.assertRaises(OSError):
+            self.siginfo.enable_fallback(path=path)
+        assert not os.path.exists(target)
+        assert self.siginfo.fallback is None
+
+    def test_signal_in_use(self):
+        self.siginfo._bind(signal.SIGUSR2)
+        with self.assertRaises(ValueError):
+            self.siginfo.enable_fallback(signal.SIGUSR2)
+        with self.assertRaises(ValueError):
+            FallbackDump(os.getpid(), signal.SIGUSR2)
+        assert self.siginfo.fallback is None
+
+    def test_cli(self):
+        pid = os.getpid()
+        with self.assertRaises(ValueError):
+            resolve(pid, 'fallback')
+        fallback = self.siginfo.enable_fallback()
+        assert resolve(pid, 'fallback') == fallback.signum
+
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            assert main([str(pid), 'fallback']) == 0
+            assert main(['--list']) == 0
+        expected = (
+            'Sent signal {0} (fallback) to {1}\n'
+            'Tracebacks are written to {2}\n'
+            '{1}\tfallback={0}\n'
+        ).format(fallback.signum, pid, fallback.path)
+        assert stdout.getvalue() == expected
+        assert 'in test_cli\n' in self.read(fallback.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+import os
+import signal
+import sys
+import threading
+import time
+import unittest
+
+from siginfo import siginfoclass as si
+from siginfo.gilprobe import OTHER, GilProbe, stack_key
+
+
+class MockOutput(object):
+    def __init__(self):
+        self.lines = []
+
+    def write(self, line):
+        self.lines.append(line)
+
+    def flush(self):
+        pass
+
+
+def busy(stop):
+    total = 0
+    while not stop.is_set():
+        for i in range(1000):
+            total += i * i
+    return total
+
+
+class Workers(object):
+    def __enter__(self):
+        self.stop = threading.Event()
+        self.threads = [
+            threading.Thread(target=busy, args=(self.stop,), name='busy-worker'),
+            threading.Thread(target=self.stop.wait, name='idle-worker'),
+        ]
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop.set()
+        for thread in self.threads:
+            thread.join()
+
+
+class GilProbeTests(unittest.TestCase):
+    def test_stack_key(self):
+        key = stack_key(sys._getframe())
+        assert key[-1][2] == 'test_stack_key'
+        assert key[-1][0] == __file__.rstrip('c')
+        assert len(stack_key(sys._getframe(), limit=2)) == 2
+
+    def test_contention(self):
+        probe = GilProbe(interval=0.002, max_overhead=1.0)
+        with Workers() as workers:
+            probe.start()
+            time.sleep(0.5)
+            probe.stop()
+        assert not probe.running
+        assert probe.samples > 5
+        assert sum(probe.lateness) >= probe.samples
+        threads = {thread[0]: thread[1:] for thread in probe.threads.values()}
+        assert threads['busy-worker'][0] > threads['busy-worker'][1] / 2
+        assert threads['idle-worker'][0] <= 1
+        assert 'siginfo-gilprobe' not in threads
+        top = max(probe.stacks.items(), key=lambda item: item[1][0])[0]
+        assert top[-1][2] == 'busy'
+
+        report = probe.report(top=1)
+        assert report.startswith('GIL PROBE\tmeasurements ')
+        assert '\nLATE\tp50 <' in report
+        assert '\nTHREADS\trunning share of samples\n' in report
+        assert report.index('busy-worker') < report.index('idle-worker')
+        assert report.count('\nRUNNING\t') == 1
+        assert ', in busy\n' in report
+        assert workers.threads[0].ident in probe.threads
+
+    def test_duration(self):
+        finished = []
+        probe = GilProbe(interval=0.002)
+        probe.on_finish = finished.append
+        probe.start(duration=0.05)
+        time.sleep(0.3)
+        assert finished == [probe]
+        assert not probe.running
+        assert sum(probe.lateness) > 0
+
+    def test_overhead(self):
+        probe = GilProbe(interval=0.001, max_overhead=0.0)
+        probe.start()
+        time.sleep(0.1)
+        probe.stop()
+        assert probe.samples == 0
+        assert probe.skipped > 0
+        assert 'THREADS' not in probe.report()
+
+    def test_max_stacks(self):
+        def work(stop):
+            while not stop.is_set():
+                busy(stop)
+
+        probe = GilProbe(max_stacks=1)
+        stop = threading.Event()
+        threads = [threading.Thread(target=target, args=(stop,)) for target in (busy, work)]
+        for thread in threads:
+            thread.start()
+        probe.stacks[(('other.py', 1, 'other'),)] = [0, 0]
+        try:
+            for _ in range(20):
+                probe.sample(own=threading.get_ident())
+                time.sleep(0.005)
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+        assert len(probe.threads) == 1
+        assert list(probe.stacks) == [(('other.py', 1, 'other'),), OTHER]
+        assert probe.stacks[OTHER][0] > 0
+
+
+class SigInfoGilTests(unittest.TestCase):
+    def test_signal(self):
+        out = MockOutput()
+        siginfo = si.SigInfoGil(
+            info=False, usr1=True, usr2=False, output=out, interval=0.002, duration=0.2
+        )
+        siginfo.STATS_FOOTER = False
+        try:
+            with Workers():
+                os.kill(os.getpid(), signal.SIGUSR1)
+                assert siginfo.probe.running
+                assert out.lines[-1] == '\nGIL PROBE\tstarted for 0.2s\n'
+                time.sleep(0.05)
+                os.kill(os.getpid(), signal.SIGUSR1)
+                assert out.lines[-1].startswith('\nGIL PROBE\tmeasurements ')
+                time.sleep(0.4)
+            assert not siginfo.probe.running
+            assert 'busy-worker' in out.lines[-1]
+        finally:
+            siginfo.unbind()
+        assert not siginfo.probe.running
+
+
+if __name__ == '__main__':
+    unittest.main()
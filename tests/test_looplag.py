@@ -0,0 +1,114 @@
+import asyncio
+import subprocess
+import sys
+import time
+import unittest
+
+from siginfo import siginfoclass as si
+from siginfo.looplag import LoopLagMonitor, Stall
+
+
+class MockOutput(object):
+    def __init__(self):
+        self.lines = []
+
+    def write(self, line):
+        self.lines.append(line)
+
+    def flush(self):
+        pass
+
+
+def blocking_callback():
+    time.sleep(0.3)
+
+
+def run(monitor, block=True):
+    async def main():
+        monitor.start()
+        await asyncio.sleep(0.1)
+        if block:
+            blocking_callback()
+        await asyncio.sleep(0.1)
+        monitor.stop()
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(main())
+    finally:
+        loop.close()
+
+
+class LoopLagMonitorTests(unittest.TestCase):
+    def test_stall(self):
+        monitor = LoopLagMonitor(interval=0.02, threshold=0.05)
+        run(monitor)
+        assert not monitor.running
+        assert sum(monitor.lags) > 5
+        assert monitor.max_lag >= 0.25
+        assert monitor.percentile(1.0) >= 250000
+        assert len(monitor.stalls) == 1
+        stall = monitor.stalls[0]
+        assert stall.lag == monitor.max_lag
+        assert stall.stack[-1].name == 'blocking_callback'
+        report = monitor.report()
+        assert report.startswith('LOOP LAG\tbeats ')
+        assert '\nLAG\tp50 <' in report
+        assert '\nSTALL\tlag ' in report
+        assert 'in blocking_callback' in report
+
+    def test_no_stall(self):
+        monitor = LoopLagMonitor(interval=0.02, threshold=0.2)
+        run(monitor, block=False)
+        assert sum(monitor.lags) > 5
+        assert monitor.stalls == []
+        assert 'STALL' not in monitor.report()
+
+    def test_max_stalls(self):
+        monitor = LoopLagMonitor(max_stalls=2)
+        monitor._expected = time.monotonic()
+        for lag in (0.5, 2.0, 1.0):
+            monitor._pending = Stall(0.0, [])
+            monitor._expected = time.monotonic() - lag
+            monitor._beat()
+        assert [round(stall.lag) for stall in monitor.stalls] == [2, 1]
+        assert monitor._pending is None
+
+    def test_empty_report(self):
+        assert LoopLagMonitor().report() == 'LOOP LAG\tbeats 0 interval 100ms threshold 100ms'
+
+
+class SigInfoLoopLagTests(unittest.TestCase):
+    def test_call(self):
+        mock_out = MockOutput()
+        siginfo = si.SigInfoLoopLag(
+            info=False, usr1=False, usr2=False, output=mock_out, interval=0.02, threshold=0.05
+        )
+        run(siginfo.monitor)
+        siginfo(None, None)
+        assert mock_out.lines[-1].startswith('\nLOOP LAG\t')
+        assert 'in blocking_callback' in mock_out.lines[-1]
+
+    def test_lazy_imports(self):
+        # asyncio and the optional feature modules are only imported when used
+        modules = subprocess.check_output([
+            sys.executable, '-c',
+            'import sys, siginfo; print(" ".join(sorted(sys.modules)))'
+        ]).decode().split()
+        for name in (
+            'asyncio', 'tracemalloc', 'siginfo.accessor', 'siginfo.concurrency',
+            'siginfo.console', 'siginfo.deadlock', 'siginfo.fallback', 'siginfo.gilprobe',
+            'siginfo.looplag', 'siginfo.meter', 'siginfo.referrers', 'siginfo.registry',
+            'siginfo.snapshotfile'
+        ):
+            assert name not in modules, name
+
+    def test_constructor_imports(self):
+        # the signal handler must not import, the constructor already did
+        modules = subprocess.check_output([
+            sys.executable, '-c',
+            'import sys, siginfo; siginfo.SigInfoSnapshot(info=False, usr1=False); '
+            'print(" ".join(sorted(sys.modules)))'
+        ]).decode().split()
+        assert 'siginfo.snapshotfile' in modules
+        assert 'siginfo.looplag' not in modules
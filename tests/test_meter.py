@@ -0,0 +1,153 @@
+import sys
+import unittest
+from unittest import mock
+
+from siginfo import meter as meter_module
+from siginfo import siginfoclass as si
+from siginfo.meter import Meter, HISTOGRAM_BUCKETS
+from siginfo.monitor import has_monitoring, monitor
+
+
+class MockOutput(object):
+    def __init__(self):
+        self.lines = []
+
+    def write(self, line):
+        self.lines.append(line)
+
+    def flush(self):
+        pass
+
+
+def process_row(row):
+    return row * 2
+
+
+def process_rows(rows):
+    total = 0
+    for row in rows:
+        total += row
+    return total
+
+
+class MeterTests(unittest.TestCase):
+    def test_counting(self):
+        meter = Meter(process_row.__code__)
+        for _ in range(5):
+            meter(None)
+        assert meter.count == 5
+        assert sum(meter.histogram) == 4
+        assert len(meter.histogram) == HISTOGRAM_BUCKETS
+
+    def test_sample(self):
+        meter = Meter(process_row.__code__)
+        meter(None)
+        meter(None)
+        sample = meter.sample()
+        assert sample['count'] == 2
+        assert sample['delta'] == 2
+        sample = meter.sample()
+        assert sample['delta'] == 0
+        assert sample['short_rate'] <= sample['long_rate']
+
+    def test_trend(self):
+        meter = Meter(process_row.__code__)
+        assert meter.trend() == 'stalled'
+        meter._short_rate, meter._long_rate = 200.0, 100.0
+        assert meter.trend() == 'rising'
+        meter._short_rate, meter._long_rate = 50.0, 100.0
+        assert meter.trend() == 'falling'
+        meter._short_rate, meter._long_rate = 101.0, 100.0
+        assert meter.trend() == 'steady'
+
+    def test_name(self):
+        assert Meter(process_row.__code__).name == 'process_row:entry'
+        assert Meter(process_row.__code__, 12).name == 'process_row:12'
+        assert Meter(process_row.__code__, name='rows').name == 'rows'
+
+    def test_report_not_calibrated(self):
+        meter = Meter(process_row.__code__)
+        with mock.patch.object(meter_module, '_calibrated_cost', None):
+            assert meter.overhead() is None
+            assert 'OVERHEAD\tnot calibrated' in meter.report()
+
+
+@unittest.skipUnless(has_monitoring(), 'requires sys.monitoring')
+class SigInfoMeterTests(unittest.TestCase):
+    def setUp(self):
+        self.output = MockOutput()
+        self.res = si.SigInfoMeter(info=False, usr1=False, usr2=False, output=self.output)
+
+    def tearDown(self):
+        for meter in list(self.res.meters):
+            self.res.remove_meter(meter)
+        assert len(monitor) == 0
+
+    def test_count_calls(self):
+        meter = self.res.add_meter(process_row)
+        for i in range(10):
+            process_row(i)
+        assert meter.count == 10
+
+    def test_remove_at_runtime(self):
+        meter = self.res.add_meter(process_row)
+        process_row(1)
+        self.res.remove_meter(meter)
+        process_row(1)
+        assert meter.count == 1
+        assert self.res.meters == []
+
+    def test_report_on_signal(self):
+        self.res.add_meter(process_row, name='rows')
+        process_row(1)
+        self.res(1, None)
+        output = ''.join(self.output.lines)
+        assert 'METER\trows' in output
+        assert 'COUNT\t1 ' in output
+        assert 'OVERHEAD' in output
+
+    def test_report_without_monitor(self):
+        self.res.add_meter(process_row)
+        # the handler must not take the lock of the monitor
+        with mock.patch.object(monitor, 'add', side_effect=AssertionError), \
+                mock.patch.object(monitor, 'remove', side_effect=AssertionError):
+            self.res(1, None)
+        assert 'OVERHEAD\t' in self.output.lines[-1]
+
+    def test_disabled_lines(self):
+        first = process_rows.__code__.co_firstlineno
+        self.res.add_meter(process_rows, first + 3)
+        process_rows([1, 2])
+        # the loop header was disabled by the first call
+        meter = self.res.add_meter(process_rows, first + 2)
+        process_rows([1, 2])
+        assert meter.count == 3
+
+    def test_other_tools_stay_disabled(self):
+        mon = sys.monitoring
+        tool_id = 5 if mon.get_tool(5) is None else 0
+        events = []
+
+        def on_line(code, line):
+            events.append(line)
+            return mon.DISABLE
+
+        first = process_rows.__code__.co_firstlineno
+        self.res.add_meter(process_rows, first + 3)
+        mon.use_tool_id(tool_id, 'test')
+        try:
+            mon.register_callback(tool_id, mon.events.LINE, on_line)
+            mon.set_local_events(tool_id, process_rows.__code__, mon.events.LINE)
+            process_rows([1])
+            count = len(events)
+            self.res.add_meter(process_rows, first + 2)
+            process_rows([1])
+            assert len(events) == count
+        finally:
+            mon.set_local_events(tool_id, process_rows.__code__, 0)
+            mon.register_callback(tool_id, mon.events.LINE, None)
+            mon.free_tool_id(tool_id)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+import urllib.request
+
+from siginfo import siginfoclass as si
+from siginfo.metrics import CONTENT_TYPE, MetricsExporter
+
+
+class MockOutput(object):
+    def __init__(self):
+        self.lines = []
+
+    def write(self, line):
+        self.lines.append(line)
+
+    def flush(self):
+        pass
+
+
+class Job(object):
+    def __init__(self):
+        self.queue = [1, 2, 3]
+
+
+class RenderTests(unittest.TestCase):
+    def setUp(self):
+        self.siginfo = si.SigInfoSingle(info=False, usr1=False, usr2=False, output=MockOutput())
+
+    def run_in_thread(self, callback):
+        """
+        Calls ``callback(exporter)`` while another thread is stopped
+        with the locals ``i``, ``job`` and ``name``
+        """
+        ready = threading.Event()
+        block = threading.Lock()
+        block.acquire()
+
+        def worker():
+            i = 42
+            job = Job()
+            name = 'text'
+            ready.set()
+            block.acquire()
+            return i, job, name
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        try:
+            ready.wait()
+            while sys._current_frames()[thread.ident].f_code.co_name != 'worker':
+                time.sleep(0.001)
+            return callback(MetricsExporter(thread.ident, prefix='test'))
+        finally:
+            block.release()
+            thread.join()
+
+    def test_values(self):
+        def render(exporter):
+            exporter.add_expression('i')
+            exporter.add_expression('len(job.queue)')
+            exporter.add_expression('name')
+            exporter.add_expression('missing')
+            return exporter.render()
+
+        text = self.run_in_thread(render)
+        assert text.startswith('# TYPE test_value gauge\n# HELP test_value ')
+        assert 'test_value{expression="i"} 42\n' in text
+        assert 'test_value{expression="len(job.queue)"} 3\n' in text
+        assert 'expression="name"' not in text
+        assert 'expression="missing"' not in text
+        assert text.endswith('# EOF\n')
+
+    def test_siginfo(self):
+        self.siginfo.set_vars('i', 'caller:i')
+        tracker = self.siginfo.track('i', total=100)
+        tracker.samples.extend([(0.0, 10), (2.0, 20)])
+        self.siginfo(None, sys._getframe())
+
+        def render(exporter):
+            exporter.add_siginfo(self.siginfo, name='single')
+            return exporter.render()
+
+        text = self.run_in_thread(render)
+        assert 'test_value{expression="i"} 42\n' in text
+        assert 'expression="caller:i"' not in text
+        assert 'test_progress{variable="i"} 42\n' in text
+        assert 'test_progress_target{variable="i"} 100\n' in text
+        assert '# TYPE test_signals counter\n' in text
+        assert 'test_signals_total{handler="single"} 0\n' in text
+        assert 'test_written_bytes_total{handler="single"} ' in text
+        assert 'test_pause_seconds_bucket{handler="single",le="+Inf"} 0\n' in text
+        assert 'test_pause_seconds_count{handler="single"} 0\n' in text
+
+    def test_histogram(self):
+        self.siginfo.handle(1, sys._getframe(), None)
+        exporter = MetricsExporter()
+        exporter.add_stats(self.siginfo)
+        text = exporter.render()
+        assert 'siginfo_signals_total{handler="SigInfoSingle"} 1\n' in text
+        assert 'siginfo_dumps_total{handler="SigInfoSingle"} 1\n' in text
+        assert 'siginfo_pause_seconds_count{handler="SigInfoSingle"} 1\n' in text
+        buckets = [
+            int(line.rsplit(' ', 1)[1]) for line in text.split('\n')
+            if line.startswith('siginfo_pause_seconds_bucket')
+        ]
+        assert buckets == sorted(buckets)
+        assert buckets[-1] == 1
+
+    def test_prometheus_format(self):
+        exporter = MetricsExporter()
+        exporter.add_stats(self.siginfo)
+        text = exporter.render(openmetrics=False)
+        assert '# TYPE siginfo_signals_total counter\n' in text
+        assert '# EOF' not in text
+
+    def test_escape(self):
+        exporter = MetricsExporter()
+        exporter.add_stats(self.siginfo, name='a"b\\c')
+        assert 'handler="a\\"b\\\\c"' in exporter.render()
+
+
+class OutputTests(unittest.TestCase):
+    def setUp(self):
+        self.exporter = MetricsExporter()
+        self.exporter.add_stats(
+            si.SiginfoBasic(info=False, usr1=False, usr2=False, output=MockOutput())
+        )
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.exporter.stop_serving()
+        self.exporter.stop_writing()
+        shutil.rmtree(self.directory)
+
+    def test_serve(self):
+        host, port = self.exporter.serve(0)
+        response = urllib.request.urlopen('http://{}:{}/metrics'.format(host, port), timeout=5)
+        assert response.headers['Content-Type'] == CONTENT_TYPE
+        body = response.read().decode('utf-8')
+        assert 'siginfo_signals_total{handler="SiginfoBasic"} 0\n' in body
+        assert body.endswith('# EOF\n')
+
+    def test_write(self):
+        path = os.path.join(self.directory, 'job.prom')
+        self.exporter.write(path)
+        with open(path) as fh:
+            assert '# TYPE siginfo_signals_total counter\n' in fh.read()
+        assert os.listdir(self.directory) == ['job.prom']
+
+    def test_write_textfile(self):
+        path = os.path.join(self.directory, 'job.prom')
+        self.exporter.write_textfile(path, interval=60)
+        self.exporter.stop_writing()
+        assert os.path.isfile(path)
@@ -0,0 +1,90 @@
+import collections
+import unittest
+
+from siginfo.progress import ProgressTracker
+
+
+class MockFrame(object):
+    def __init__(self, local_vars):
+        self.f_locals = local_vars
+
+
+class MutatedDeque(collections.deque):
+    """
+    Fails the first iterations like a deque appended to by another thread
+    """
+    failures = 1
+
+    def __iter__(self):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError('deque mutated during iteration')
+        return super().__iter__()
+
+
+class ProgressTrackerTests(unittest.TestCase):
+    def test_sample(self):
+        tracker = ProgressTracker('i', default=-1)
+        tracker.sample(MockFrame({'i': 12}))
+        tracker.sample(MockFrame({}))
+        assert [val for _, val in tracker.samples] == [12, -1]
+
+    def test_concurrent_append(self):
+        tracker = ProgressTracker('i', total=100)
+        tracker.samples = MutatedDeque([(10.0, 0), (20.0, 20)])
+        assert tracker.rate() == 2.0
+        tracker.samples.failures = 10
+        assert tracker.rate() is None
+        assert tracker.report() == 'i\tno samples'
+
+    def test_bounded_history(self):
+        tracker = ProgressTracker('i', history=3)
+        for i in range(10):
+            tracker.sample(MockFrame({'i': i}))
+        assert len(tracker.samples) == 3
+        assert tracker.samples[-1][1] == 9
+
+    def test_rate_and_eta(self):
+        tracker = ProgressTracker('i', total=100)
+        assert tracker.rate() is None
+        assert tracker.eta() is None
+        tracker.samples.extend([(10.0, 0), (20.0, 20), (30.0, 40)])
+        assert tracker.rate() == 2.0
+        assert tracker.eta() == 30.0
+
+    def test_eta_with_non_numeric_sample(self):
+        tracker = ProgressTracker('i', total=100)
+        tracker.samples.extend([(10.0, 0), (20.0, 20), (30.0, None)])
+        assert tracker.rate() == 2.0
+        assert tracker.eta() is None
+        tracker.samples.append((40.0, 'paused'))
+        assert tracker.eta() is None
+        assert tracker.report().split('\t')[:3] == ['i', 'paused', '2.00/s']
+
+    def test_rate_ignores_non_numeric_values(self):
+        tracker = ProgressTracker('i')
+        tracker.samples.extend([(10.0, 0), (15.0, None), (20.0, 5)])
+        assert tracker.rate() == 0.5
+
+    def test_report(self):
+        tracker = ProgressTracker('i', total=100)
+        tracker.samples.extend([(10.0, 0), (20.0, 50)])
+        res = tracker.report().split('\t')
+        assert res[0] == 'i'
+        assert res[1] == '50'
+        assert res[2] == '5.00/s'
+        assert res[3] == '50.0%'
+        assert res[4] == 'ETA 0:00:10'
+        assert res[5] == '▁█'
+
+        tracker.samples.append((30.0, 75))
+        res = tracker.report().split('\t')
+        assert res[2] == '+25 in 10.0s'
+
+    def test_report_without_samples(self):
+        tracker = ProgressTracker('i')
+        assert tracker.report() == 'i\tno samples'
+
+
+if __name__ == '__main__':
+    unittest.main()
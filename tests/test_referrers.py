@@ -0,0 +1,140 @@
+import sys
+import threading
+import unittest
+
+from siginfo import siginfoclass as si
+from siginfo.referrers import (
+    estimate_size, find_referrer_chains, is_own_frame, largest_objects, _edge
+)
+
+
+cache = {}
+
+
+class Holder(object):
+    pass
+
+
+holder = Holder()
+
+
+class MockOutput(object):
+    def __init__(self):
+        self.lines = []
+
+    def write(self, line):
+        self.lines.append(line)
+
+    def flush(self):
+        pass
+
+
+class SizeTests(unittest.TestCase):
+    def test_estimate_size(self):
+        small = ['x']
+        large = ['x' * 1000 for _ in range(1000)]
+        assert estimate_size(large) > 1000 * 1000
+        assert estimate_size(large) > 100 * estimate_size(small)
+        assert estimate_size({'a': 'x' * 1000}) > 1000
+        assert estimate_size(12) == sys.getsizeof(12)
+
+    def test_largest_objects(self):
+        rows = ['x' * 100 for _ in range(1000)]
+        name = 'small'
+        found = largest_objects([sys._getframe()], n=1)
+        assert len(found) == 1
+        assert found[0].obj is rows
+        assert found[0].description == "local 'rows' in test_largest_objects"
+        assert found[0].frame is sys._getframe()
+        assert name == 'small'
+
+    def test_largest_objects_gc(self):
+        found = largest_objects(n=2, scan_gc=True)
+        assert len(found) == 2
+        assert found[0].size >= found[1].size
+        assert found[0].frame is None
+
+
+class EdgeTests(unittest.TestCase):
+    def test_edge(self):
+        child = []
+        assert _edge({'key': child}, child) == "['key']"
+        assert _edge([1, child], child) == '[1]'
+        instance = Holder()
+        instance.attr = child
+        assert _edge(instance, instance.__dict__) == '.__dict__'
+        assert _edge(object(), child) == ''
+
+    def test_own_frame(self):
+        assert not is_own_frame(sys._getframe())
+
+
+class ChainTests(unittest.TestCase):
+    def tearDown(self):
+        cache.clear()
+        holder.__dict__.clear()
+
+    def test_module_chains(self):
+        rows = list(range(100))
+        cache['k'] = {'rows': rows}
+        holder.data = rows
+        chains, complete = find_referrer_chains(rows, max_chains=5, ignore=[sys._getframe()])
+        assert complete
+        assert sorted(chains) == [
+            "held by {}.cache['k'] → dict['rows'] → list".format(__name__),
+            'held by {}.holder.data → list'.format(__name__),
+        ]
+
+    def test_frame_and_thread(self):
+        rows = list(range(100))
+        ready = threading.Event()
+        stop = threading.Event()
+
+        def worker(data):
+            ready.set()
+            stop.wait()
+
+        thread = threading.Thread(target=worker, args=(rows,), name='worker')
+        thread.start()
+        ready.wait()
+        try:
+            chains, _ = find_referrer_chains(rows, max_chains=10, ignore=[sys._getframe()])
+        finally:
+            stop.set()
+            thread.join()
+        assert "held by frame worker local 'data' (worker)" in chains
+        assert "held by thread 'worker'._args[0] → list" in chains
+
+    def test_limits(self):
+        rows = list(range(100))
+        cache['k'] = [[[rows]]]
+        chains, complete = find_referrer_chains(rows, max_depth=2, ignore=[sys._getframe()])
+        assert chains == []
+        assert not complete
+
+        chains, complete = find_referrer_chains(rows, max_nodes=1, ignore=[sys._getframe()])
+        assert chains == []
+        assert not complete
+
+    def test_no_own_containers(self):
+        rows = list(range(100))
+        chains, complete = find_referrer_chains(rows, ignore=[sys._getframe()])
+        assert chains == []
+        assert complete
+
+
+class SigInfoReferrersTests(unittest.TestCase):
+    def test_call(self):
+        mock_out = MockOutput()
+        siginfo = si.SigInfoReferrers(info=False, usr1=False, usr2=False, output=mock_out)
+        siginfo.TOP_N = 1
+        rows = ['x' * 100 for _ in range(1000)]
+        cache['k'] = rows
+        try:
+            siginfo(None, sys._getframe())
+        finally:
+            cache.clear()
+        output = ''.join(mock_out.lines)
+        assert "REFERRERS\nlocal 'rows' in test_call\tlist\t" in output
+        assert "\theld by {}.cache['k'] → list\n".format(__name__) in output
+        assert 'test_call local' not in output
@@ -0,0 +1,127 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from siginfo import siginfoclass as si
+from siginfo.resources import ResourceReader, parse_io, parse_stat, parse_status
+
+
+STATUS = b'''Name:\tpython
+State:\tS (sleeping)
+VmHWM:\t   20480 kB
+VmRSS:\t   10240 kB
+Threads:\t3
+voluntary_ctxt_switches:\t100
+nonvoluntary_ctxt_switches:\t7
+'''
+
+IO = b'''rchar: 2048
+wchar: 1024
+syscr: 10
+syscw: 5
+read_bytes: 4096
+write_bytes: 0
+cancelled_write_bytes: 0
+'''
+
+STAT = (
+    b'1234 (my (odd) name) S 1 1234 1234 0 -1 4194560 1000 0 0 0 '
+    b'250 50 0 0 20 0 3 0 100 1000000 2500 18446744073709551615'
+)
+
+
+class MockOutput(object):
+    def __init__(self):
+        self.lines = []
+
+    def write(self, line):
+        self.lines.append(line)
+
+    def flush(self):
+        pass
+
+
+class ParseTests(unittest.TestCase):
+    def test_status(self):
+        assert parse_status(STATUS) == {
+            'rss': 10240 * 1024,
+            'rss_peak': 20480 * 1024,
+            'threads': 3,
+            'ctx_voluntary': 100,
+            'ctx_involuntary': 7,
+        }
+
+    def test_io(self):
+        assert parse_io(IO) == {
+            'read_chars': 2048, 'write_chars': 1024, 'read_bytes': 4096, 'write_bytes': 0
+        }
+
+    def test_stat(self):
+        assert parse_stat(STAT, 100) == {'cpu_user': 2.5, 'cpu_system': 0.5}
+
+
+class ResourceReaderTests(unittest.TestCase):
+    def setUp(self):
+        self.proc = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.proc, 'fd'))
+        self.write('status', STATUS)
+        self.write('stat', STAT)
+        for fd in range(4):
+            self.write(os.path.join('fd', str(fd)), b'')
+
+    def tearDown(self):
+        shutil.rmtree(self.proc)
+
+    def write(self, name, data):
+        with open(os.path.join(self.proc, name), 'wb') as fh:
+            fh.write(data)
+
+    def test_sample_skips_missing_files(self):
+        sample = ResourceReader(self.proc).sample()
+        assert sample['rss'] == 10240 * 1024
+        assert sample['cpu_user'] > 0
+        assert sample['fds'] == 3
+        assert 'read_chars' not in sample
+
+    def test_report_with_deltas(self):
+        reader = ResourceReader(self.proc)
+        first = reader.report().split('\n')
+        assert first[0] == 'RSS\t10.0 MB peak 20.0 MB'
+        assert first[-1] == 'THREADS\t3'
+        self.write('status', STATUS.replace(b'10240', b'11264').replace(b'\t100', b'\t105'))
+        self.write('io', IO)
+        second = reader.report().split('\n')
+        assert second[0] == 'RSS\t11.0 MB (+1.0 MB) peak 20.0 MB'
+        assert 'CTX\tvoluntary 105 (+5) involuntary 7 (+0)' in second
+        assert '% of ' in second[1]
+        assert second[2] == 'IO\tread 2.0 KB write 1.0 KB'
+
+    def test_large_file(self):
+        reader = ResourceReader(self.proc)
+        reader._buffer = bytearray(16)
+        assert reader.sample()['threads'] == 3
+        assert len(reader._buffer) > len(STATUS)
+
+
+@unittest.skipUnless(os.path.isdir('/proc/self'), '/proc is not available')
+class ProcTests(unittest.TestCase):
+    def test_current_process(self):
+        sample = ResourceReader().sample()
+        assert sample['rss'] > 0
+        assert sample['threads'] >= 1
+        assert sample['fds'] >= 0
+
+    def test_siginfo_resources(self):
+        res = si.SiginfoBasic(info=False, usr1=False, usr2=False, output=MockOutput())
+        res.RESOURCES = True
+        res.BOTTLENECKS = False
+        res.MAX_LEVELS = 1
+        res(10, __import__('sys')._getframe())
+        assert '\nRESOURCES\n' in res.OUTPUT.lines
+        report = res.OUTPUT.lines[res.OUTPUT.lines.index('\nRESOURCES\n') + 1]
+        assert report.startswith('RSS\t')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,20 @@
 import unittest
 from siginfo import siginfoclass as si
+from siginfo import dispatcher
 import sys
+import time
 
 OLD_OUT = sys.stdout
+OLD_SIGNAL = si.signal
+
+
+def mock_signal(**kwargs):
+    si.signal = dispatcher.signal = MockSignal(**kwargs)
+
+
+def restore_signal():
+    si.signal = dispatcher.signal = OLD_SIGNAL
+    dispatcher.dispatchers.clear()
 
 
 class MockOutput(object):
@@ -25,9 +37,14 @@ class MockSignal(object):
         if usr2:
             self.SIGUSR2 = 3
         self.signals = []
+        self.handlers = {}
 
     def signal(self, sigtype, func):
         self.signals.append((sigtype, func))
+        self.handlers[sigtype] = func
+
+    def getsignal(self, sigtype):
+        return self.handlers.get(sigtype)
 
 
 class MockClass(object):
@@ -65,10 +82,11 @@ class MockFunction(object):
 class SigInfoInitTests(unittest.TestCase):
     def setUp(self):
         si.sys.stdout = MockOutput()
-        si.signal = MockSignal()
+        mock_signal()
 
     def tearDown(self):
         si.sys.stdout = OLD_OUT
+        restore_signal()
 
     def test_init(self):
         res = si.SiginfoBasic()
@@ -90,9 +108,10 @@ class SigInfoInputTests(unittest.TestCase):
 
     def tearDown(self):
         si.sys.stdout = OLD_OUT
+        restore_signal()
 
     def test_inputs(self):
-        si.signal = MockSignal()
+        mock_signal()
         res = si.SiginfoBasic(info=True, usr1=True, usr2=True)
         assert res.signals == ['INFO', 'USR1', 'USR2']
 
@@ -115,14 +134,14 @@ class SigInfoInputTests(unittest.TestCase):
 
     def test_inexistent_inputs(self):
         si.sys.stdout.lines = []
-        si.signal = MockSignal(info=False)
+        mock_signal(info=False)
         res = si.SiginfoBasic(info=True, usr1=True, usr2=True)
         assert res.signals == ['USR1', 'USR2']
         assert 'No SIGINFO availale\n' == si.sys.stdout.lines[0]
 
     def test_all_missing_inputs(self):
         si.sys.stdout.lines = []
-        si.signal = MockSignal(info=False, usr1=False, usr2=False)
+        mock_signal(info=False, usr1=False, usr2=False)
         res = si.SiginfoBasic(info=True, usr1=True, usr2=True)
         assert res.signals == []
         assert 'No SIGINFO availale\n' == si.sys.stdout.lines[0]
@@ -251,7 +270,7 @@ class SiginfoCalling(unittest.TestCase):
 
         assert len(mock_out.lines) == 10
         assert res._print_frame.called == 1
-        assert res._print_frame.called_with[0][0][0] == mock_frame
+        assert res._print_frame.called_with[0][0][0].lineno == mock_frame.f_lineno
 
     def test_signal_calling_multiple_level(self):
         si.subprocess.check_output = lambda x: '5 80'
@@ -270,8 +289,8 @@ class SiginfoCalling(unittest.TestCase):
 
         assert len(mock_out.lines) == 16
         assert res._print_frame.called == 2
-        assert res._print_frame.called_with[0][0][0] == mock_frame
-        assert res._print_frame.called_with[1][0][0] == mock_frame_back
+        assert res._print_frame.called_with[0][0][0].lineno == mock_frame.f_lineno
+        assert res._print_frame.called_with[1][0][0].lineno == mock_frame_back.f_lineno
 
     def test_signal_calling_limit_levels(self):
         """
@@ -295,7 +314,104 @@ class SiginfoCalling(unittest.TestCase):
 
         assert len(mock_out.lines) == 10
         assert res._print_frame.called == 1
-        assert res._print_frame.called_with[0][0][0] == mock_frame
+        assert res._print_frame.called_with[0][0][0].lineno == mock_frame.f_lineno
+
+    def test_collapse_recursion(self):
+        si.subprocess.check_output = lambda x: '5 80'
+        mock_out = MockOutput()
+        main = MockFrame(line_number=1)
+        frame = main
+        for _ in range(50):
+            frame = MockFrame(line_number=2, back=frame)
+            frame.f_code = main.f_code
+        top = MockFrame(line_number=3, back=frame)
+        res = si.SiginfoBasic(
+            info=False,
+            usr1=False,
+            usr2=False,
+            output=mock_out)
+
+        res._print_frame = MockFunction()
+        res(1, top)
+
+        # top frame, first and last frame of the recursion and the main frame
+        assert res._print_frame.called == 4
+        assert res._print_frame.called_with[1][0][0].lineno == 2
+        assert res._print_frame.called_with[2][0][0].lineno == 2
+        repeated = mock_out.lines.index('\nREPEATED\t× 50 (LEVEL 1 - 50, 1 frame each)\n')
+        levels = [line for line in mock_out.lines if line.startswith('LEVEL')]
+        assert levels == ['LEVEL    \t{}\n'.format(i) for i in (0, 1, 50, 51)]
+        assert mock_out.lines.index(levels[1]) < repeated < mock_out.lines.index(levels[2])
+
+        res.COLLAPSE_RECURSION = False
+        res._print_frame = MockFunction()
+        res(1, top)
+        assert res._print_frame.called == 52
+
+    def test_locals_top_k(self):
+        si.subprocess.check_output = lambda x: '5 80'
+        main = MockFrame(line_number=1)
+        frame = main
+        for _ in range(10):
+            frame = MockFrame(line_number=2, back=frame)
+            frame.f_code = main.f_code
+        top = MockFrame(line_number=3, back=frame)
+        res = si.SiginfoBasic(
+            info=False,
+            usr1=False,
+            usr2=False,
+            output=MockOutput())
+        res.COLLAPSE_RECURSION = False
+        res.LOCALS_TOP_K = 1
+
+        res._print_frame = MockFunction()
+        res(1, top)
+
+        with_locals = [
+            idx for idx, call in enumerate(res._print_frame.called_with)
+            if call[0][0].locals is not None
+        ]
+        # top frame, first and last frame of the recursion and the single main frame
+        assert with_locals == [0, 1, 10, 11]
+
+    def test_locals_top_k_collapsed(self):
+        si.subprocess.check_output = lambda x: '5 80'
+        main = MockFrame(line_number=1)
+        frame = main
+        for _ in range(10):
+            frame = MockFrame(line_number=2, back=frame)
+            frame.f_code = main.f_code
+        top = MockFrame(line_number=3, back=frame)
+        res = si.SiginfoBasic(
+            info=False,
+            usr1=False,
+            usr2=False,
+            output=MockOutput())
+        res.LOCALS_TOP_K = 1
+
+        res._print_frame = MockFunction()
+        res(1, top)
+
+        printed = [call[0][0].level for call in res._print_frame.called_with]
+        with_locals = [
+            call[0][0].level for call in res._print_frame.called_with
+            if call[0][0].locals is not None
+        ]
+        # the last frame of the collapsed recursion is printed with its locals
+        assert printed == [0, 1, 10, 11]
+        assert with_locals == [0, 1, 10, 11]
+
+    def test_print_without_locals(self):
+        si.subprocess.check_output = lambda x: '5 80'
+        mock_out = MockOutput()
+        res = si.SiginfoBasic(
+            info=False,
+            usr1=False,
+            usr2=False,
+            output=mock_out)
+        res._print_frame(MockFrame(), False)
+        assert 'LOCALS\n' not in mock_out.lines
+        assert len(mock_out.lines) == 11
 
 
 class SiginfoSingleCalling(unittest.TestCase):
@@ -343,6 +459,92 @@ class SiginfoSingleCalling(unittest.TestCase):
         assert len(mock_out.lines) == 1
         assert mock_out.lines[0] == 'foobar\n'
 
+    def test_getting_global_variables(self):
+        mock_out = MockOutput()
+        mock_frame = MockFrame({'foo': '12'})
+        mock_frame.f_globals = {'xyz': 'abc'}
+        res = si.SigInfoSingle(
+            info=False,
+            usr1=False,
+            usr2=False,
+            output=mock_out)
+        res.set_var('xyz', 'foobar')
+        res(1, mock_frame)
+        res.set_var('xyz', 'foobar', use_globals=True)
+        res(1, mock_frame)
+
+        assert mock_out.lines[-2:] == ['foobar\n', 'abc\n']
+
+    def test_getting_non_identifier_variables(self):
+        mock_out = MockOutput()
+        mock_frame = MockFrame({'.0': 'iter', 'foo': '12'})
+        res = si.SigInfoSingle(
+            info=False,
+            usr1=False,
+            usr2=False,
+            output=mock_out)
+        res.set_var('.0')
+        res(1, mock_frame)
+        res.set_var('no such-name', 'foobar')
+        res(1, mock_frame)
+
+        assert mock_out.lines[-2:] == ['iter\n', 'foobar\n']
+
+    def test_getting_expressions(self):
+        mock_out = MockOutput()
+        mock_frame = MockFrame({'foo': [1, 2, 3]}, back=MockFrame({'bar': 'abc'}))
+        res = si.SigInfoSingle(
+            info=False,
+            usr1=False,
+            usr2=False,
+            output=mock_out)
+        res.set_vars('len(foo)', 'caller:bar', 'foo.missing')
+
+        mock_out.lines = []
+        res(1, mock_frame)
+
+        assert len(mock_out.lines) == 3
+        assert mock_out.lines[0] == 'len(foo)\t3\n'
+        assert mock_out.lines[1] == 'caller:bar\tabc\n'
+        assert mock_out.lines[2].startswith('foo.missing\t<AttributeError: ')
+
+    def test_tracking_variables(self):
+        mock_out = MockOutput()
+        res = si.SigInfoSingle(
+            info=False,
+            usr1=False,
+            usr2=False,
+            output=mock_out)
+        res.track('foo', total=100)
+        res.track('bar')
+
+        mock_out.lines = []
+        res(1, MockFrame({'foo': 10, 'bar': 'abc'}))
+        res(1, MockFrame({'foo': 20, 'bar': 'abc'}))
+
+        assert len(mock_out.lines) == 4
+        assert mock_out.lines[2].startswith('foo\t20\t+10 in ')
+        assert '20.0%' in mock_out.lines[2]
+        assert mock_out.lines[3] == 'bar\tabc\n'
+        assert len(res.trackers[0].samples) == 2
+
+    def test_periodic_ticks(self):
+        res = si.SigInfoSingle(
+            info=False,
+            usr1=False,
+            usr2=False,
+            output=MockOutput())
+        tracker = res.track('marker')
+        marker = 42
+        res.start_ticks(0.001)
+        for _ in range(1000):
+            if len(tracker.samples) >= 2:
+                break
+            time.sleep(0.001)
+        res.stop_ticks()
+        assert res._ticker is None
+        assert tracker.samples[-1][1] == marker
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,130 @@
+import functools
+import json
+import os
+import sys
+import unittest
+
+from siginfo.localclass import LocalClass
+from siginfo.snapshot import (
+    FrameSnapshot,
+    LocalSnapshot,
+    aggregate,
+    capture_frame,
+    capture_locals,
+    render_json
+)
+
+
+def get_frame(**kwargs):
+    return sys._getframe()
+
+
+def module_frame():
+    namespace = {'sys': sys, 'os': os}
+    exec(compile(
+        'count = 3\n_private = 1\ndef func(): pass\nframe = sys._getframe()', 'module.py', 'exec'
+    ), namespace)
+    return namespace['frame']
+
+
+class LocalSnapshotTests(unittest.TestCase):
+    def test_tuple_backed(self):
+        local = LocalSnapshot('a', 'int', '1')
+        assert local == ('a', 'int', '1')
+        assert (local.name, local.type_name, local.text) == ('a', 'int', '1')
+        assert not hasattr(local, '__dict__')
+
+    def test_capture_locals(self):
+        def summarize(value):
+            return 'summary' if isinstance(value, list) else None
+
+        res = capture_locals({'a': 1, 'b': [1, 2]}, summarize)
+        assert res == (('a', 'int', '1'), ('b', 'list', 'summary'))
+
+
+    def test_ordered_by_interest(self):
+        local_vars = {'func': len, '__dunder': 1, '_private': 2, 'os': os, 'value': 3}
+        res = [local.name for local in capture_locals(local_vars, max_locals=10)]
+        assert res == ['value', '_private', '__dunder', 'func', 'os']
+        # without a limit the original order is kept
+        assert [local.name for local in capture_locals(local_vars)] == list(local_vars)
+
+    def test_callable_values_are_data(self):
+        class Handler(object):
+            def __call__(self):
+                pass
+
+        local_vars = {
+            'cls': Handler, 'method': self.setUp, 'handler': Handler(),
+            'partial': functools.partial(int, base=2), 'func': len
+        }
+        res = [local.name for local in capture_locals(local_vars, max_locals=10)]
+        assert res == ['handler', 'partial', 'cls', 'method', 'func']
+
+    def test_max_locals(self):
+        local_vars = {'v{}'.format(idx): idx for idx in range(10)}
+        res = capture_locals(local_vars, max_locals=3)
+        assert [local.name for local in res] == ['v0', 'v1', 'v2', '...']
+        assert res[-1].text == '7 more'
+
+
+class FrameSnapshotTests(unittest.TestCase):
+    def test_capture_frame(self):
+        frame = get_frame(x=3)
+        snapshot = capture_frame(frame, 2)
+        assert not hasattr(snapshot, '__dict__')
+        assert snapshot.level == 2
+        assert snapshot.name == 'get_frame'
+        assert snapshot.filename == __file__
+        assert snapshot.lineno == frame.f_lineno
+        assert snapshot.caller is sys._getframe().f_code
+        assert snapshot.locals == (('kwargs', 'dict', "{'x': 3}"),)
+
+    def test_without_locals(self):
+        snapshot = capture_frame(get_frame(), with_locals=False)
+        assert snapshot.locals is None
+        assert snapshot.to_dict()['locals'] is None
+
+    def test_module_frames(self):
+        frame = module_frame()
+        assert capture_frame(frame, module_policy='skip').locals is None
+        names = capture_frame(frame, module_policy='names').locals
+        assert ('count', 'int', '') in names
+        assert ('sys', 'module', '') in names
+        values = capture_frame(frame, module_policy='values').locals
+        assert [local.name for local in values] == ['count', '_private', 'frame']
+        assert len(capture_frame(frame, module_policy='all').locals) == 7
+        with self.assertRaises(ValueError):
+            capture_frame(frame, module_policy='invalid')
+
+    def test_module_policy_ignores_functions(self):
+        snapshot = capture_frame(get_frame(x=3), module_policy='skip')
+        assert snapshot.locals is not None
+
+    def test_render_json(self):
+        snapshot = capture_frame(get_frame(x=3))
+        res = json.loads(render_json([snapshot]))
+        assert res[0]['name'] == 'get_frame'
+        assert res[0]['caller'] == 'test_render_json'
+        assert res[0]['locals'] == [{'name': 'kwargs', 'type': 'dict', 'value': "{'x': 3}"}]
+
+    def test_aggregate(self):
+        code = get_frame.__code__
+        stacks = [
+            [FrameSnapshot(0, code, 10), FrameSnapshot(1, code, 20)],
+            [FrameSnapshot(0, code, 10), FrameSnapshot(1, code, 10)],
+        ]
+        counts = aggregate(stacks)
+        assert counts[(__file__, 'get_frame', 10)] == 2
+        assert counts[(__file__, 'get_frame', 20)] == 1
+
+    def test_local_class_from_snapshot(self):
+        snapshot = capture_frame(get_frame(x=3))
+        loc = LocalClass(snapshot.locals)
+        assert loc.var_names == ['VARIABLE', 'kwargs']
+        assert loc.types == ['TYPE', 'dict']
+        assert loc.values == ['VALUE', "{'x': 3}"]
+
+
+if __name__ == '__main__':
+    unittest.main()
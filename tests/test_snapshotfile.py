@@ -0,0 +1,227 @@
+import io
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+from siginfo import registry
+from siginfo import siginfoclass as si
+from siginfo.snapshotfile import (
+    MAGIC,
+    SnapshotWriter,
+    UnpicklableValue,
+    load_snapshot
+)
+
+
+class MockOutput(object):
+    def __init__(self):
+        self.lines = []
+
+    def write(self, line):
+        self.lines.append(line)
+
+    def flush(self):
+        pass
+
+
+class Point(object):
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+def capture(**local_vars):
+    def inner(**kwargs):
+        return sys._getframe()
+
+    return inner(**local_vars)
+
+
+class SnapshotFileTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'test.snap')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, frames, module_policy='all', **kwargs):
+        with open(self.path, 'wb') as fh:
+            writer = SnapshotWriter(fh, **kwargs)
+            writer.write_meta(10, job='test')
+            for level, frame in enumerate(frames):
+                writer.write_frame(level, frame, module_policy)
+            writer.close()
+        return writer
+
+    def test_roundtrip(self):
+        frame = capture(count=42, name='rows', point=Point(1, 2), items=[1, 2, 3])
+        self.write([frame, frame.f_back])
+        snap = load_snapshot(self.path)
+        assert snap.complete
+        assert snap.meta['pid'] == os.getpid()
+        assert snap.meta['signal'] == 10
+        assert snap.meta['job'] == 'test'
+        assert len(snap) == 2
+        assert snap[0].name == 'inner'
+        assert snap[0].lineno == frame.f_lineno
+        assert snap[1].name == 'capture'
+        local_vars = snap[0].locals['kwargs']
+        assert local_vars['count'] == 42
+        assert local_vars['items'] == [1, 2, 3]
+        assert local_vars['point'].y == 2
+
+    def test_unpicklable_value(self):
+        frame = capture(lock=threading.Lock(), value=1)
+        self.write([frame])
+        snap = load_snapshot(self.path)
+        value = snap[0].locals['kwargs']
+        assert isinstance(value, UnpicklableValue)
+        assert value.type_name == 'dict'
+        assert 'not picklable' in value.reason
+        assert 'value' in value.text
+
+    def test_too_large_value(self):
+        frame = capture(data=b'x' * 10000)
+        self.write([frame], max_value_size=1000)
+        value = load_snapshot(self.path)[0].locals['kwargs']
+        assert isinstance(value, UnpicklableValue)
+        assert value.reason == 'too large'
+        assert len(value.text) < 300
+
+    def test_file_size_limit(self):
+        frame = capture(data='x')
+        self.write([frame], max_file_size=10)
+        value = load_snapshot(self.path)[0].locals['kwargs']
+        assert value.reason == 'file size limit'
+
+    def test_file_size_limit_within_frame(self):
+        namespace = {'sys': sys}
+        exec('\n'.join(
+            ["data{0} = '{0}' * 400".format(i) for i in range(10)] + ['frame = sys._getframe()']
+        ), namespace)
+        self.write([namespace.pop('frame')], max_file_size=1500)
+        assert os.path.getsize(self.path) < 2000
+        local_vars = load_snapshot(self.path)[0].locals
+        assert local_vars['data0'] == '0' * 400
+        assert local_vars['data9'].reason == 'file size limit'
+        assert local_vars['data9'].text == ''
+
+    def test_module_policy(self):
+        namespace = {'sys': sys}
+        exec('import os\ncount = 1\ndef func(): pass\nframe = sys._getframe()', namespace)
+        frame = namespace.pop('frame')
+        for policy, names in [
+            ('skip', set()),
+            ('names', {'__builtins__', 'sys', 'os', 'count', 'func'}),
+            ('values', {'__builtins__', 'count'}),
+            ('all', {'__builtins__', 'sys', 'os', 'count', 'func'}),
+        ]:
+            self.write([frame], module_policy=policy)
+            local_vars = load_snapshot(self.path)[0].locals
+            assert set(local_vars) == names, policy
+        assert local_vars['count'] == 1
+        self.write([frame], module_policy='names')
+        value = load_snapshot(self.path)[0].locals['count']
+        assert value.type_name == 'int'
+        assert value.text == ''
+
+    def test_truncated_file(self):
+        frame = capture(data='x')
+        self.write([frame, frame.f_back])
+        with open(self.path, 'rb') as fh:
+            data = fh.read()
+        with open(self.path, 'wb') as fh:
+            fh.write(data[:-20])
+        snap = load_snapshot(self.path)
+        assert not snap.complete
+        assert len(snap) == 1
+
+    def test_invalid_file(self):
+        with open(self.path, 'wb') as fh:
+            fh.write(b'not a snapshot')
+        with self.assertRaises(ValueError):
+            load_snapshot(self.path)
+
+    def test_unsupported_version(self):
+        with open(self.path, 'wb') as fh:
+            fh.write(MAGIC + b'\xff\xff')
+        with self.assertRaises(ValueError):
+            load_snapshot(self.path)
+
+    def test_streaming_writer(self):
+        fh = io.BytesIO()
+        writer = SnapshotWriter(fh)
+        writer.write_meta()
+        size = len(fh.getvalue())
+        writer.write_frame(0, capture(a=1))
+        assert len(fh.getvalue()) > size
+        assert writer.size == len(fh.getvalue())
+
+
+class SigInfoSnapshotTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.output = MockOutput()
+        self.siginfo = si.SigInfoSnapshot(
+            info=False, usr1=False, usr2=False, output=self.output, directory=self.directory
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_signal_writes_snapshot(self):
+        frame = capture(count=3)
+        self.siginfo.MAX_LEVELS = 1
+        self.siginfo(10, frame)
+        self.siginfo(10, frame)
+        assert len(self.siginfo.snapshots) == 2
+        assert self.siginfo.snapshots[0] != self.siginfo.snapshots[1]
+        assert self.output.lines[-1] == '\nSNAPSHOT\t{}\n'.format(self.siginfo.snapshots[1])
+        snap = load_snapshot(self.siginfo.snapshots[0])
+        assert len(snap) == 1
+        assert snap[0].locals['kwargs'] == {'count': 3}
+
+    def test_private_file(self):
+        self.siginfo.MAX_LEVELS = 1
+        path = self.siginfo.write_snapshot(capture())
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+    def test_planted_symlink(self):
+        # a dangling symlink with the next snapshot name is neither followed nor replaced
+        target = os.path.join(self.directory, 'victim')
+        self.siginfo.pid = 'planted'
+        self.siginfo.MAX_LEVELS = 1
+        names = [
+            'siginfo-planted-{}.snap'.format(time.strftime('%Y%m%d-%H%M%S', time.localtime(now)))
+            for now in (time.time(), time.time() + 1)
+        ]
+        for name in names:
+            os.symlink(target, os.path.join(self.directory, name))
+        path = self.siginfo.write_snapshot(capture())
+        assert os.path.basename(path) not in names
+        assert not os.path.lexists(target)
+        assert len(load_snapshot(path)) == 1
+
+    def test_default_directory(self):
+        original = os.environ.pop(registry.DIRECTORY_VARIABLE, None)
+        tempdir = tempfile.tempdir
+        tempfile.tempdir = self.directory
+        try:
+            siginfo = si.SigInfoSnapshot(info=False, usr1=False, usr2=False, output=self.output)
+            assert siginfo.directory == os.path.join(
+                self.directory, 'siginfo-{}'.format(os.getuid())
+            )
+        finally:
+            tempfile.tempdir = tempdir
+            if original is not None:
+                os.environ[registry.DIRECTORY_VARIABLE] = original
+
+
+if __name__ == '__main__':
+    unittest.main()
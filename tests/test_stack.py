@@ -0,0 +1,44 @@
+import unittest
+
+from siginfo.stack import find_runs, walk_stack
+
+
+class MockFrame(object):
+    def __init__(self, back=None):
+        self.f_back = back
+
+
+class WalkStackTests(unittest.TestCase):
+    def test_depth(self):
+        frame = MockFrame(MockFrame(MockFrame()))
+        assert len(walk_stack(frame, 10)) == 3
+        assert walk_stack(frame, 2) == [frame, frame.f_back]
+        assert walk_stack(None, 10) == []
+
+
+class FindRunsTests(unittest.TestCase):
+    def test_no_repeats(self):
+        assert find_runs(list('abcd')) == [(0, 1, 1), (1, 1, 1), (2, 1, 1), (3, 1, 1)]
+
+    def test_single_frame_recursion(self):
+        assert find_runs(['x'] + ['r'] * 100 + ['main']) == [(0, 1, 1), (1, 1, 100), (101, 1, 1)]
+
+    def test_pattern_recursion(self):
+        assert find_runs(list('abcbcbcd')) == [(0, 1, 1), (1, 2, 3), (7, 1, 1)]
+
+    def test_min_repeats(self):
+        assert find_runs(list('aab')) == [(0, 1, 1), (1, 1, 1), (2, 1, 1)]
+        assert find_runs(list('aab'), min_repeats=2) == [(0, 1, 2), (2, 1, 1)]
+
+    def test_prefers_longest_coverage(self):
+        # 'ab' x 3 covers more than 'a' alone
+        assert find_runs(list('abababc')) == [(0, 2, 3), (6, 1, 1)]
+
+    def test_max_pattern(self):
+        keys = list('abcdefghij') * 3
+        assert len(find_runs(keys)) == 30
+        assert find_runs(keys, max_pattern=10) == [(0, 10, 3)]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import sys
+import unittest
+
+from siginfo import siginfoclass as si
+from siginfo.stats import PAUSE_BUCKETS, HandlerStats, format_us
+
+
+class MockOutput(object):
+    def __init__(self):
+        self.lines = []
+
+    def write(self, line):
+        self.lines.append(line)
+
+    def flush(self):
+        pass
+
+
+class FormatTests(unittest.TestCase):
+    def test_format_us(self):
+        assert format_us(512) == '512us'
+        assert format_us(2048) == '2ms'
+        assert format_us(1500) == '1.5ms'
+        assert format_us(4000000) == '4s'
+
+
+class HandlerStatsTests(unittest.TestCase):
+    def test_empty(self):
+        stats = HandlerStats()
+        assert stats.percentile(0.5) is None
+        assert stats.as_dict()['pauses'] == {}
+        assert stats.report() == 'signals 0 dumps 0 coalesced 0 dropped 0 written 0 B'
+
+    def test_record_pause(self):
+        stats = HandlerStats()
+        stats.record_pause(500)        # < 1us
+        stats.record_pause(3000)       # 3us
+        stats.record_pause(3500)       # 3us
+        stats.record_pause(10 ** 12)   # way beyond the last bucket
+        assert stats.pause_ns == 500 + 3000 + 3500 + 10 ** 12
+        assert stats.pauses[0] == 1
+        assert stats.pauses[2] == 2
+        assert stats.pauses[PAUSE_BUCKETS - 1] == 1
+        assert stats.as_dict()['pauses'] == {1: 1, 4: 2, 1 << (PAUSE_BUCKETS - 1): 1}
+
+    def test_percentile(self):
+        stats = HandlerStats()
+        for _ in range(99):
+            stats.record_pause(100000)     # 100us
+        stats.record_pause(50000000)       # 50ms
+        assert stats.percentile(0.5) == 128
+        assert stats.percentile(0.99) == 128
+        assert stats.percentile(1.0) == 65536
+        assert 'pause p50 <128us p99 <128us max <65.5ms' in stats.report()
+
+
+class InstanceStatsTests(unittest.TestCase):
+    def setUp(self):
+        self.out = MockOutput()
+        self.siginfo = si.SiginfoBasic(info=False, usr1=False, usr2=False, output=self.out)
+        del self.out.lines[:]
+
+    def test_handle(self):
+        self.siginfo.STATS_FOOTER = True
+        before = self.siginfo.stats()['bytes']
+        self.siginfo.handle(1, sys._getframe(), None)
+        stats = self.siginfo.stats()
+        assert stats['signals'] == 1
+        assert stats['dumps'] == 1
+        assert stats['coalesced'] == 0
+        assert stats['bytes'] - before == sum(len(line) for line in self.out.lines)
+        assert stats['capture_ns'] > 0
+        assert stats['render_ns'] > 0
+        assert stats['write_ns'] > 0
+        assert sum(stats['pauses'].values()) == 1
+        assert self.out.lines[-1].startswith('\nSIGINFO\tsignals 1 dumps 1 ')
+
+    def test_no_footer_by_default(self):
+        self.siginfo.handle(1, sys._getframe(), None)
+        assert not any(line.startswith('\nSIGINFO\t') for line in self.out.lines)
+
+    def test_coalesced(self):
+        self.siginfo._busy = True
+        self.siginfo.handle(1, sys._getframe(), None)
+        self.siginfo._busy = False
+        stats = self.siginfo.stats()
+        assert stats['signals'] == 1
+        assert stats['coalesced'] == 1
+        assert stats['dumps'] == 0
+        assert self.out.lines == []
+
+    def test_dropped(self):
+        def fail(line):
+            raise RuntimeError('broken output')
+        self.out.write = fail
+        with self.assertRaises(RuntimeError):
+            self.siginfo.handle(1, sys._getframe(), None)
+        stats = self.siginfo.stats()
+        assert stats['dropped'] == 1
+        assert stats['dumps'] == 0
+        assert not self.siginfo._busy
+
+    def test_no_footer(self):
+        self.siginfo.STATS_FOOTER = False
+        self.siginfo(1, sys._getframe())
+        assert not any(line.startswith('\nSIGINFO') for line in self.out.lines)
@@ -0,0 +1,174 @@
+import collections
+import csv
+import io
+import os
+import sys
+import tempfile
+import types
+import unittest
+
+from siginfo.localclass import LocalClass
+from siginfo.summary import IOProgress, SummarizerRegistry, summarizers
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+
+class IOProgressTests(unittest.TestCase):
+    def setUp(self):
+        fd, self.filename = tempfile.mkstemp()
+        with os.fdopen(fd, 'w') as fh:
+            fh.write('x' * 1000)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def test_file_progress(self):
+        summarize = IOProgress()
+        with open(self.filename, 'rb', buffering=0) as fh:
+            fh.read(250)
+            res = summarize(fh)
+            assert res.startswith('{} mode='.format(self.filename)), res
+            assert '25.0% (250 B / 1000 B)' in res
+            assert '/s' not in res
+
+            fh.read(250)
+            res = summarize(fh)
+            assert '50.0% (500 B / 1000 B)' in res
+            assert res.endswith('/s')
+
+    def test_text_file_during_iteration(self):
+        summarize = IOProgress()
+        with open(self.filename) as fh:
+            for line in fh:
+                res = summarize(fh)
+                assert '100.0%' in res, res
+
+    def test_closed_and_memory_files(self):
+        summarize = IOProgress()
+        fh = open(self.filename)
+        fh.close()
+        assert summarize(fh) is None
+        assert summarize(io.StringIO('abc')) is None
+
+    def test_iterators(self):
+        summarize = IOProgress()
+        it = iter(range(10, 20))
+        next(it)
+        assert summarize(it).startswith('range_iterator ')
+        assert summarize(it).endswith('next=11')
+
+        it = iter([1, 2, 3, 4])
+        next(it)
+        assert summarize(it) == 'list_iterator 1/4 (25.0%)'
+        list(it)
+        assert summarize(it) == 'list_iterator exhausted'
+
+        it = enumerate(['a', 'b'], 10)
+        next(it)
+        assert summarize(it) == 'enumerate index=11 of list_iterator 1/2 (50.0%)'
+
+    def test_csv_reader(self):
+        reader = csv.reader(io.StringIO('a,b\nc,d\n'))
+        next(reader)
+        assert IOProgress()(reader) == 'csv.reader line 1'
+
+    def test_other_values(self):
+        summarize = IOProgress()
+        assert summarize(12) is None
+        assert summarize('a string') is None
+
+    def test_local_class_integration(self):
+        it = iter([1, 2])
+        loc = LocalClass({'it': it, 'a': 1}, summarize=IOProgress())
+        assert loc.values[1] == 'list_iterator 0/2 (0.0%)'
+        assert loc.values[2] == '1'
+
+
+class Base(object):
+    pass
+
+
+class Child(Base):
+    pass
+
+
+class SummarizerRegistryTests(unittest.TestCase):
+    def test_dispatch_along_mro(self):
+        registry = SummarizerRegistry()
+        registry.register(Base, lambda value: 'base')
+        assert registry(Child()) == 'base'
+        assert registry(12) is None
+        assert Child in registry._cache
+
+        registry.register(Child, lambda value: 'child')
+        assert registry(Child()) == 'child'
+        assert registry(Base()) == 'base'
+
+    def test_decorator(self):
+        registry = SummarizerRegistry()
+
+        @registry.register(int)
+        def summarize_int(value):
+            return 'int {}'.format(value)
+
+        assert registry(True) == 'int True'
+
+    def test_failing_summarizer(self):
+        registry = SummarizerRegistry()
+        registry.register(int, lambda value: 1 / 0)
+        assert registry(12) is None
+
+    def test_lazy_registration_by_name(self):
+        registry = SummarizerRegistry()
+        registry.register('siginfo_test_module.Thing', lambda value: 'thing')
+        assert 'siginfo_test_module' not in sys.modules
+        assert registry(Base()) is None
+
+        module = types.ModuleType('siginfo_test_module')
+        module.Thing = type('Thing', (object,), {})
+        sys.modules['siginfo_test_module'] = module
+        try:
+            assert registry(module.Thing()) == 'thing'
+            assert registry._names == {}
+        finally:
+            del sys.modules['siginfo_test_module']
+
+    def test_containers(self):
+        assert summarizers([1, 2]) is None
+        assert summarizers(list(range(1000))) == 'len=1000 [0, 1, 2, ...]'
+        summary = summarizers(dict.fromkeys(range(5)))
+        assert summary.startswith('len=5 {0: None, 1: None, 2: None, ...}')
+        assert summarizers(collections.deque(range(5))).startswith('len=5 ')
+        assert summarizers('short') is None
+        assert summarizers('x' * 1000).startswith('len=1000 ')
+
+    def test_io_progress_is_registered(self):
+        it = iter([1, 2])
+        assert summarizers(it) == 'list_iterator 0/2 (0.0%)'
+
+    @unittest.skipIf(numpy is None, 'requires numpy')
+    def test_ndarray(self):
+        res = summarizers(numpy.arange(100000, dtype='int32').reshape(1000, 100))
+        assert res == 'shape=(1000, 100) dtype=int32 nbytes=390.6 KB ~min=0 max=99990', res
+        res = summarizers(numpy.array(['a', 'b']))
+        assert res == 'shape=(2,) dtype=<U1 nbytes=8 B', res
+
+    @unittest.skipIf(pandas is None, 'requires pandas')
+    def test_dataframe(self):
+        frame = pandas.DataFrame({'a': [1, 2], 'b': [1.0, 2.0], 'c': [0.1, 0.2]})
+        res = summarizers(frame)
+        assert res.startswith('shape=(2, 3) memory='), res
+        assert 'float64×2' in res
+        assert 'int64×1' in res
+
+
+if __name__ == '__main__':
+    unittest.main()
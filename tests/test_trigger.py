@@ -0,0 +1,139 @@
+import unittest
+
+from siginfo import siginfoclass as si
+from siginfo.monitor import has_monitoring, monitor, resolve_target
+from siginfo.trigger import Trigger
+
+
+class MockOutput(object):
+    def __init__(self):
+        self.lines = []
+
+    def write(self, line):
+        self.lines.append(line)
+
+    def flush(self):
+        pass
+
+
+class MockFrame(object):
+    def __init__(self, local_vars):
+        self.f_locals = local_vars
+        self.f_globals = {}
+
+
+class MockDump(object):
+    def __init__(self):
+        self.frames = []
+
+    def __call__(self, trigger, frame):
+        self.frames.append(frame)
+
+
+def count_up(n):
+    total = 0
+    for i in range(n):
+        total += i
+    return total
+
+
+class TriggerTests(unittest.TestCase):
+    def test_expression_predicate(self):
+        dump = MockDump()
+        trigger = Trigger(count_up.__code__, None, 'i > 2', dump, min_interval=0)
+        trigger(MockFrame({'i': 1}))
+        assert dump.frames == []
+        frame = MockFrame({'i': 3})
+        trigger(frame)
+        assert dump.frames == [frame]
+        assert trigger.hits == 2
+        assert trigger.dumps == 1
+
+    def test_callable_predicate(self):
+        dump = MockDump()
+        trigger = Trigger(
+            count_up.__code__, None, lambda local_vars: local_vars['i'] == 0, dump, min_interval=0
+        )
+        trigger(MockFrame({'i': 0}))
+        assert len(dump.frames) == 1
+
+    def test_rate_limit(self):
+        dump = MockDump()
+        trigger = Trigger(count_up.__code__, None, 'True', dump, min_interval=60)
+        trigger(MockFrame({}))
+        trigger(MockFrame({}))
+        assert len(dump.frames) == 1
+        assert trigger.suppressed == 1
+
+    def test_predicate_errors_are_isolated(self):
+        dump = MockDump()
+        trigger = Trigger(count_up.__code__, None, 'missing > 1', dump)
+        trigger(MockFrame({}))
+        assert dump.frames == []
+        assert trigger.errors == 1
+
+    def test_str(self):
+        trigger = Trigger(count_up.__code__, 12, 'i > 2', MockDump())
+        assert str(trigger) == 'count_up:12 if i > 2'
+
+
+class ResolveTargetTests(unittest.TestCase):
+    def test_function(self):
+        code, line = resolve_target(count_up)
+        assert code is count_up.__code__
+        assert line is None
+
+    def test_invalid_target(self):
+        with self.assertRaises(ValueError):
+            resolve_target(12)
+        with self.assertRaises(ValueError):
+            resolve_target('no_line_number.py')
+
+    @unittest.skipUnless(has_monitoring(), 'requires sys.monitoring')
+    def test_file_and_line(self):
+        line = count_up.__code__.co_firstlineno + 3
+        code, res_line = resolve_target('{}:{}'.format(__file__, line))
+        assert code is count_up.__code__
+        assert res_line == line
+
+
+@unittest.skipUnless(has_monitoring(), 'requires sys.monitoring')
+class SigInfoTriggerTests(unittest.TestCase):
+    def setUp(self):
+        self.output = MockOutput()
+        self.res = si.SigInfoTrigger(info=False, usr1=False, usr2=False, output=self.output)
+        self.res.MAX_LEVELS = 1
+        self.output.lines = []
+
+    def tearDown(self):
+        self.res.clear_triggers()
+        assert len(monitor) == 0
+        assert monitor._tool_id is None
+
+    def test_line_trigger(self):
+        line = count_up.__code__.co_firstlineno + 3
+        trigger = self.res.add_trigger(count_up, 'i == 5', line=line)
+        count_up(10)
+        assert trigger.hits == 10
+        assert trigger.dumps == 1
+        assert 'METHOD\t\tcount_up\n' in self.output.lines
+
+    def test_entry_trigger(self):
+        trigger = self.res.add_trigger(count_up, 'n > 3', min_interval=0)
+        count_up(2)
+        count_up(4)
+        count_up(5)
+        assert trigger.hits == 3
+        assert trigger.dumps == 2
+
+    def test_max_dumps_removes_instrumentation(self):
+        trigger = self.res.add_trigger(count_up, 'True', min_interval=0, max_dumps=1)
+        count_up(1)
+        count_up(1)
+        assert trigger.hits == 1
+        assert trigger.hook is None
+        assert trigger not in self.res.triggers
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 
-from siginfo.utils import left_string
+from siginfo.utils import left_string, sparkline
 
 
 class LeftString(unittest.TestCase):
@@ -23,5 +23,15 @@ class LeftString(unittest.TestCase):
         assert len(str_out) == 5
 
 
+class Sparkline(unittest.TestCase):
+    def test_scaling(self):
+        assert sparkline([1, 2, 3, 4]) == '▁▃▆█'
+        assert sparkline([10, 0]) == '█▁'
+
+    def test_constant_and_empty(self):
+        assert sparkline([5, 5, 5]) == '▁▁▁'
+        assert sparkline([]) == ''
+
+
 if __name__ == '__main__':
     unittest.main()